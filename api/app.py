@@ -203,6 +203,34 @@ async def advanced_search(request: SearchRequest):
         logger.error(f"Erro na busca avançada: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/search/proximity", response_model=SearchResponse, tags=["Search"])
+async def proximity_search(
+    name: str = Query(..., min_length=2, description="Nome de pessoa"),
+    place: str = Query(..., min_length=2, description="Lugar"),
+    distance: int = Query(10, ge=0, le=1000, description="Distância máxima em palavras"),
+    page: int = Query(1, ge=1, description="Número da página"),
+    size: int = Query(20, ge=1, le=100, description="Itens por página")
+):
+    """Documentos em que o nome aparece a até N palavras do lugar"""
+    start_time = time.time()
+    
+    try:
+        results = await search_service.proximity_search(name, place, distance, page, size)
+        
+        execution_time = int((time.time() - start_time) * 1000)
+        
+        return SearchResponse(
+            results=results['hits'],
+            total=results['total'],
+            page=page,
+            size=size,
+            total_pages=(results['total'] + size - 1) // size,
+            execution_time_ms=execution_time
+        )
+    except Exception as e:
+        logger.error(f"Erro na busca por proximidade: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/search/autocomplete", tags=["Search"])
 async def autocomplete(
     field: str = Query(..., pattern="^(autor|titulo|capitania|tipo)$", description="Campo para autocomplete"),
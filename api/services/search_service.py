@@ -12,8 +12,10 @@ import logging
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.elasticsearch_manager import ElasticsearchManager
+from src.entity_records import normalize_entity_key
 from api.utils.query_builder import QueryBuilder
 from api.utils.response_formatter import ResponseFormatter
+from api.utils.proximity import min_distance, count_within
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +70,51 @@ class SearchService:
             logger.error(f"Erro na busca avançada: {e}")
             raise
     
+    async def proximity_search(
+        self,
+        name: str,
+        place: str,
+        max_distance: int = 10,
+        page: int = 1,
+        size: int = 20
+    ) -> Dict[str, Any]:
+        """Documentos em que o nome aparece a até max_distance palavras do lugar"""
+        try:
+            name_key = normalize_entity_key(name)
+            place_key = normalize_entity_key(place)
+            
+            candidates = self.es_manager.scan_documents(
+                self.query_builder.build_proximity_candidates_query(name_key, place_key),
+                ["titulo", "autor", "ano_publicacao", "link_pdf",
+                 "dados_extraidos.positions.names", "dados_extraidos.positions.places"]
+            )
+            
+            # Distâncias calculadas sobre os arrays de posições armazenados (sem reler o texto)
+            hits = []
+            for hit in candidates:
+                source = hit['_source']
+                positions = source.pop('dados_extraidos', {}).get('positions', {})
+                name_positions = positions.get('names', {}).get(name_key, [])
+                place_positions = positions.get('places', {}).get(place_key, [])
+                
+                distance = min_distance(name_positions, place_positions)
+                if distance is None or distance > max_distance:
+                    continue
+                
+                source['id'] = hit['_id']
+                source['min_distance'] = distance
+                source['occurrences_within'] = count_within(name_positions, place_positions, max_distance)
+                hits.append(source)
+            
+            hits.sort(key=lambda doc: (doc['min_distance'], -doc['occurrences_within']))
+            start = (page - 1) * size
+            
+            return {'hits': hits[start:start + size], 'total': len(hits)}
+            
+        except Exception as e:
+            logger.error(f"Erro na busca por proximidade: {e}")
+            raise
+    
     async def autocomplete(self, field: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Fornece sugestões de autocomplete"""
         try:
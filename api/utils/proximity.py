@@ -0,0 +1,39 @@
+"""
+Proximidade entre Entidades
+Avalia distâncias entre arrays ordenados de posições (em palavras) de forma vetorizada
+"""
+
+from typing import Optional, Sequence
+import numpy as np
+
+
+def min_distance(positions_a: Sequence[int], positions_b: Sequence[int]) -> Optional[int]:
+    """Menor distância entre qualquer posição de A e qualquer posição de B"""
+    if not len(positions_a) or not len(positions_b):
+        return None
+
+    a = np.asarray(positions_a, dtype=np.int64)
+    b = np.sort(np.asarray(positions_b, dtype=np.int64))
+
+    # Para cada posição de A, vizinhos imediatos em B (à esquerda e à direita)
+    idx = np.searchsorted(b, a)
+    right = b[np.minimum(idx, len(b) - 1)]
+    left = b[np.maximum(idx - 1, 0)]
+    distances = np.minimum(np.abs(a - right), np.abs(a - left))
+
+    return int(distances.min())
+
+
+def count_within(positions_a: Sequence[int], positions_b: Sequence[int], max_distance: int) -> int:
+    """Quantas posições de A têm alguma posição de B a até max_distance palavras"""
+    if not len(positions_a) or not len(positions_b):
+        return 0
+
+    a = np.asarray(positions_a, dtype=np.int64)
+    b = np.sort(np.asarray(positions_b, dtype=np.int64))
+
+    # Número de posições de B dentro de [a - d, a + d]
+    lower = np.searchsorted(b, a - max_distance, side='left')
+    upper = np.searchsorted(b, a + max_distance, side='right')
+
+    return int(np.count_nonzero(upper > lower))
@@ -165,6 +165,17 @@ class QueryBuilder:
 
         return query
 
+    def build_proximity_candidates_query(self, name_key: str, place_key: str) -> Dict[str, Any]:
+        """Constrói query que seleciona documentos contendo o nome e o lugar (chaves normalizadas)"""
+        return {
+            "bool": {
+                "filter": [
+                    {"term": {"dados_extraidos.entity_keys.names": name_key}},
+                    {"term": {"dados_extraidos.entity_keys.places": place_key}}
+                ]
+            }
+        }
+    
     def build_autocomplete_query(self, field: str, prefix: str, limit: int = 10) -> Dict[str, Any]:
         """Constrói uma query para sugestões de autocomplete."""
         
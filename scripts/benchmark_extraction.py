@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark da extração de entidades
+Mede tempo, pico de memória (tracemalloc) e tempo de GC de DataExtractor.extract_all
+em um documento denso em entidades (sintético ou informado via --text).
+
+Para comparar versões, aponte --src para o diretório src de outra árvore
+(ex.: um `git worktree` do commit anterior).
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+import logging
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def build_benchmark_text(config_dir: Path, words: int, seed: int = 42) -> str:
+    """Gera um texto sintético com muitos nomes, lugares e datas da configuração"""
+    rng = random.Random(seed)
+    names = json.loads((config_dir / "names.json").read_text(encoding="utf-8"))
+    places = [line.split(',', 1)[0] for line in (config_dir / "places.txt").read_text(encoding="utf-8").splitlines() if ',' in line]
+    filler = "o dito senhor mandou escrever esta carta para que conste e se cumpra como nela se contém".split()
+    periods = ["no início do século XVII", "em meados do seiscentos", "na segunda metade do século XVIII", "no final do século XVI"]
+
+    parts = []
+    count = 0
+    while count < words:
+        choice = rng.random()
+        if choice < 0.25:
+            fragment = f"{rng.choice(names['first_names']).capitalize()} de {rng.choice(names['second_names']).capitalize()}"
+        elif choice < 0.4:
+            fragment = f"em {rng.choice(places[:40])}"
+        elif choice < 0.55:
+            fragment = f"no ano de {rng.randint(1500, 1899)}"
+        elif choice < 0.6:
+            fragment = rng.choice(periods)
+        else:
+            fragment = " ".join(rng.choices(filler, k=6))
+        parts.append(fragment)
+        count += len(fragment.split())
+    return ". ".join(parts)
+
+
+def run_benchmark(src_dir: Path, config_dir: Path, text: str, repeat: int) -> dict:
+    """Executa extract_all medindo memória, GC e tempo"""
+    sys.path.insert(0, str(src_dir))
+    from config_manager import ConfigManager
+    from data_extractor import DataExtractor
+
+    extractor = DataExtractor(ConfigManager(str(config_dir)))
+    extractor.extract_all(text)  # aquecimento (caches, imports)
+
+    gc_time = [0.0]
+    gc_started = [0.0]
+    gc_collections = [0]
+
+    def gc_callback(phase, info):
+        if phase == "start":
+            gc_started[0] = time.perf_counter()
+        else:
+            gc_time[0] += time.perf_counter() - gc_started[0]
+            gc_collections[0] += 1
+
+    gc.collect()
+    gc.callbacks.append(gc_callback)
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            result = extractor.extract_all(text)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        gc.callbacks.remove(gc_callback)
+
+    return {
+        "src": str(src_dir),
+        "text_chars": len(text),
+        "repeat": repeat,
+        "seconds_per_doc": round(elapsed / repeat, 4),
+        "peak_traced_mb": round(peak / (1024 * 1024), 2),
+        "gc_seconds": round(gc_time[0], 4),
+        "gc_collections": gc_collections[0],
+        "entities": {key: len(value) for key, value in result.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da extração de entidades')
+    parser.add_argument('--src', default=str(ROOT / "src"), help='Diretório src a ser medido')
+    parser.add_argument('--config', default=str(ROOT / "config"), help='Diretório de configuração')
+    parser.add_argument('--text', help='Arquivo de texto a usar no lugar do documento sintético')
+    parser.add_argument('--words', type=int, default=3000, help='Tamanho do documento sintético')
+    parser.add_argument('--repeat', type=int, default=3, help='Número de execuções medidas')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    config_dir = Path(args.config)
+    text = Path(args.text).read_text(encoding="utf-8") if args.text else build_benchmark_text(config_dir, args.words)
+
+    print(json.dumps(run_benchmark(Path(args.src), config_dir, text, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Verificação do BulkIndexer
+Usa um destino em memória que simula um cluster com capacidade limitada (responde
+429 quando há requisições simultâneas demais) e confere entrega única de cada
+documento, corte e recuperação da concorrência (AIMD), bloqueio do produtor com o
+buffer cheio, envio por idade e falhas permanentes sem repetição.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch.exceptions import ApiError
+
+from bulk_indexer import BulkIndexer, OUTCOME_FAILED, OUTCOME_INDEXED
+
+
+def too_many_requests() -> ApiError:
+    meta = ApiResponseMeta(status=429, http_version='1.1', headers=HttpHeaders(), duration=0.0,
+                           node=NodeConfig('http', 'localhost', 9200))
+    return ApiError("rejected", meta=meta, body={})
+
+
+class Cluster:
+    """Destino com bulk_write que rejeita requisições acima da capacidade"""
+
+    def __init__(self, capacity: int = 2, latency: float = 0.02):
+        self.capacity = capacity
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.docs = {}
+        self.rejected = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def bulk_write(self, documents, doc_ids, skip_unchanged=True):
+        self.gate.wait()
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            overloaded = self.active > self.capacity
+        try:
+            time.sleep(self.latency)
+            if overloaded:
+                self.rejected += 1
+                # Alterna rejeição da requisição inteira e de itens individuais
+                if self.rejected % 2:
+                    raise too_many_requests()
+                return {'items': [{'_id': doc_id, 'status': 429,
+                                   'error': {'type': 'es_rejected_execution_exception'}} for doc_id in doc_ids],
+                        'unchanged': []}
+            items = []
+            for document, doc_id in zip(documents, doc_ids):
+                if document.get('invalido'):
+                    items.append({'_id': doc_id, 'status': 400, 'error': {'type': 'mapper_parsing_exception'}})
+                    continue
+                with self._lock:
+                    self.docs.setdefault(doc_id, 0)
+                    self.docs[doc_id] += 1
+                items.append({'_id': doc_id, 'status': 201, 'error': None})
+            return {'items': items, 'unchanged': []}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def check(label: str, condition: bool) -> bool:
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def main() -> int:
+    results = []
+
+    # Cluster aceita 2 requisições simultâneas; o indexador começa com 8
+    cluster = Cluster(capacity=2)
+    outcomes = {}
+    lock = threading.Lock()
+
+    def on_result(doc_id, context, outcome, error):
+        with lock:
+            outcomes.setdefault(doc_id, []).append(outcome)
+
+    indexer = BulkIndexer(cluster, max_docs=5, flush_interval=0.05, max_in_flight=8,
+                          retry_backoff=0.01, on_result=on_result)
+    for number in range(400):
+        indexer.add(f"doc{number}", {'texto': 'x' * 200, 'invalido': number == 7}, context=number)
+    stats = indexer.close()
+
+    results.append(check("cada documento indexado exatamente uma vez",
+                         len(cluster.docs) == 399 and set(cluster.docs.values()) == {1}))
+    results.append(check("um resultado por documento",
+                         len(outcomes) == 400 and all(len(value) == 1 for value in outcomes.values())))
+    results.append(check("falha permanente (400) reportada sem repetição",
+                         outcomes['doc7'] == [OUTCOME_FAILED] and stats[OUTCOME_FAILED] == 1))
+    results.append(check(f"429 corta a concorrência (mínima {stats['min_concurrency']}, {stats['throttled']} cortes)",
+                         stats['throttled'] > 0 and stats['min_concurrency'] <= 2))
+    results.append(check(f"concorrência volta a crescer (final {indexer.concurrency})",
+                         indexer.concurrency > stats['min_concurrency']))
+
+    # Cluster parado: o produtor bloqueia quando o buffer enche
+    cluster = Cluster(capacity=8)
+    cluster.gate.clear()
+    indexer = BulkIndexer(cluster, max_docs=2, max_bytes=1000, max_buffer_bytes=5000,
+                          flush_interval=0.05, max_in_flight=1)
+    added = []
+
+    def produce():
+        for number in range(50):
+            indexer.add(f"doc{number}", {'texto': 'y' * 400})
+            added.append(number)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.5)
+    blocked = len(added)
+    results.append(check(f"produtor bloqueado com o buffer cheio ({blocked} de 50 aceitos)", blocked < 50))
+    cluster.gate.set()
+    producer.join(timeout=10)
+    indexer.close()
+    results.append(check("produtor liberado quando o cluster volta",
+                         len(added) == 50 and len(cluster.docs) == 50))
+
+    # Documento isolado sai pelo prazo, sem depender de close()
+    cluster = Cluster()
+    delivered = threading.Event()
+    indexer = BulkIndexer(cluster, max_docs=100, flush_interval=0.2,
+                          on_result=lambda doc_id, context, outcome, error: delivered.set())
+    started = time.monotonic()
+    indexer.add("sozinho", {'texto': 'z'})
+    sent = delivered.wait(timeout=5)
+    elapsed = time.monotonic() - started
+    results.append(check(f"lote parcial enviado por idade ({elapsed:.2f}s)", sent and 0.15 <= elapsed < 2))
+    stats = indexer.close()
+    results.append(check("estatísticas contam o documento", stats[OUTCOME_INDEXED] == 1))
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
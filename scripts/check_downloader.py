@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Verificação do downloader de PDFs
+Sobe um servidor HTTP local (com suporte a ETag e Range, ou sem Range) e confere
+download completo, requisição condicional, retomada de arquivo truncado,
+arquivo antigo sem metadados, verificação de hash (inclusive de cópias reaproveitadas)
+e corpo com Content-Encoding gzip.
+"""
+
+import gzip
+import hashlib
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from pdf_downloader import (
+    PDFDownloader, partial_path, sidecar_path,
+    STATUS_DOWNLOADED, STATUS_RESUMED, STATUS_NOT_MODIFIED, STATUS_FAILED
+)
+
+CONTENT = b"%PDF-1.4\n" + bytes(range(256)) * 4000 + b"\n%%EOF\n"
+ETAG = '"' + hashlib.sha256(CONTENT).hexdigest()[:16] + '"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Comportamento controlado pelo teste
+    ranges = True
+    truncate_next = False
+    gzip_body = False
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        Handler.requests_seen.append(dict(self.headers))
+
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if Handler.ranges and range_header and (not if_range or if_range == ETAG):
+            start = int(range_header.split('=')[1].rstrip('-'))
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(CONTENT)}')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}')
+        else:
+            self.send_response(200)
+
+        body = CONTENT[start:]
+        if Handler.gzip_body and not start:
+            # Content-Length passa a ser o tamanho comprimido
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if Handler.truncate_next:
+            # Simula queda de conexão no meio do corpo
+            Handler.truncate_next = False
+            self.wfile.write(body[:len(body) // 3])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+def check(label: str, condition: bool) -> bool:
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def main() -> int:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/doc.pdf"
+    expected = hashlib.sha256(CONTENT).hexdigest()
+
+    downloader = PDFDownloader(max_per_host=2)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = Path(tmp) / "doc.pdf"
+
+        result = downloader.download(url, pdf)
+        results.append(check("download completo", result['status'] == STATUS_DOWNLOADED
+                             and pdf.read_bytes() == CONTENT and result['sha256'] == expected))
+
+        result = downloader.download(url, pdf)
+        results.append(check("requisição condicional (304)", result['status'] == STATUS_NOT_MODIFIED
+                             and Handler.requests_seen[-1].get('If-None-Match') == ETAG))
+
+        # Queda no meio do download deixa .part; a próxima chamada retoma com Range
+        pdf.unlink()
+        sidecar_path(pdf).unlink()
+        Handler.truncate_next = True
+        result = downloader.download(url, pdf)
+        results.append(check("queda registrada como falha", result['status'] == STATUS_FAILED
+                             and not pdf.exists() and partial_path(pdf).exists()))
+        result = downloader.download(url, pdf)
+        results.append(check("retomada com Range", result['status'] == STATUS_RESUMED
+                             and pdf.read_bytes() == CONTENT
+                             and Handler.requests_seen[-1].get('Range', '').startswith('bytes=')))
+
+        # PDF baixado por versões anteriores (sem arquivo lateral) e completo
+        sidecar_path(pdf).unlink()
+        result = downloader.download(url, pdf)
+        results.append(check("arquivo antigo completo revalidado (416)", result['status'] == STATUS_RESUMED
+                             and pdf.read_bytes() == CONTENT and sidecar_path(pdf).exists()))
+
+        # Cópia local corrompida (mesmo tamanho): o 304 não basta, o arquivo é relido
+        pdf.unlink()
+        sidecar_path(pdf).unlink()
+        downloader.download(url, pdf)
+        corrupted = bytearray(CONTENT)
+        corrupted[10] ^= 0xFF
+        pdf.write_bytes(bytes(corrupted))
+        result = downloader.download(url, pdf, known_sha256=expected)
+        results.append(check("cópia corrompida descartada após 304", result['status'] == STATUS_DOWNLOADED
+                             and pdf.read_bytes() == CONTENT
+                             and Handler.requests_seen[-2].get('If-None-Match') == ETAG))
+
+        # .part com início corrompido: o arquivo retomado não confere com o hash conhecido
+        pdf.unlink()
+        sidecar_path(pdf).unlink()
+        partial_path(pdf).write_bytes(b"X" * 1000)
+        result = downloader.download(url, pdf, known_sha256=expected)
+        results.append(check("retomada divergente baixada de novo", result['status'] == STATUS_DOWNLOADED
+                             and pdf.read_bytes() == CONTENT and not partial_path(pdf).exists()))
+
+        # Corpo comprimido: Content-Length (comprimido) difere dos bytes gravados
+        Handler.gzip_body = True
+        gzipped = Path(tmp) / "gzip.pdf"
+        result = downloader.download(url, gzipped)
+        Handler.gzip_body = False
+        results.append(check("corpo com Content-Encoding gzip", result['status'] == STATUS_DOWNLOADED
+                             and gzipped.read_bytes() == CONTENT))
+
+        # Servidor sem suporte a Range: arquivo truncado é baixado de novo
+        Handler.ranges = False
+        sidecar_path(pdf).unlink()
+        pdf.write_bytes(CONTENT[:100])
+        result = downloader.download(url, pdf)
+        results.append(check("servidor sem Range", result['status'] == STATUS_DOWNLOADED
+                             and pdf.read_bytes() == CONTENT))
+
+        other = Path(tmp) / "other.pdf"
+        result = downloader.download(url, other, expected_sha256="0" * 64)
+        results.append(check("hash divergente rejeitado", result['status'] == STATUS_FAILED
+                             and not other.exists() and not partial_path(other).exists()))
+
+    downloader.close()
+    server.shutdown()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Verificação da extração de nomes
+Compara o tokenizador de candidatos com o regex original (texto de exemplo e documento
+sintético do benchmark) e mede casos adversariais (página em caixa alta e cabeçalho
+com palavras capitalizadas).
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from fuzzywuzzy import process
+from unidecode import unidecode
+from config_manager import ConfigManager
+from data_extractor import DataExtractor
+from benchmark_extraction import build_benchmark_text
+
+SAMPLE_TEXT = """
+Carta de Antonio Rodrigues da Silva escrita em 1598 na Cidade da Bahia. No início do século XVII,
+Manuel Fernandes partiu para Olinda. Em meados do seiscentos, Francisco de Souza Pereira voltou a Camamú.
+João Gomes casou com Maria de Araujo. Testemunhas: Domingos Coelho da Costa Rego, Pedro de Barros,
+Gaspar de Souza. Assinado por Bento Dias Pais e Diogo de Vasconcelos Lobo Pereira Coutinho.
+"""
+
+
+def baseline_names(extractor: DataExtractor, text: str) -> list:
+    """Reproduz a extração de nomes anterior (regex com backtracking)"""
+    prepositions = extractor.names_config['prepositions']
+    name_pattern = r'\b([A-ZÁÀÂÃÉÊÍÓÔÕÚÇ][a-záàâãéêíóôõúç]+)(?:\s+(?:' + '|'.join(prepositions) + r')\s+)?([A-ZÁÀÂÃÉÊÍÓÔÕÚÇ][a-záàâãéêíóôõúç]+(?:\s+[A-ZÁÀÂÃÉÊÍÓÔÕÚÇ][a-záàâãéêíóôõúç]+)*)'
+
+    def confidence(name: str, name_list: list) -> float:
+        # Busca original: exata e fuzzy contra a lista inteira, sem cache
+        name_normalized = unidecode(name.lower())
+        if name_normalized in name_list:
+            return 1.0
+        best_match = process.extractOne(name_normalized, name_list)
+        return best_match[1] / 100 if best_match and best_match[1] > 80 else 0.0
+
+    names = []
+    for match in re.finditer(name_pattern, text):
+        first = confidence(match.group(1), extractor.first_names_normalized)
+        last = confidence(match.group(2), extractor.second_names_normalized)
+        if (first + last) / 2 > 0.6:
+            names.append((match.start(), match.group(0)))
+    return names
+
+
+def check_recall(extractor: DataExtractor, text: str, label: str, verbose: bool = True) -> bool:
+    """Todo nome encontrado pelo regex original deve estar contido em um nome do novo resultado.
+
+    Nomes repetidos aparecem uma vez no novo resultado (demais posições em occurrences),
+    e um nome pode começar antes ("São Miguel de Cintra" contém "Miguel de Cintra").
+    """
+    print(f"🔍 Comparando com a extração original ({label})...")
+    old = baseline_names(extractor, text)
+    new = [(n['position'], n['full_name']) for n in extractor.extract_names(text)]
+    new_names = [unidecode(full_name.lower()) for _, full_name in new]
+
+    missing = [name for name in old if not any(unidecode(name[1].lower()) in found for found in new_names)]
+    if verbose:
+        print(f"   original: {len(old)} nomes -> {[n for _, n in old]}")
+        print(f"   novo:     {len(new)} nomes -> {[n for _, n in sorted(new)]}")
+    else:
+        print(f"   original: {len(old)} nomes, novo: {len(new)} nomes")
+
+    if missing:
+        print(f"❌ Nomes perdidos: {missing}")
+        return False
+    print("✅ Nenhum nome da extração original foi perdido")
+    return True
+
+
+def check_adversarial(extractor: DataExtractor, words: int = 20000, max_seconds: float = 5.0) -> bool:
+    """Textos longos em caixa alta ou só com palavras capitalizadas devem escalar linearmente"""
+    print("⏱️  Casos adversariais...")
+    vocabulary = ["Carta", "Governador", "Capitania", "Pernambuco", "Provedor", "Fazenda", "Real", "Conselho"]
+    cases = {
+        "caixa alta": " ".join(w.upper() for w in (vocabulary * (words // len(vocabulary) + 1))[:words]),
+        "capitalizado": " ".join((vocabulary * (words // len(vocabulary) + 1))[:words]),
+    }
+
+    success = True
+    for label, text in cases.items():
+        timings = []
+        for size in (words // 4, words):
+            sample = text[:len(text) * size // words]
+            start = time.perf_counter()
+            extractor.extract_names(sample)
+            timings.append(time.perf_counter() - start)
+        ratio = timings[1] / timings[0] if timings[0] else 0.0
+        print(f"   {label}: {timings[0]:.3f}s ({words // 4} palavras) / {timings[1]:.3f}s ({words} palavras), razão {ratio:.1f}")
+        if timings[1] > max_seconds:
+            print(f"❌ {label}: extração muito lenta")
+            success = False
+    return success
+
+
+def main() -> int:
+    extractor = DataExtractor(ConfigManager(str(ROOT / "config")))
+    benchmark_text = build_benchmark_text(ROOT / "config", 3000)
+    results = [
+        check_recall(extractor, SAMPLE_TEXT, "texto de exemplo"),
+        check_recall(extractor, benchmark_text, "documento do benchmark, 3000 palavras", verbose=False),
+        check_adversarial(extractor),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Verificação do cache de PDFs com cota
+Baixa PDFs de um servidor HTTP local para um diretório com cota pequena e confere
+a ordem de remoção (já extraídos primeiro, depois menos usados), arquivos fixados
+e em uso preservados, PDFs locais sem origem intocados e novo download sob demanda.
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from pdf_cache import PDFCache, POLICY_LRU
+from pdf_downloader import PDFDownloader, sidecar_path, STATUS_DOWNLOADED
+
+SIZE = 10_000
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = b"%PDF-1.4\n" + self.path.encode() * (SIZE // len(self.path))
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def check(label: str, condition: bool) -> bool:
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def main() -> int:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    downloader = PDFDownloader()
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+
+        def fetch(cache, name):
+            pdf = directory / f"{name}.pdf"
+            cache.acquire(pdf)
+            result = downloader.download(f"{base}/{name}", pdf)
+            cache.admit(pdf)
+            return pdf, result
+
+        # PDF colocado à mão (sem arquivo lateral): não pode ser baixado de novo, nunca é removido
+        manual = directory / "manual.pdf"
+        manual.write_bytes(b"%PDF-1.4\n" + b"x" * SIZE)
+
+        # Cota para três PDFs
+        cache = PDFCache(directory, max_bytes=3 * SIZE + 100, pinned_patterns=["fixo*"])
+        pdfs = {}
+        for name in ("fixo", "a", "b"):
+            pdfs[name], _ = fetch(cache, name)
+            time.sleep(0.01)
+        for name in ("fixo", "a", "b"):
+            cache.release(pdfs[name])
+        cache.mark_extracted(pdfs["b"])
+
+        pdfs["c"], _ = fetch(cache, "c")
+        results.append(check("extraído removido primeiro, mesmo sendo o mais recente",
+                             not pdfs["b"].exists() and not sidecar_path(pdfs["b"]).exists()
+                             and pdfs["a"].exists()))
+
+        pdfs["d"], _ = fetch(cache, "d")
+        results.append(check("depois o menos usado; fixado preservado",
+                             not pdfs["a"].exists() and pdfs["fixo"].exists()))
+        results.append(check("PDF sem origem conhecida intocado", manual.exists()))
+        results.append(check("cota respeitada", cache.used_bytes() <= cache.max_bytes))
+
+        # c e d em uso: o novo PDF estoura a cota em vez de remover um à espera do parsing
+        pdfs["e"], _ = fetch(cache, "e")
+        results.append(check("arquivos em uso não removidos",
+                             pdfs["c"].exists() and pdfs["d"].exists() and pdfs["e"].exists()))
+        for name in ("c", "d", "e"):
+            cache.release(pdfs[name])
+
+        pdf, result = fetch(cache, "a")
+        results.append(check("PDF removido baixado de novo sob demanda",
+                             result['status'] == STATUS_DOWNLOADED and pdf.exists()))
+        cache.release(pdf)
+        summary = cache.summary()
+        cache.close()
+
+        # Reabertura: registro persistente e sincronizado com o disco
+        pdfs["fixo"].unlink()
+        reopened = PDFCache(directory, max_bytes=SIZE * 10, policy=POLICY_LRU)
+        reopened_summary = reopened.summary()
+        results.append(check("registro persistente e reconciliado com o disco",
+                             reopened_summary['files'] == summary['files'] - 1))
+        reopened.close()
+
+    downloader.close()
+    server.shutdown()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Verificação das escritas idempotentes no Elasticsearch
+Usa um cliente em memória (mget/get/index/bulk com _seq_no) e confere que documentos
+inalterados não são reescritos, que alterados são substituídos uma única vez e que
+uma escrita concorrente vira conflito em vez de sobrescrever a versão mais nova,
+além do envio em streaming com requisições limitadas por bytes.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from elastic_transport import ObjectApiResponse
+from elasticsearch.exceptions import NotFoundError
+from elasticsearch.serializer import JsonSerializer
+
+from elasticsearch_manager import ElasticsearchManager, FINGERPRINT_FIELD, content_fingerprint
+
+
+class _Serializers:
+    def get_serializer(self, mimetype):
+        return JsonSerializer()
+
+
+class _Transport:
+    serializers = _Serializers()
+
+
+class MemoryClient:
+    """Subconjunto da API do cliente Elasticsearch usado pelo gerenciador"""
+
+    def __init__(self):
+        self.docs = {}
+        self.seq_no = 0
+        self.writes = 0
+        self.requests = 0
+        self.before_bulk = None
+        self.transport = _Transport()
+
+    def options(self, **kwargs):
+        return self
+
+    def _write(self, doc_id, source, op_type='index', if_seq_no=None):
+        current = self.docs.get(doc_id)
+        if (op_type == 'create' and current) or (if_seq_no is not None and (not current or current[0] != if_seq_no)):
+            return 409
+        self.seq_no += 1
+        self.writes += 1
+        self.docs[doc_id] = (self.seq_no, source)
+        return 201 if current is None else 200
+
+    def _hit(self, doc_id, includes):
+        if doc_id not in self.docs:
+            return {'_id': doc_id, 'found': False}
+        seq_no, source = self.docs[doc_id]
+        return {
+            '_id': doc_id, 'found': True, '_seq_no': seq_no, '_primary_term': 1,
+            '_source': {field: source[field] for field in includes if field in source},
+        }
+
+    def mget(self, index, ids, source_includes):
+        return {'docs': [self._hit(doc_id, source_includes) for doc_id in ids]}
+
+    def get(self, index, id, source_includes):
+        hit = self._hit(id, source_includes)
+        if not hit['found']:
+            raise NotFoundError(404, 'not_found', {})
+        return hit
+
+    def index(self, index, id, body, op_type='index', if_seq_no=None, if_primary_term=None):
+        status = self._write(id, body, op_type, if_seq_no)
+        assert status != 409, "conflito inesperado em index()"
+        return {'_id': id}
+
+    def bulk(self, operations, **kwargs):
+        if self.before_bulk:
+            self.before_bulk()
+            self.before_bulk = None
+        self.requests += 1
+        lines = [json.loads(line) for line in operations]
+        items = []
+        for header, source in zip(lines[::2], lines[1::2]):
+            op_type, meta = next(iter(header.items()))
+            status = self._write(meta['_id'], source, op_type, meta.get('if_seq_no'))
+            item = {'_id': meta['_id'], 'status': status}
+            if status == 409:
+                item['error'] = {'type': 'version_conflict_engine_exception'}
+            items.append({op_type: item})
+        return ObjectApiResponse(body={'errors': any('error' in next(iter(i.values())) for i in items),
+                                       'items': items}, meta=None)
+
+
+def make_manager():
+    manager = ElasticsearchManager.__new__(ElasticsearchManager)
+    manager.index_name = 'check'
+    manager.es = MemoryClient()
+    return manager
+
+
+def document(name, text, stamp):
+    return {
+        'nome_arquivo': f'{name}.pdf',
+        'texto_completo': text,
+        'data_processamento': stamp,
+        'metadata': {'processed_at': stamp},
+    }
+
+
+def batch(stamp, changed=None):
+    docs = [document(name, f'texto de {name}', stamp) for name in ('a', 'b', 'c')]
+    if changed:
+        docs[['a', 'b', 'c'].index(changed)]['texto_completo'] += ' (revisado)'
+    for doc in docs:
+        doc[FINGERPRINT_FIELD] = content_fingerprint(doc)
+    return docs, ['a', 'b', 'c']
+
+
+def main():
+    failures = []
+
+    def check(name, condition, detail=''):
+        print(f"{'✅' if condition else '❌'} {name} {detail}".rstrip())
+        if not condition:
+            failures.append(name)
+
+    check("impressão ignora carimbos de data",
+          content_fingerprint(document('a', 't', '2024-01-01')) == content_fingerprint(document('a', 't', '2025-06-30')))
+
+    manager = make_manager()
+    client = manager.es
+
+    result = manager.bulk_index(*batch('2024-01-01'))
+    check("primeira carga cria todos", result['success_count'] == 3 and client.writes == 3, str(result))
+
+    result = manager.bulk_index(*batch('2024-02-01'))
+    check("reexecução sem mudanças não escreve", result['unchanged_count'] == 3 and client.writes == 3, str(result))
+
+    result = manager.bulk_index(*batch('2024-03-01', changed='b'))
+    check("documento alterado substituído uma vez",
+          result['success_count'] == 1 and result['unchanged_count'] == 2 and client.writes == 4, str(result))
+
+    # Outra instância reescreve 'c' entre o mget e o bulk: a versão lida ficou velha
+    def concurrent_write():
+        client._write('c', {'texto_completo': 'versão de outra instância'})
+    client.before_bulk = concurrent_write
+    result = manager.bulk_index(*batch('2024-04-01', changed='c'))
+    check("escrita concorrente vira conflito, não falha nem sobrescreve",
+          result['conflict_count'] == 1 and result['failed_count'] == 0
+          and client.docs['c'][1]['texto_completo'] == 'versão de outra instância', str(result))
+
+    docs, _ = batch('2024-05-01')
+    writes = client.writes
+    manager.index_document(docs[0], doc_id='a')
+    check("index_document pula documento inalterado", client.writes == writes)
+
+    result = manager.bulk_index(*batch('2024-06-01'), skip_unchanged=False)
+    check("skip_unchanged=False sempre escreve", result['success_count'] == 3, str(result))
+
+    docs, ids = batch('2024-07-01', changed='a')
+    result = manager.bulk_write(docs, ids)
+    check("bulk_write informa cada documento",
+          result['unchanged'] == ['b', 'c'] and [item['_id'] for item in result['items']] == ['a']
+          and result['items'][0]['status'] == 200, str(result))
+
+    # Gerador (nada materializado) e requisições limitadas por bytes, não por quantidade
+    docs, ids = batch('2024-08-01', changed='a')
+    for doc in docs:
+        doc['texto_completo'] += ' ' + 'x' * 2000
+        doc[FINGERPRINT_FIELD] = content_fingerprint(doc)
+    requests = client.requests
+    result = manager.bulk_index((doc for doc in docs), iter(ids), max_chunk_bytes=3000)
+    check("bulk_index em streaming divide requisições por tamanho",
+          result['success_count'] == 3 and client.requests - requests == 3, str(result))
+
+    docs, ids = batch('2024-09-01', changed='b')
+    result = manager.bulk_index(docs, ids, thread_count=2)
+    check("bulk_index com threads paralelas", result['success_count'] == 3, str(result))
+
+    first = manager._generate_document_id(document('x', 't', '2024-01-01'))
+    second = manager._generate_document_id(document('x', 't', '2024-09-09'))
+    check("ID gerado estável entre execuções", first == second, f"{first} {second}")
+
+    if failures:
+        print(f"\n{len(failures)} verificações falharam")
+        sys.exit(1)
+    print("\nTodas as verificações passaram")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ import logging
 # Adicionar diretório raiz ao path para importações corretas
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.elasticsearch_manager import ElasticsearchManager
+from src.elasticsearch_manager import ElasticsearchManager, merge_additive_properties
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -111,11 +111,17 @@ def create_index_with_mapping(force_recreate: bool = False):
             }
         }
 
+        # Campos mais novos (posições de entidades, hash de conteúdo, versões, temas do corpus)
+        merge_additive_properties(mappings)
+
         logger.info("Tentando criar/recriar o índice...")
         if es_manager.create_index_with_mapping(settings, mappings, force_recreate=force_recreate):
             logger.info(f"Índice '{es_manager.index_name}' criado/atualizado com sucesso.")
         else:
-            logger.warning(f"Índice '{es_manager.index_name}' já existia e não foi recriado. Use --force para recriar.")
+            logger.warning(
+                f"Índice '{es_manager.index_name}' já existia e não foi recriado; campos novos foram "
+                f"acrescentados ao mapeamento. Use --force para recriar."
+            )
 
     except Exception as e:
         logger.error(f"Ocorreu um erro ao criar o índice: {e}", exc_info=True)
@@ -0,0 +1,167 @@
+"""
+PDFs em Pacotes ZIP/TAR
+Lista os PDFs de pacotes ZIP e TAR e abre cada membro como stream para o parsing,
+sem descompactar o pacote em disco. Membros armazenados sem compressão (ZIP stored,
+TAR sem compressão) são lidos direto do pacote por uma janela de bytes; membros
+comprimidos são descomprimidos em memória no worker.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import struct
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# Cabeçalho local de um membro ZIP (assinatura ... tamanho do nome, tamanho do extra)
+_ZIP_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+
+class MemberFile(io.RawIOBase):
+    """Janela somente leitura [offset, offset + size) de um arquivo: membro lido direto do pacote"""
+
+    def __init__(self, path: str, offset: int, size: int, name: str):
+        self._file = open(path, 'rb')
+        self._offset = offset
+        self._size = size
+        self._position = 0
+        self.name = name
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, position: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: self._size}[whence]
+        self._position = max(0, base + position)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), self._size - self._position)
+        if count <= 0:
+            return 0
+        self._file.seek(self._offset + self._position)
+        read = self._file.readinto(memoryview(buffer)[:count])
+        self._position += read
+        return read
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def is_archive(path: str) -> bool:
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def archive_stem(path: str) -> str:
+    """Nome do pacote sem a extensão ('lote_1599.tar.gz' -> 'lote_1599')"""
+    name = Path(path).name
+    for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _zip_data_offset(archive: BinaryIO, info: zipfile.ZipInfo) -> int:
+    """Início dos dados do membro: o extra do cabeçalho local pode diferir do diretório central"""
+    archive.seek(info.header_offset)
+    header = _ZIP_LOCAL_HEADER.unpack(archive.read(_ZIP_LOCAL_HEADER.size))
+    name_length, extra_length = header[-2], header[-1]
+    return info.header_offset + _ZIP_LOCAL_HEADER.size + name_length + extra_length
+
+
+def _member(archive: Path, name: str, archive_format: str, size: int, **fields: Any) -> Dict[str, Any]:
+    """Referência serializável de um membro (enviada aos workers no lugar do caminho do PDF)"""
+    return {'archive': str(archive), 'member': name, 'format': archive_format, 'size': size,
+            'offset': None, 'crc': None, 'data': None, **fields}
+
+
+def iter_archive_members(path: str) -> Iterator[Dict[str, Any]]:
+    """Membros .pdf do pacote, na ordem em que aparecem.
+
+    TAR comprimido não tem acesso aleatório: os membros são lidos em sequência e
+    viajam com os bytes ('data'), sem passar pelo disco.
+    """
+    archive = Path(path)
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as bundle, open(archive, 'rb') as raw:
+            for info in bundle.infolist():
+                if info.is_dir() or not info.filename.lower().endswith('.pdf'):
+                    continue
+                if info.flag_bits & 0x1:
+                    logger.warning(f"Membro criptografado ignorado: {archive.name}!/{info.filename}")
+                    continue
+                offset = _zip_data_offset(raw, info) if info.compress_type == zipfile.ZIP_STORED else None
+                yield _member(archive, info.filename, 'zip', info.file_size, offset=offset, crc=info.CRC)
+        return
+
+    try:
+        bundle = tarfile.open(archive, 'r:')
+        compressed = False
+    except tarfile.ReadError:
+        bundle = tarfile.open(archive, 'r|*')
+        compressed = True
+    with bundle:
+        for info in bundle:
+            if not info.isfile() or not info.name.lower().endswith('.pdf'):
+                continue
+            if compressed:
+                data = bundle.extractfile(info).read()
+                yield _member(archive, info.name, 'tar', info.size, data=data)
+            else:
+                yield _member(archive, info.name, 'tar', info.size, offset=info.offset_data)
+
+
+def count_archive_members(path: str) -> Optional[int]:
+    """Número de PDFs no pacote, ou None se exigir descomprimir tudo (TAR comprimido)"""
+    archive = Path(path)
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as bundle:
+            return sum(1 for info in bundle.infolist() if info.filename.lower().endswith('.pdf') and not info.is_dir())
+    try:
+        with tarfile.open(archive, 'r:') as bundle:
+            return sum(1 for info in bundle if info.isfile() and info.name.lower().endswith('.pdf'))
+    except tarfile.ReadError:
+        return None
+
+
+def open_member(member: Dict[str, Any]) -> BinaryIO:
+    """Stream binário com seek do membro (name = membro, para logs e metadados)"""
+    name = member['member']
+    if member['data'] is not None:
+        stream = io.BytesIO(member['data'])
+    elif member['offset'] is not None:
+        return io.BufferedReader(
+            MemberFile(member['archive'], member['offset'], member['size'], name), buffer_size=1024 * 1024
+        )
+    else:
+        # Membro ZIP comprimido: a descompressão em memória é a única cópia
+        with zipfile.ZipFile(member['archive']) as bundle:
+            stream = io.BytesIO(bundle.read(name))
+    stream.name = name
+    return stream
+
+
+def member_hash(member: Dict[str, Any]) -> str:
+    """Identidade do conteúdo para o ledger: CRC32 + tamanho do ZIP (sem ler os dados) ou sha256"""
+    if member['crc'] is not None:
+        return f"zip-crc32:{member['crc']:08x}:{member['size']}"
+    digest = hashlib.sha256()
+    with open_member(member) as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,241 @@
+"""
+Indexador em Lote com Backpressure
+Acumula documentos e os envia em requisições _bulk por quantidade, tamanho ou idade,
+com algumas requisições simultâneas. Itens com falha transitória são repetidos; uma
+rejeição por sobrecarga (429 / es_rejected_execution) corta a concorrência pela
+metade, que volta a crescer de uma em uma requisição (AIMD). Produtores ficam
+bloqueados enquanto o buffer estiver cheio.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from elasticsearch.exceptions import ApiError, TransportError
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_INDEXED = 'indexed'
+OUTCOME_UNCHANGED = 'unchanged'
+OUTCOME_CONFLICT = 'conflict'
+OUTCOME_FAILED = 'failed'
+
+# Falhas transitórias: o item (ou a requisição inteira) é enviado de novo
+_RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def _throttled(status: Optional[int], error: Optional[Dict[str, Any]]) -> bool:
+    """Rejeição por sobrecarga do cluster (fila de escrita cheia)"""
+    return status == 429 or 'es_rejected_execution' in str((error or {}).get('type', ''))
+
+
+class BulkIndexer:
+    def __init__(self, es_manager, max_docs: int = 500, max_bytes: int = 10 * 1024 * 1024,
+                 flush_interval: float = 5.0, max_in_flight: int = 4, max_buffer_bytes: Optional[int] = None,
+                 max_retries: int = 5, retry_backoff: float = 0.5, skip_unchanged: bool = True,
+                 on_result: Optional[Callable[[str, Any, str, Optional[str]], None]] = None,
+                 on_request: Optional[Callable[[float, int], None]] = None):
+        """Indexador sobre es_manager.bulk_write (ElasticsearchManager ou destinos de index_sinks).
+
+        Um lote sai com max_docs documentos, max_bytes de JSON ou quando o documento
+        mais antigo completa flush_interval segundos. add() bloqueia enquanto os
+        documentos no buffer e em envio somarem max_buffer_bytes. on_result(doc_id,
+        context, outcome, erro) é chamado uma vez por documento, nas threads de envio.
+        """
+        self.es_manager = es_manager
+        self.max_docs = max(1, max_docs)
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_buffer_bytes = max_buffer_bytes or max_bytes * (self.max_in_flight + 2)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.skip_unchanged = skip_unchanged
+        self.on_result = on_result
+        self.on_request = on_request
+        # Concorrência atual (AIMD), entre 1 e max_in_flight
+        self.concurrency = self.max_in_flight
+        self.stats = {
+            OUTCOME_INDEXED: 0, OUTCOME_UNCHANGED: 0, OUTCOME_CONFLICT: 0, OUTCOME_FAILED: 0,
+            'requests': 0, 'retries': 0, 'throttled': 0, 'min_concurrency': self.concurrency
+        }
+
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._pending_bytes = 0
+        self._buffered_bytes = 0  # pendentes + em envio
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._closing = False
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='bulk')
+        self._dispatcher = threading.Thread(target=self._dispatch, name='bulk-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def __enter__(self) -> 'BulkIndexer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, doc_id: str, document: Dict[str, Any], context: Any = None) -> None:
+        """Enfileira um documento; bloqueia enquanto o buffer estiver cheio"""
+        size = len(json.dumps(document, ensure_ascii=False, default=str))
+        with self._cond:
+            # Um documento maior que o buffer inteiro ainda entra quando o buffer esvazia
+            while self._buffered_bytes and self._buffered_bytes + size > self.max_buffer_bytes:
+                self._cond.wait()
+            if self._closing:
+                raise RuntimeError("BulkIndexer já encerrado")
+            self._pending.append({
+                'doc_id': doc_id, 'document': document, 'context': context,
+                'size': size, 'added': time.monotonic(), 'attempts': 0
+            })
+            self._pending_bytes += size
+            self._buffered_bytes += size
+            self._cond.notify_all()
+
+    def close(self) -> Dict[str, int]:
+        """Envia o que restou no buffer, espera as requisições em andamento e encerra"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+        return self.stats
+
+    def _dispatch(self) -> None:
+        """Forma os lotes e os envia respeitando a concorrência atual"""
+        while True:
+            with self._cond:
+                while True:
+                    timeout = None
+                    if self._pending and self._in_flight < self.concurrency:
+                        age = time.monotonic() - self._pending[0]['added']
+                        if (self._closing or len(self._pending) >= self.max_docs
+                                or self._pending_bytes >= self.max_bytes or age >= self.flush_interval):
+                            break
+                        timeout = self.flush_interval - age
+                    elif self._closing and not self._pending and not self._in_flight:
+                        return
+                    self._cond.wait(timeout)
+
+                batch: List[Dict[str, Any]] = []
+                batch_bytes = 0
+                while self._pending and len(batch) < self.max_docs and (not batch or batch_bytes < self.max_bytes):
+                    entry = self._pending.popleft()
+                    batch.append(entry)
+                    batch_bytes += entry['size']
+                self._pending_bytes -= batch_bytes
+                self._in_flight += 1
+            self._executor.submit(self._send, batch)
+
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        """Executa uma requisição _bulk e classifica o resultado de cada documento"""
+        started = time.monotonic()
+        finished: List[tuple] = []
+        retry: List[Dict[str, Any]] = []
+        throttled = False
+        try:
+            result = self.es_manager.bulk_write(
+                [entry['document'] for entry in batch], [entry['doc_id'] for entry in batch],
+                skip_unchanged=self.skip_unchanged
+            )
+        except (ApiError, TransportError) as e:
+            status = e.status_code if isinstance(e, ApiError) else None
+            if isinstance(e, TransportError) or status in _RETRY_STATUSES:
+                # Requisição inteira rejeitada ou sem resposta: todo o lote é repetido
+                (logger.debug if status == 429 else logger.warning)(f"Requisição bulk com {len(batch)} documentos falhou ({e}), repetindo")
+                throttled = status == 429
+                retry = batch
+            else:
+                logger.error(f"Erro no envio em lote: {e}")
+                finished = [(entry, OUTCOME_FAILED, str(e)) for entry in batch]
+        except Exception as e:
+            logger.error(f"Erro no envio em lote: {e}")
+            finished = [(entry, OUTCOME_FAILED, str(e)) for entry in batch]
+        else:
+            entries = defaultdict(deque)
+            for entry in batch:
+                entries[entry['doc_id']].append(entry)
+            for doc_id in result['unchanged']:
+                finished.append((entries[doc_id].popleft(), OUTCOME_UNCHANGED, None))
+            for item in result['items']:
+                entry = entries[item['_id']].popleft()
+                status, error = item['status'], item.get('error')
+                if 200 <= status < 300:
+                    finished.append((entry, OUTCOME_INDEXED, None))
+                elif status == 409:
+                    # Outra escrita do mesmo documento venceu (ver _write_actions)
+                    finished.append((entry, OUTCOME_CONFLICT, None))
+                elif status in _RETRY_STATUSES or _throttled(status, error):
+                    throttled = throttled or _throttled(status, error)
+                    retry.append(entry)
+                else:
+                    finished.append((entry, OUTCOME_FAILED, json.dumps(error, ensure_ascii=False)))
+
+        if self.on_request:
+            self.on_request(time.monotonic() - started, len(batch))
+
+        exhausted = [entry for entry in retry if entry['attempts'] >= self.max_retries]
+        retry = [entry for entry in retry if entry['attempts'] < self.max_retries]
+        finished.extend((entry, OUTCOME_FAILED, "Tentativas esgotadas") for entry in exhausted)
+
+        with self._cond:
+            self.stats['requests'] += 1
+            if throttled:
+                self._decrease(started)
+            elif not retry:
+                self._increase()
+            self._buffered_bytes -= sum(entry['size'] for entry, _, _ in finished)
+            self._cond.notify_all()
+        for entry, outcome, error in finished:
+            self._report(entry, outcome, error)
+
+        if retry:
+            attempts = max(entry['attempts'] for entry in retry)
+            # Espera ocupando a vaga: com a concorrência reduzida, o cluster ganha tempo para drenar
+            time.sleep(self.retry_backoff * 2 ** attempts)
+            for entry in retry:
+                entry['attempts'] += 1
+
+        with self._cond:
+            self.stats['retries'] += len(retry)
+            for entry in reversed(retry):
+                self._pending.appendleft(entry)
+                self._pending_bytes += entry['size']
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _decrease(self, batch_started: float) -> None:
+        """Corte multiplicativo, uma vez por episódio de sobrecarga (chamado com o lock)"""
+        if batch_started < self._last_decrease:
+            return  # Requisição enviada antes do último corte: mesma sobrecarga
+        self._last_decrease = time.monotonic()
+        self._successes = 0
+        self.stats['throttled'] += 1
+        if self.concurrency > 1:
+            self.concurrency = max(1, self.concurrency // 2)
+            self.stats['min_concurrency'] = min(self.stats['min_concurrency'], self.concurrency)
+            logger.warning(f"Elasticsearch sobrecarregado (429), concorrência do bulk reduzida para {self.concurrency}")
+
+    def _increase(self) -> None:
+        """Crescimento aditivo: +1 após uma rodada (concorrência atual) de requisições bem-sucedidas"""
+        self._successes += 1
+        if self._successes >= self.concurrency and self.concurrency < self.max_in_flight:
+            self.concurrency += 1
+            self._successes = 0
+            logger.info(f"Concorrência do bulk aumentada para {self.concurrency}")
+
+    def _report(self, entry: Dict[str, Any], outcome: str, error: Optional[str]) -> None:
+        with self._cond:
+            self.stats[outcome] += 1
+        if self.on_result:
+            try:
+                self.on_result(entry['doc_id'], entry['context'], outcome, error)
+            except Exception as e:
+                logger.error(f"Erro no callback do documento {entry['doc_id']}: {e}")
@@ -127,6 +127,7 @@ class ConfigManager:
             # Validações básicas
             assert 'regex_patterns' in date_config, "regex_patterns não encontrado em date_config"
             assert 'century_map' in date_config, "century_map não encontrado em date_config"
+            assert 'month_map' in date_config, "month_map não encontrado em date_config"
             
             assert 'first_names' in names_config, "first_names não encontrado em names_config"
             assert 'second_names' in names_config, "second_names não encontrado em names_config"
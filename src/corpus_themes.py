@@ -0,0 +1,159 @@
+"""
+Pontuação de Temas no Corpus
+Calcula, a partir das estatísticas de termos do índice (term vectors), uma matriz
+documento x palavra-chave do themes.json e pontua os temas por TF-IDF normalizado
+pelo corpus, gravando o resultado em atualizações parciais sem ler os textos completos.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from config_manager import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+TEXT_FIELD = 'texto_completo'
+ANALYZER = 'portuguese_analyzer'
+
+
+class CorpusThemeScorer:
+    def __init__(self, es_manager, config_manager: ConfigManager = None):
+        """Léxico lido do themes.json a cada execução: mudanças são repontuadas sem reprocessar PDFs"""
+        self.es_manager = es_manager
+        self.themes = (config_manager or ConfigManager()).load_themes_config()
+        self.lexicon_version = hashlib.sha1(
+            json.dumps(self.themes, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()[:12]
+        self.categories = list(self.themes)
+        self.keywords: List[Tuple[str, str, List[str]]] = []
+        self.membership: Optional[np.ndarray] = None
+
+    def _analyze_lexicon(self) -> None:
+        """Passa as palavras-chave pelo analisador do índice (stemming, asciifolding) e monta a
+        matriz palavra-chave x tema. Palavras-chave só de stopwords são descartadas."""
+        self.keywords = []
+        for category, keywords in self.themes.items():
+            for keyword in keywords:
+                response = self.es_manager.es.indices.analyze(
+                    index=self.es_manager.index_name, analyzer=ANALYZER, text=keyword
+                )
+                tokens = [token['token'] for token in response['tokens']]
+                if tokens:
+                    self.keywords.append((category, keyword, tokens))
+                else:
+                    logger.warning(f"Palavra-chave '{keyword}' ({category}) sem termos após a análise, ignorada")
+
+        self.membership = np.zeros((len(self.keywords), len(self.categories)), dtype=np.float32)
+        for row, (category, _, _) in enumerate(self.keywords):
+            self.membership[row, self.categories.index(category)] = 1.0
+
+    def _page_matrix(self, ids: List[str], doc_freq: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Frequências (documentos x palavras-chave) e tamanhos de uma página de documentos.
+
+        Palavras-chave de vários termos contam o mínimo das frequências dos termos
+        (limite superior das ocorrências da expressão).
+        """
+        response = self.es_manager.es.mtermvectors(
+            index=self.es_manager.index_name, ids=ids, fields=[TEXT_FIELD],
+            term_statistics=True, field_statistics=True, positions=False, offsets=False, payloads=False
+        )
+        tf = np.zeros((len(ids), len(self.keywords)), dtype=np.float32)
+        lengths = np.zeros(len(ids), dtype=np.float32)
+        doc_count = 0
+        for row, doc in enumerate(response['docs']):
+            vector = doc.get('term_vectors', {}).get(TEXT_FIELD)
+            if not vector:
+                continue
+            terms = vector['terms']
+            doc_count = max(doc_count, vector.get('field_statistics', {}).get('doc_count', 0))
+            lengths[row] = sum(stats['term_freq'] for stats in terms.values())
+            for column, (_, _, tokens) in enumerate(self.keywords):
+                if all(token in terms for token in tokens):
+                    tf[row, column] = min(terms[token]['term_freq'] for token in tokens)
+                    for token in tokens:
+                        doc_freq[token] = terms[token].get('doc_freq', 0)
+        return tf, lengths, doc_count
+
+    def score(self, tf: np.ndarray, lengths: np.ndarray, doc_freq: np.ndarray, doc_count: int) -> np.ndarray:
+        """Pontuação documentos x temas em [0, 1].
+
+        TF sublinear normalizado pelo tamanho médio do corpus, vezes IDF suavizado,
+        somado por tema e dividido pelo percentil 99 do tema no corpus.
+        """
+        average_length = lengths[lengths > 0].mean() if np.any(lengths > 0) else 1.0
+        normalized_tf = tf * (average_length / np.maximum(lengths, 1.0))[:, np.newaxis]
+        idf = np.log((1.0 + doc_count) / (1.0 + doc_freq)) + 1.0
+        raw = (np.log1p(normalized_tf) * idf) @ self.membership
+
+        reference = np.ones(raw.shape[1], dtype=np.float32)
+        for column in range(raw.shape[1]):
+            positive = raw[:, column][raw[:, column] > 0]
+            if len(positive):
+                reference[column] = np.percentile(positive, 99)
+        return np.clip(raw / reference, 0.0, 1.0)
+
+    def run(self, page_size: int = 500, min_score: float = 0.1) -> Dict[str, Any]:
+        """Lê as estatísticas de termos de todo o índice, pontua e grava temas_corpus em cada documento"""
+        started = time.time()
+        self._analyze_lexicon()
+        logger.info(
+            f"Léxico {self.lexicon_version}: {len(self.keywords)} palavras-chave em {len(self.categories)} temas"
+        )
+
+        ids: List[str] = []
+        pages: List[np.ndarray] = []
+        lengths: List[np.ndarray] = []
+        token_doc_freq: Dict[str, int] = {}
+        doc_count = 0
+        total = self.es_manager.count_documents()
+        with tqdm(total=total, desc="Lendo estatísticas de termos") as progress:
+            for page in self.es_manager.iter_document_pages({"match_all": {}}, False, page_size):
+                page_ids = [hit['_id'] for hit in page]
+                tf, page_lengths, page_doc_count = self._page_matrix(page_ids, token_doc_freq)
+                ids.extend(page_ids)
+                pages.append(tf)
+                lengths.append(page_lengths)
+                doc_count = max(doc_count, page_doc_count)
+                progress.update(len(page))
+
+        if not ids:
+            logger.warning("Nenhum documento no índice para pontuar")
+            return {"documents": 0, "success_count": 0, "failed_count": 0, "failed_docs": []}
+
+        tf = np.vstack(pages)
+        doc_freq = np.array(
+            [min(token_doc_freq.get(token, 0) for token in tokens) for _, _, tokens in self.keywords],
+            dtype=np.float32
+        )
+        scores = self.score(tf, np.concatenate(lengths), doc_freq, doc_count or len(ids))
+
+        def updates():
+            for row, doc_id in enumerate(ids):
+                themes = []
+                for column in np.flatnonzero(scores[row] >= min_score):
+                    category = self.categories[column]
+                    themes.append({
+                        'category': category,
+                        'score': round(float(scores[row, column]), 4),
+                        'keywords_found': [
+                            keyword for index, (keyword_category, keyword, _) in enumerate(self.keywords)
+                            if keyword_category == category and tf[row, index] > 0
+                        ]
+                    })
+                themes.sort(key=lambda theme: theme['score'], reverse=True)
+                # Lista vazia também é gravada: remove temas de um léxico anterior
+                yield doc_id, {'temas_corpus': themes, 'versao_temas': self.lexicon_version}
+
+        result = self.es_manager.bulk_update(updates())
+        duration = time.time() - started
+        logger.info(
+            f"Temas do corpus pontuados para {len(ids)} documentos em {duration:.1f}s "
+            f"({result['success_count']} atualizados, {result['failed_count']} falhas)"
+        )
+        return {"documents": len(ids), **result}
@@ -4,21 +4,75 @@ Extrai informações estruturadas dos textos baseado nas configurações
 """
 
 import re
+import json
+import hashlib
 import logging
+from bisect import bisect_right
+from operator import attrgetter
 from typing import Dict, List, Any, Tuple, Optional
 from fuzzywuzzy import fuzz, process
 from unidecode import unidecode
 from config_manager import ConfigManager
+from name_tokenizer import NameCandidateTokenizer
+from date_scanner import DateScanner
+from entity_records import (
+    DateRecord, NameRecord, PlaceRecord,
+    DATE_TYPE_FULL, DATE_TYPE_TEXTUAL, MATCH_TYPE_EXACT, MATCH_TYPE_FUZZY,
+    deduplicate, sort_records, occurrence_positions, normalize_entity_key
+)
 
 logger = logging.getLogger(__name__)
 
+# Perfis de extração: cada extrator e seu estágio fuzzy podem ser ligados/desligados
+EXTRACTION_PROFILES = {
+    'full': {
+        'dates': True, 'names': True, 'places': True, 'themes': True,
+        'fuzzy_names': True, 'fuzzy_places': True
+    },
+    'fast': {
+        'dates': True, 'names': True, 'places': True, 'themes': True,
+        'fuzzy_names': False, 'fuzzy_places': False
+    }
+}
+
+# Versão do código de extração: incrementar quando a saída de extract_all mudar
+EXTRACTOR_VERSION = 1
+
+EXTRACTORS = ('dates', 'names', 'places', 'themes')
+FUZZY_STAGES = ('names', 'places')
+
+
+def build_extraction_profile(name: str = 'full', extractors: Optional[List[str]] = None,
+                             fuzzy: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Monta o perfil de extração (fast/full ou custom a partir das listas informadas)"""
+    if name in EXTRACTION_PROFILES:
+        profile = dict(EXTRACTION_PROFILES[name])
+    elif name == 'custom':
+        extractors = EXTRACTORS if extractors is None else extractors
+        fuzzy = FUZZY_STAGES if fuzzy is None else fuzzy
+        unknown = (set(extractors) - set(EXTRACTORS)) | (set(fuzzy) - set(FUZZY_STAGES))
+        if unknown:
+            raise ValueError(f"Extratores desconhecidos no perfil custom: {sorted(unknown)}")
+        profile = {extractor: extractor in extractors for extractor in EXTRACTORS}
+        profile.update({f'fuzzy_{stage}': stage in fuzzy for stage in FUZZY_STAGES})
+    else:
+        raise ValueError(f"Perfil de extração desconhecido: {name}")
+    
+    profile['name'] = name
+    return profile
+
+
 class DataExtractor:
+    # Limite de entradas do cache de confiança de nomes (por lista)
+    NAME_CONFIDENCE_CACHE_SIZE = 50000
+    
     def __init__(self, config_manager: ConfigManager = None):
         self.config_manager = config_manager or ConfigManager()
         self.date_config = self.config_manager.load_date_config()
         self.names_config = self.config_manager.load_names_config()
         self.places_config = self.config_manager.load_places_config()
         self.themes_config = self.config_manager.load_themes_config()
+        self.version = self._compute_version()
         
         # Compilar regex patterns
         self._compile_patterns()
@@ -26,16 +80,18 @@ class DataExtractor:
         # Preparar listas para busca otimizada
         self._prepare_search_lists()
     
+    def _compute_version(self) -> str:
+        """Versão da extração: código (EXTRACTOR_VERSION) + hash das configurações"""
+        configs = json.dumps(
+            [self.date_config, self.names_config, self.places_config, self.themes_config],
+            sort_keys=True, ensure_ascii=False
+        )
+        return f"{EXTRACTOR_VERSION}-{hashlib.sha1(configs.encode('utf-8')).hexdigest()[:12]}"
+    
     def _compile_patterns(self):
         """Compila os padrões regex para melhor performance"""
-        self.year_pattern = re.compile(
-            self.date_config['regex_patterns']['year'], 
-            re.IGNORECASE
-        )
-        self.textual_phrase_pattern = re.compile(
-            self.date_config['regex_patterns']['textual_phrase'], 
-            re.IGNORECASE
-        )
+        # Scanner único de datas gerado a partir de date_config.json
+        self.date_scanner = DateScanner(self.date_config)
     
     def _prepare_search_lists(self):
         """Prepara listas otimizadas para busca"""
@@ -47,6 +103,18 @@ class DataExtractor:
             unidecode(name.lower()) for name in self.names_config['second_names']
         ]
         
+        # Listas por tipo de nome (chave estável para os caches), conjuntos para busca
+        # exata e cache de confiança por tipo
+        self._name_lists = {
+            'first_names': self.first_names_normalized,
+            'second_names': self.second_names_normalized,
+        }
+        self._name_sets = {kind: frozenset(names) for kind, names in self._name_lists.items()}
+        self._name_confidence_cache = {}
+        
+        # Tokenizador de candidatos a nome (preposições vindas de names.json)
+        self.name_tokenizer = NameCandidateTokenizer(self.names_config['prepositions'])
+        
         # Preparar lugares para busca fuzzy
         self.places_normalized = []
         for place in self.places_config:
@@ -55,16 +123,23 @@ class DataExtractor:
                 'normalized': unidecode(place['location'].lower())
             })
     
-    def extract_all(self, text: str) -> Dict[str, Any]:
-        """Extrai todas as informações do texto"""
+    def extract_all(self, text: str, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Extrai todas as informações do texto (segundo o perfil de extração, padrão 'full')"""
+        profile = profile or EXTRACTION_PROFILES['full']
         logger.info("Iniciando extração de dados...")
         
+        # Entidades ficam como registros compactos até a serialização final
+        date_records = self._scan_dates(text) if profile['dates'] else []
+        name_records = self._scan_names(text, fuzzy=profile['fuzzy_names']) if profile['names'] else []
+        place_records = self._scan_places(text, fuzzy=profile['fuzzy_places']) if profile['places'] else []
+        
         extracted = {
-            'dates': self.extract_dates(text),
-            'names': self.extract_names(text),
-            'places': self.extract_places(text),
-            'themes': self.classify_themes(text)
+            'dates': self._serialize_dates(date_records, text),
+            'names': self._serialize_names(name_records, text),
+            'places': self._serialize_places(place_records, text),
+            'themes': self.classify_themes(text) if profile['themes'] else []
         }
+        extracted.update(self._build_position_index(text, date_records, name_records, place_records))
         
         # Estatísticas de extração
         stats = {
@@ -79,138 +154,230 @@ class DataExtractor:
     
     def extract_dates(self, text: str) -> List[Dict[str, Any]]:
         """Extrai datas do texto"""
-        dates = []
-        
-        # Buscar anos específicos
-        year_matches = self.year_pattern.finditer(text)
-        for match in year_matches:
-            year = int(match.group('year'))
-            dates.append({
-                'type': 'year',
-                'year': year,
-                'century': self._get_century_from_year(year),
-                'original_text': match.group(0),
-                'position': match.start(),
-                'confidence': 0.9,
-                'context': self._get_context(text, match.start(), match.end())
-            })
-        
-        # Buscar frases textuais de séculos
-        textual_matches = self.textual_phrase_pattern.finditer(text)
-        for match in textual_matches:
-            century_text = match.group('century')
-            part_text = match.group('part') if match.group('part') else None
-            
-            # Mapear século para ano base
-            century_year = self._map_century_to_year(century_text)
-            if century_year:
-                # Aplicar modificador de período se existir
-                year_range = self._apply_period_modifier(century_year, part_text)
-                
-                dates.append({
-                    'type': 'textual',
-                    'year': year_range[0],  # Ano inicial do período
-                    'year_end': year_range[1],  # Ano final do período
-                    'century': self._get_century_from_year(year_range[0]),
-                    'period': part_text,
-                    'original_text': match.group(0),
-                    'position': match.start(),
-                    'confidence': 0.7,
-                    'context': self._get_context(text, match.start(), match.end())
-                })
+        return self._serialize_dates(self._scan_dates(text), text)
+    
+    def extract_names(self, text: str) -> List[Dict[str, Any]]:
+        """Extrai nomes de pessoas do texto"""
+        return self._serialize_names(self._scan_names(text), text)
+    
+    def extract_places(self, text: str) -> List[Dict[str, Any]]:
+        """Extrai lugares do texto"""
+        return self._serialize_places(self._scan_places(text), text)
+    
+    def _scan_dates(self, text: str) -> List[DateRecord]:
+        """Localiza datas no texto como registros compactos"""
+        # Anos, datas completas e séculos em uma única passada
+        dates = [
+            DateRecord(
+                m.kind, m.start_year, m.end_year, m.period, m.date,
+                m.start, m.end, m.confidence
+            )
+            for m in self.date_scanner.scan(text)
+        ]
         
         # Remover duplicatas e ordenar por posição
         dates = self._deduplicate_dates(dates)
-        dates.sort(key=lambda x: x['position'])
-        
-        return dates
+        return sort_records(dates, 'start')
     
-    def extract_names(self, text: str) -> List[Dict[str, Any]]:
-        """Extrai nomes de pessoas do texto"""
+    def _scan_names(self, text: str, fuzzy: bool = True) -> List[NameRecord]:
+        """Localiza nomes de pessoas no texto como registros compactos"""
         names = []
-        
-        # Padrão para identificar nomes: [Primeiro] [de/da/do/dos/das] [Sobrenome]
-        name_pattern = r'\b([A-ZÁÀÂÃÉÊÍÓÔÕÚÇ][a-záàâãéêíóôõúç]+)(?:\s+(?:' + '|'.join(self.names_config['prepositions']) + r')\s+)?([A-ZÁÀÂÃÉÊÍÓÔÕÚÇ][a-záàâãéêíóôõúç]+(?:\s+[A-ZÁÀÂÃÉÊÍÓÔÕÚÇ][a-záàâãéêíóôõúç]+)*)'
-        
-        matches = re.finditer(name_pattern, text)
-        
-        for match in matches:
-            potential_first = match.group(1)
-            potential_last = match.group(2)
+        tokens = self.name_tokenizer.tokenize(text)
+        starts, ends = tokens.starts, tokens.ends
+        
+        # Percorrer os tokens: [Primeiro] [de/da/do/dos/das] [Sobrenome...]
+        index = 0
+        while index < len(starts):
+            span = self.name_tokenizer.candidate_at(tokens, index)
+            if span is None:
+                index += 1
+                continue
+            
+            potential_first = text[starts[span.first]:ends[span.first]]
+            potential_last = text[starts[span.surname_start]:ends[span.surname_end]]
             
             # Verificar se primeiro nome está na lista
             first_confidence = self._check_name_confidence(
-                potential_first, self.first_names_normalized
+                potential_first, 'first_names', fuzzy
             )
             
+            # Sem primeiro nome reconhecido a média nunca passa de 0.5
+            if first_confidence == 0.0:
+                index += 1
+                continue
+            
             # Verificar se sobrenome está na lista
             last_confidence = self._check_name_confidence(
-                potential_last, self.second_names_normalized
+                potential_last, 'second_names', fuzzy
             )
             
+            # Sobrenome estendido por preposições não reconhecido: tentar só as palavras
+            # capitalizadas seguidas, como o regex original ("Barra do Rio de Contas")
+            surname_end = span.surname_end
+            if (first_confidence + last_confidence) / 2 <= 0.6:
+                plain_end = self.name_tokenizer.plain_surname_end(tokens, span)
+                if plain_end < surname_end:
+                    plain_last = text[starts[span.surname_start]:ends[plain_end]]
+                    plain_confidence = self._check_name_confidence(plain_last, 'second_names', fuzzy)
+                    if plain_confidence > last_confidence:
+                        potential_last, last_confidence, surname_end = plain_last, plain_confidence, plain_end
+            
             # Calcular confiança geral
             overall_confidence = (first_confidence + last_confidence) / 2
             
             # Só incluir se confiança for razoável
             if overall_confidence > 0.6:
-                full_name = match.group(0)
-                names.append({
-                    'first_name': potential_first,
-                    'last_name': potential_last,
-                    'full_name': full_name,
-                    'position': match.start(),
-                    'confidence': overall_confidence,
-                    'context': self._get_context(text, match.start(), match.end())
-                })
+                start, end = starts[span.first], ends[surname_end]
+                names.append(NameRecord(
+                    potential_first, potential_last,
+                    normalize_entity_key(text[start:end]),
+                    start, end, overall_confidence
+                ))
+                index = surname_end + 1
+            else:
+                index += 1
         
         # Remover duplicatas
         names = self._deduplicate_names(names)
-        names.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        return names
+        return sort_records(names, 'confidence', reverse=True)
     
-    def extract_places(self, text: str) -> List[Dict[str, Any]]:
-        """Extrai lugares do texto"""
+    def _scan_places(self, text: str, fuzzy: bool = True) -> List[PlaceRecord]:
+        """Localiza lugares no texto como registros compactos"""
         places = []
         text_normalized = unidecode(text.lower())
+        word_offsets = None
         
         for place_data in self.places_normalized:
             location = place_data['normalized']
             original_place = place_data['original']
             
-            # Busca exata
-            if location in text_normalized:
-                start_pos = text_normalized.find(location)
-                places.append({
-                    'location': original_place['location'],
-                    'capitania': original_place['capitania'],
-                    'position': start_pos,
-                    'confidence': 1.0,
-                    'match_type': 'exact',
-                    'context': self._get_context(text, start_pos, start_pos + len(location))
-                })
-            else:
-                # Busca fuzzy para variações
-                words = text_normalized.split()
-                for i, word in enumerate(words):
+            # Busca exata (todas as ocorrências)
+            start_pos = text_normalized.find(location)
+            if start_pos != -1:
+                record = PlaceRecord(
+                    original_place['location'], original_place['capitania'],
+                    start_pos, start_pos + len(location), 1.0, MATCH_TYPE_EXACT
+                )
+                next_pos = text_normalized.find(location, start_pos + 1)
+                if next_pos != -1:
+                    record.occurrences = [start_pos]
+                    while next_pos != -1:
+                        record.occurrences.append(next_pos)
+                        next_pos = text_normalized.find(location, next_pos + 1)
+                places.append(record)
+            elif fuzzy:
+                # Busca fuzzy para variações: cada palavra distinta é comparada uma única vez
+                if word_offsets is None:
+                    word_offsets = {}
+                    for match in re.finditer(r'\S+', text_normalized):
+                        word_offsets.setdefault(match.group(0), []).append(match.start())
+                for word, offsets in word_offsets.items():
                     similarity = fuzz.ratio(location, word)
                     if similarity > 80:  # 80% de similaridade
-                        # Encontrar posição no texto original
-                        word_start = text_normalized.find(word)
-                        places.append({
-                            'location': original_place['location'],
-                            'capitania': original_place['capitania'],
-                            'position': word_start,
-                            'confidence': similarity / 100,
-                            'match_type': 'fuzzy',
-                            'context': self._get_context(text, word_start, word_start + len(word))
-                        })
+                        record = PlaceRecord(
+                            original_place['location'], original_place['capitania'],
+                            offsets[0], offsets[0] + len(word), similarity / 100, MATCH_TYPE_FUZZY
+                        )
+                        if len(offsets) > 1:
+                            record.occurrences = list(offsets)
+                        places.append(record)
         
         # Remover duplicatas e ordenar por confiança
         places = self._deduplicate_places(places)
-        places.sort(key=lambda x: x['confidence'], reverse=True)
+        return sort_records(places, 'confidence', reverse=True)
+    
+    def _build_position_index(self, text: str, date_records: List[DateRecord],
+                              name_records: List[NameRecord], place_records: List[PlaceRecord]) -> Dict[str, Any]:
+        """Monta arrays ordenados de posições (em palavras) por entidade para consultas de proximidade"""
+        word_starts = [match.start() for match in re.finditer(r'\S+', text)]
+        
+        def group(records, key):
+            grouped = {}
+            for record in records:
+                positions = grouped.setdefault(key(record), set())
+                for char_pos in occurrence_positions(record):
+                    positions.add(max(bisect_right(word_starts, char_pos) - 1, 0))
+            return {entity: sorted(positions) for entity, positions in grouped.items()}
+        
+        positions = {
+            'names': group(name_records, attrgetter('key')),
+            'places': group(place_records, lambda r: normalize_entity_key(r.location)),
+            'dates': group(date_records, lambda r: str(r.year))
+        }
         
-        return places
+        return {
+            'positions': positions,
+            'entity_keys': {kind: sorted(entities) for kind, entities in positions.items()}
+        }
+    
+    def _serialize_dates(self, records: List[DateRecord], text: str) -> List[Dict[str, Any]]:
+        """Converte registros de datas para o formato JSON do documento"""
+        dates = []
+        for r in records:
+            if r.kind == DATE_TYPE_TEXTUAL:
+                dates.append({
+                    'type': r.kind,
+                    'year': r.year,  # Ano inicial do período
+                    'year_end': r.year_end,  # Ano final do período
+                    'century': self._get_century_from_year(r.year),
+                    'period': r.period,
+                    'original_text': text[r.start:r.end],
+                    'position': r.start,
+                    'confidence': r.confidence,
+                    'context': self._get_context(text, r.start, r.end)
+                })
+            elif r.kind == DATE_TYPE_FULL:
+                dates.append({
+                    'type': r.kind,
+                    'year': r.year,
+                    'year_end': r.year_end,
+                    'date': r.date,
+                    'century': self._get_century_from_year(r.year),
+                    'original_text': text[r.start:r.end],
+                    'position': r.start,
+                    'confidence': r.confidence,
+                    'context': self._get_context(text, r.start, r.end)
+                })
+            else:
+                dates.append({
+                    'type': r.kind,
+                    'year': r.year,
+                    'year_end': r.year_end,
+                    'century': self._get_century_from_year(r.year),
+                    'original_text': text[r.start:r.end],
+                    'position': r.start,
+                    'confidence': r.confidence,
+                    'context': self._get_context(text, r.start, r.end)
+                })
+        return dates
+    
+    def _serialize_names(self, records: List[NameRecord], text: str) -> List[Dict[str, Any]]:
+        """Converte registros de nomes para o formato JSON do documento"""
+        return [
+            {
+                'first_name': r.first_name,
+                'last_name': r.last_name,
+                'full_name': text[r.start:r.end],
+                'position': r.start,
+                'confidence': r.confidence,
+                'context': self._get_context(text, r.start, r.end)
+            }
+            for r in records
+        ]
+    
+    def _serialize_places(self, records: List[PlaceRecord], text: str) -> List[Dict[str, Any]]:
+        """Converte registros de lugares para o formato JSON do documento"""
+        return [
+            {
+                'location': r.location,
+                'capitania': r.capitania,
+                'position': r.start,
+                'confidence': r.confidence,
+                'match_type': r.match_type,
+                'context': self._get_context(text, r.start, r.end)
+            }
+            for r in records
+        ]
     
     def classify_themes(self, text: str) -> List[Dict[str, Any]]:
         """Classifica temas do documento"""
@@ -268,43 +435,29 @@ class DataExtractor:
         else:
             return f"{(year // 100) + 1}"
     
-    def _map_century_to_year(self, century_text: str) -> Optional[int]:
-        """Mapeia texto de século para ano base"""
-        century_text = century_text.lower()
-        for key, year in self.date_config['century_map'].items():
-            if key in century_text:
-                return year
-        return None
-    
-    def _apply_period_modifier(self, base_year: int, period_text: str) -> Tuple[int, int]:
-        """Aplica modificador de período ao ano base"""
-        if not period_text:
-            return (base_year, base_year + 99)  # Século inteiro
-        
-        period_text = period_text.lower()
-        
-        for period, (start_pct, end_pct) in self.date_config['part_map'].items():
-            if period in period_text:
-                start_year = base_year + (start_pct * 99 // 100)
-                end_year = base_year + (end_pct * 99 // 100)
-                return (start_year, end_year)
-        
-        return (base_year, base_year + 99)
-    
-    def _check_name_confidence(self, name: str, name_list: List[str]) -> float:
-        """Verifica confiança de um nome contra uma lista"""
+    def _check_name_confidence(self, name: str, kind: str, fuzzy: bool = True) -> float:
+        """Verifica confiança de um nome contra a lista do tipo ('first_names' ou 'second_names')"""
         name_normalized = unidecode(name.lower())
         
-        # Busca exata
-        if name_normalized in name_list:
-            return 1.0
+        # Resultados anteriores (cabeçalhos e OCR repetem muito as mesmas palavras)
+        cache = self._name_confidence_cache.setdefault((kind, fuzzy), {})
+        if name_normalized in cache:
+            return cache[name_normalized]
+        if len(cache) >= self.NAME_CONFIDENCE_CACHE_SIZE:
+            cache.clear()
         
-        # Busca fuzzy
-        best_match = process.extractOne(name_normalized, name_list)
-        if best_match and best_match[1] > 80:
-            return best_match[1] / 100
+        # Busca exata
+        if name_normalized in self._name_sets[kind]:
+            confidence = 1.0
+        elif not fuzzy:
+            confidence = 0.0
+        else:
+            # Busca fuzzy na lista inteira: erros de OCR também atingem a inicial
+            best_match = process.extractOne(name_normalized, self._name_lists[kind])
+            confidence = best_match[1] / 100 if best_match and best_match[1] > 80 else 0.0
         
-        return 0.0
+        cache[name_normalized] = confidence
+        return confidence
     
     def _calculate_theme_relevance(self, keywords: List[str], total_words: int, positions: List[int]) -> float:
         """Calcula score de relevância do tema"""
@@ -372,46 +525,18 @@ class DataExtractor:
             contexts.append(context)
         return contexts
     
-    def _deduplicate_dates(self, dates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _deduplicate_dates(self, dates: List[DateRecord]) -> List[DateRecord]:
         """Remove datas duplicadas"""
-        seen = set()
-        unique_dates = []
-        
-        for date in dates:
-            # Criar chave única baseada em ano e posição aproximada
-            key = (date['year'], date['position'] // 50)  # Agrupamento por proximidade
-            if key not in seen:
-                seen.add(key)
-                unique_dates.append(date)
-        
-        return unique_dates
+        # Chave única baseada no intervalo e posição aproximada (agrupamento por proximidade)
+        return deduplicate(dates, lambda d: (d.year, d.year_end, d.start // 50))
     
-    def _deduplicate_names(self, names: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _deduplicate_names(self, names: List[NameRecord]) -> List[NameRecord]:
         """Remove nomes duplicados"""
-        seen = set()
-        unique_names = []
-        
-        for name in names:
-            # Normalizar nome para comparação
-            key = unidecode(name['full_name'].lower())
-            if key not in seen:
-                seen.add(key)
-                unique_names.append(name)
-        
-        return unique_names
+        return deduplicate(names, attrgetter('key'))
     
-    def _deduplicate_places(self, places: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _deduplicate_places(self, places: List[PlaceRecord]) -> List[PlaceRecord]:
         """Remove lugares duplicados"""
-        seen = set()
-        unique_places = []
-        
-        for place in places:
-            key = (place['location'], place['capitania'])
-            if key not in seen:
-                seen.add(key)
-                unique_places.append(place)
-        
-        return unique_places
+        return deduplicate(places, attrgetter('location', 'capitania'))
     
     def get_extraction_summary(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
         """Gera resumo da extração"""
@@ -0,0 +1,189 @@
+"""
+Scanner de Datas
+Reconhece anos, datas completas (dia de mês de ano), séculos (por extenso,
+abreviados ou em algarismos romanos) e modificadores de período em uma única
+passada, com um padrão gerado a partir de date_config.json. Datas fora da janela
+year_range da configuração, ou inexistentes no calendário, são descartadas.
+"""
+
+import datetime
+import re
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+from unidecode import unidecode
+
+# Variações acentuadas aceitas para cada letra base
+_ACCENT_CLASSES = {
+    'a': 'aáàâã',
+    'e': 'eéê',
+    'i': 'ií',
+    'o': 'oóôõ',
+    'u': 'uú',
+    'c': 'cç',
+}
+
+_ROMAN_VALUES = {'i': 1, 'v': 5, 'x': 10}
+
+_CONNECTORS = r'(?:de|do|da|dos|das)'
+
+# Algarismos romanos canônicos de I a XXXIX (séculos); a faixa válida vem de year_range
+_ROMAN_CENTURY = r'(?=[ivx])x{0,3}(?:ix|iv|v?i{0,3})'
+
+# Janela de anos do acervo (mesma de regex_patterns.year) quando a configuração não define year_range
+_DEFAULT_YEAR_RANGE = (1500, 1899)
+
+KIND_YEAR = 'year'
+KIND_FULL_DATE = 'full_date'
+KIND_TEXTUAL = 'textual'
+
+
+class DateMatch(NamedTuple):
+    """Data reconhecida, já normalizada para um intervalo [start_year, end_year]"""
+    kind: str
+    start_year: int
+    end_year: int
+    period: Optional[str]
+    date: Optional[str]
+    start: int
+    end: int
+    confidence: float
+
+
+def _accent_insensitive(phrase: str) -> str:
+    """Gera padrão regex que aceita a frase com ou sem acentos"""
+    parts = []
+    for char in unidecode(phrase.lower()):
+        if char in _ACCENT_CLASSES:
+            parts.append(f'[{_ACCENT_CLASSES[char]}]')
+        elif char.isspace():
+            parts.append(r'\s+')
+        elif char == '.':
+            parts.append(r'\.?')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+
+def _alternation(phrases) -> str:
+    """Alternância com as frases mais longas primeiro"""
+    return '|'.join(_accent_insensitive(p) for p in sorted(phrases, key=len, reverse=True))
+
+
+def roman_to_int(numeral: str) -> Optional[int]:
+    """Converte algarismos romanos (até XXXIX) para inteiro"""
+    total = 0
+    previous = 0
+    for char in reversed(numeral.lower()):
+        value = _ROMAN_VALUES.get(char)
+        if value is None:
+            return None
+        if value < previous:
+            total -= value
+        else:
+            total += value
+            previous = value
+    return total or None
+
+
+class DateScanner:
+    def __init__(self, date_config: Dict[str, Any]):
+        self.date_config = date_config
+
+        # Tabelas normalizadas (sem acento, minúsculas) para lookup direto
+        self.century_map = {unidecode(k.lower()): v for k, v in date_config['century_map'].items()}
+        self.part_map = {unidecode(k.lower()): tuple(v) for k, v in date_config['part_map'].items()}
+        self.month_map = {unidecode(k.lower()): v for k, v in date_config['month_map'].items()}
+        self.min_year, self.max_year = date_config.get('year_range', _DEFAULT_YEAR_RANGE)
+
+        self.pattern = re.compile(self._build_pattern(), re.IGNORECASE)
+
+    def _build_pattern(self) -> str:
+        """Monta o padrão único a partir da configuração"""
+        config = self.date_config
+        months = _alternation(config['month_map'])
+        parts = _alternation(config['part_map'])
+        century_prefixes = _alternation(config['century_prefixes'])
+        year_prefixes = _alternation(config['year_prefixes'])
+        century_words = _alternation(k for k in config['century_map'] if roman_to_int(k) is None)
+
+        full_date = (
+            r'\b(?P<day>\d{1,2})[ºo]?\s+de\s+(?P<month>' + months + r')\s+de\s+(?P<full_year>\d{4})\b'
+        )
+        prefixed_year = r'\b(?:' + year_prefixes + r')\s+(?:de\s+)?(?P<prefixed_year>\d{4})\b'
+        century = (
+            r'\b(?:(?P<part>' + parts + r')s?\s+(?:' + _CONNECTORS + r'\s+)?)?'
+            r'(?P<century>(?:' + century_prefixes + r')\s*(?P<roman>' + _ROMAN_CENTURY + r')|' + century_words + r')\b'
+        )
+        year = config['regex_patterns']['year']
+
+        # A ordem importa: formas mais longas antes do ano isolado
+        return '|'.join(f'(?:{p})' for p in (full_date, prefixed_year, century, year))
+
+    def scan(self, text: str) -> Iterator[DateMatch]:
+        """Percorre o texto uma única vez emitindo as datas reconhecidas"""
+        for match in self.pattern.finditer(text):
+            date = self._to_date_match(match)
+            if date:
+                yield date
+
+    def _to_date_match(self, match: re.Match) -> Optional[DateMatch]:
+        """Normaliza um match para DateMatch"""
+        groups = match.groupdict()
+
+        if groups['full_year']:
+            year = int(groups['full_year'])
+            month = self.month_map.get(unidecode(groups['month'].lower()))
+            if not month or not self._in_range(year, year):
+                return None
+            try:
+                date = datetime.date(year, month, int(groups['day']))
+            except ValueError:
+                return None  # "31 de fevereiro": inválida, seria rejeitada pelo mapeamento date
+            return DateMatch(
+                KIND_FULL_DATE, year, year, None, date.isoformat(), match.start(), match.end(), 0.95
+            )
+
+        if groups['prefixed_year']:
+            year = int(groups['prefixed_year'])
+            if not self._in_range(year, year):
+                return None
+            return DateMatch(KIND_YEAR, year, year, None, None, match.start(), match.end(), 0.95)
+
+        if groups['century']:
+            base_year = self.century_to_year(groups['century'], groups['roman'])
+            if base_year is None:
+                return None
+            part = groups['part']
+            start_year, end_year = self.apply_period_modifier(base_year, part)
+            if not self._in_range(start_year, end_year):
+                return None
+            return DateMatch(KIND_TEXTUAL, start_year, end_year, part, None, match.start(), match.end(), 0.7)
+
+        year = int(groups['year'])
+        return DateMatch(KIND_YEAR, year, year, None, None, match.start(), match.end(), 0.9)
+
+    def _in_range(self, start_year: int, end_year: int) -> bool:
+        """Intervalo dentro da janela de anos do acervo (year_range)"""
+        return start_year >= self.min_year and end_year <= self.max_year
+
+    def century_to_year(self, century_text: str, roman: Optional[str] = None) -> Optional[int]:
+        """Mapeia século (por extenso ou romano) para o ano base"""
+        if roman:
+            key = roman.lower()
+            if key in self.century_map:
+                return self.century_map[key]
+            number = roman_to_int(key)
+            return (number - 1) * 100 if number else None
+        return self.century_map.get(unidecode(century_text.lower()))
+
+    def apply_period_modifier(self, base_year: int, period_text: Optional[str]) -> Tuple[int, int]:
+        """Aplica modificador de período ao ano base"""
+        if not period_text:
+            return (base_year, base_year + 99)  # Século inteiro
+
+        key = ' '.join(unidecode(period_text.lower()).split())
+        percentages = self.part_map.get(key) or self.part_map.get(key.rstrip('s'))
+        if not percentages:
+            return (base_year, base_year + 99)
+
+        start_pct, end_pct = percentages
+        return (base_year + (start_pct * 99 // 100), base_year + (end_pct * 99 // 100))
@@ -0,0 +1,155 @@
+"""
+Observador de Diretório
+Detecta PDFs novos ou modificados em um diretório (inotify no Linux, senão polling
+por snapshots de mtime/tamanho) e os entrega só depois que o arquivo para de mudar,
+para que cópias em andamento não sejam processadas pela metade.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import struct
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Máscaras do inotify (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_EVENT_HEADER = struct.Struct('iIII')
+
+Signature = Tuple[int, int]
+
+
+def _open_inotify(directory: Path) -> Optional[int]:
+    """Descritor inotify não bloqueante observando o diretório, ou None se indisponível"""
+    if not hasattr(os, 'O_CLOEXEC'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(str(directory)), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryWatcher:
+    def __init__(self, directory: str, pattern: str = '*.pdf', poll_interval: float = 2.0,
+                 settle_seconds: float = 2.0, use_inotify: bool = True):
+        """settle_seconds: tempo em que tamanho e mtime precisam ficar estáveis antes da entrega"""
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.use_inotify = use_inotify
+        self._fd: Optional[int] = None
+        self._dirty: Set[str] = set()
+        self._known: Dict[str, Signature] = {}
+        self._pending: Dict[str, Tuple[Signature, float]] = {}
+        self._delivered: Dict[str, Signature] = {}
+        self._rescan = True
+        self._stopped = asyncio.Event()
+
+    def stop(self) -> None:
+        """Encerra changes() na próxima verificação (arquivos ainda instáveis são descartados)"""
+        self._stopped.set()
+
+    def _matches(self, name: str) -> bool:
+        return fnmatch.fnmatch(name, self.pattern) and not name.startswith('.')
+
+    def _scan(self) -> None:
+        """Snapshot (mtime, tamanho) do diretório: o que mudou desde o anterior fica sujo"""
+        current = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and self._matches(entry.name):
+                    stat = entry.stat()
+                    current[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        self._dirty.update(name for name, signature in current.items() if self._known.get(name) != signature)
+        self._known = current
+
+    def _read_events(self) -> None:
+        """Callback do loop: nomes dos eventos inotify vão para o conjunto de sujos"""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                # Eventos perdidos: reconstruir pelo snapshot
+                self._rescan = True
+            elif name and self._matches(name):
+                self._dirty.add(name)
+
+    def _settled(self) -> Set[str]:
+        """Arquivos sujos cujo tamanho e mtime não mudaram por settle_seconds"""
+        now = time.monotonic()
+        ready = set()
+        for name in list(self._dirty):
+            try:
+                stat = (self.directory / name).stat()
+            except FileNotFoundError:
+                self._dirty.discard(name)
+                self._pending.pop(name, None)
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            previous = self._pending.get(name)
+            if previous is None or previous[0] != signature:
+                self._pending[name] = (signature, now)
+            elif now - previous[1] >= self.settle_seconds:
+                self._dirty.discard(name)
+                self._pending.pop(name)
+                if stat.st_size and self._delivered.get(name) != signature:
+                    self._delivered[name] = signature
+                    ready.add(name)
+        return ready
+
+    async def changes(self) -> AsyncIterator[Path]:
+        """Arquivos existentes na partida e depois cada arquivo novo ou modificado, já estável"""
+        loop = asyncio.get_running_loop()
+        if self.use_inotify:
+            self._fd = _open_inotify(self.directory)
+        if self._fd is not None:
+            loop.add_reader(self._fd, self._read_events)
+            tick = min(0.5, self.poll_interval)
+            logger.info(f"Observando {self.directory} com inotify")
+        else:
+            tick = self.poll_interval
+            logger.info(f"Observando {self.directory} por polling a cada {self.poll_interval}s")
+
+        try:
+            while not self._stopped.is_set():
+                # Com inotify o snapshot só é refeito na partida ou após estouro da fila de eventos
+                if self._fd is None or self._rescan:
+                    self._rescan = False
+                    self._scan()
+                for name in sorted(self._settled()):
+                    yield self.directory / name
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=tick)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._fd is not None:
+                loop.remove_reader(self._fd)
+                os.close(self._fd)
+                self._fd = None
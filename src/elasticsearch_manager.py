@@ -5,20 +5,104 @@ Responsável pela conexão, indexação e operações com Elasticsearch
 
 import os
 import json
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
+import itertools
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple, Union
 from datetime import datetime
 from elasticsearch import Elasticsearch, helpers
 from elasticsearch.exceptions import ConnectionError, RequestError, NotFoundError
 
 logger = logging.getLogger(__name__)
 
+# Campo com a impressão digital do conteúdo, comparada antes de cada escrita
+FINGERPRINT_FIELD = 'hash_conteudo'
+
+# Quase-duplicatas não indexadas (id, URL, similaridade), registradas no documento original
+VARIANTS_FIELD = 'variantes'
+
+# Tamanho máximo (antes da compressão) de cada requisição _bulk
+DEFAULT_CHUNK_BYTES = 10 * 1024 * 1024
+
+# Campos que mudam a cada processamento sem que o conteúdo mude
+_VOLATILE_FIELDS = ('data_processamento', FINGERPRINT_FIELD)
+
+# Campos acrescentados ao mapeamento depois da criação dos índices em produção. Em um
+# índice existente são adicionados com put_mapping (sem isso, positions criaria um campo
+# dinâmico por entidade distinta).
+ADDITIVE_PROPERTIES = {
+    FINGERPRINT_FIELD: {"type": "keyword"},
+    "versao_extracao": {"type": "keyword"},
+    "perfil_extracao": {"type": "keyword"},
+    "temas_corpus": {
+        "type": "nested",
+        "properties": {
+            "category": {"type": "keyword"},
+            "score": {"type": "float"},
+            "keywords_found": {"type": "keyword"}
+        }
+    },
+    "versao_temas": {"type": "keyword"},
+    VARIANTS_FIELD: {
+        "type": "nested",
+        "properties": {
+            "id": {"type": "keyword"},
+            "url": {"type": "keyword"},
+            "similaridade": {"type": "float"}
+        }
+    },
+    "dados_extraidos": {
+        "properties": {
+            "positions": {"type": "object", "enabled": False},
+            "entity_keys": {
+                "properties": {
+                    "names": {"type": "keyword"},
+                    "places": {"type": "keyword"},
+                    "dates": {"type": "keyword"}
+                }
+            }
+        }
+    }
+}
+
+# Atualização que substitui cada campo inteiro (objetos não são mesclados como em "doc")
+_REPLACE_FIELDS_SCRIPT = "for (entry in params.fields.entrySet()) { ctx._source[entry.getKey()] = entry.getValue() }"
+
+
+def merge_additive_properties(mappings: Dict[str, Any]) -> Dict[str, Any]:
+    """Acrescenta ADDITIVE_PROPERTIES às propriedades de mappings (no próprio dicionário)"""
+    def merge(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+        for field, mapping in source.items():
+            current = target.setdefault(field, {})
+            if 'properties' in mapping and 'type' not in mapping:
+                merge(current.setdefault('properties', {}), mapping['properties'])
+            else:
+                current.update(mapping)
+
+    merge(mappings.setdefault('properties', {}), ADDITIVE_PROPERTIES)
+    return mappings
+
+
+def content_fingerprint(document: Dict[str, Any]) -> str:
+    """sha256 do JSON canônico do documento, sem os campos voláteis (carimbos de data do processamento)"""
+    stable = {field: value for field, value in document.items() if field not in _VOLATILE_FIELDS}
+    if isinstance(stable.get('metadata'), dict):
+        stable['metadata'] = {field: value for field, value in stable['metadata'].items() if field != 'processed_at'}
+    payload = json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
 class ElasticsearchManager:
-    def __init__(self, host: str = None, port: int = None, index_name: str = None):
+    def __init__(self, host: str = None, port: int = None, index_name: str = None, http_compress: bool = None):
         # Usar variáveis de ambiente ou valores padrão
         self.host = host or os.getenv("ELASTICSEARCH_HOST", "localhost")
         self.port = port or int(os.getenv("ELASTICSEARCH_PORT", "9200"))
         self.index_name = index_name or os.getenv("ELASTICSEARCH_INDEX", "oxossi_docs_index")
+        # Corpos das requisições em gzip (texto completo dos PDFs comprime bem)
+        self.http_compress = (
+            http_compress if http_compress is not None
+            else os.getenv("ELASTICSEARCH_HTTP_COMPRESS", "true").lower() != "false"
+        )
         
         self.es = None
         self._connect()
@@ -32,6 +116,7 @@ class ElasticsearchManager:
                 request_timeout=30,
                 max_retries=3,
                 retry_on_timeout=True,
+                http_compress=self.http_compress,
                 verify_certs=False,
                 ssl_show_warn=False
             )
@@ -56,6 +141,7 @@ class ElasticsearchManager:
                     self.es.indices.delete(index=self.index_name)
                 else:
                     logger.info(f"Índice {self.index_name} já existe")
+                    self.update_mapping()
                     return False
             
             # Configuração completa do índice
@@ -86,7 +172,7 @@ class ElasticsearchManager:
                     self.es.indices.delete(index=self.index_name)
                 else:
                     logger.info(f"Índice {self.index_name} já existe")
-                    return True
+                    return self.update_mapping()
             
             # Configurações do índice
             index_config = {
@@ -183,6 +269,8 @@ class ElasticsearchManager:
                 }
             }
             
+            merge_additive_properties(index_config["mappings"])
+            
             # Criar índice
             self.es.indices.create(index=self.index_name, body=index_config)
             logger.info(f"Índice {self.index_name} criado com sucesso")
@@ -195,22 +283,58 @@ class ElasticsearchManager:
             logger.error(f"Erro inesperado ao criar índice: {e}")
             return False
     
-    def index_document(self, document: Dict[str, Any], doc_id: str = None) -> str:
-        """Indexa um documento individual"""
+    def update_mapping(self) -> bool:
+        """Acrescenta ADDITIVE_PROPERTIES ao mapeamento de um índice existente.
+
+        Cada campo vai em um put_mapping próprio: um campo que já foi mapeado
+        dinamicamente com outro tipo (ex.: temas_corpus como object) não pode ser
+        alterado e exige --recreate-index, mas não impede os demais.
+        """
+        updated = True
+        for field, mapping in ADDITIVE_PROPERTIES.items():
+            try:
+                self.es.indices.put_mapping(index=self.index_name, properties={field: mapping})
+            except RequestError as e:
+                updated = False
+                logger.error(
+                    f"Não foi possível adicionar '{field}' ao mapeamento de {self.index_name} "
+                    f"(recrie o índice com --recreate-index): {e}"
+                )
+        if updated:
+            logger.info(f"Mapeamento de {self.index_name} atualizado com os campos adicionais")
+        return updated
+    
+    def index_document(self, document: Dict[str, Any], doc_id: str = None, skip_unchanged: bool = True) -> str:
+        """Indexa um documento individual (sem escrita se o conteúdo indexado for o mesmo)"""
         try:
             # Preparar documento
             prepared_doc = self._prepare_document(document)
             
             # Gerar ID se não fornecido
             if not doc_id:
-                doc_id = self._generate_document_id(document)
+                doc_id = self._generate_document_id(prepared_doc)
             
-            # Indexar documento
-            response = self.es.index(
-                index=self.index_name,
-                id=doc_id,
-                body=prepared_doc
-            )
+            if not skip_unchanged:
+                response = self.es.index(index=self.index_name, id=doc_id, body=prepared_doc)
+                logger.info(f"Documento indexado: {doc_id}")
+                return response['_id']
+            
+            try:
+                current = self.es.get(index=self.index_name, id=doc_id, source_includes=[FINGERPRINT_FIELD])
+            except NotFoundError:
+                current = None
+            
+            if current is None:
+                response = self.es.index(index=self.index_name, id=doc_id, body=prepared_doc, op_type='create')
+            elif current['_source'].get(FINGERPRINT_FIELD) == prepared_doc[FINGERPRINT_FIELD]:
+                logger.info(f"Documento inalterado, escrita dispensada: {doc_id}")
+                return doc_id
+            else:
+                # Substitui apenas a versão lida: uma escrita concorrente gera conflito em vez de duplicar
+                response = self.es.index(
+                    index=self.index_name, id=doc_id, body=prepared_doc,
+                    if_seq_no=current['_seq_no'], if_primary_term=current['_primary_term']
+                )
             
             logger.info(f"Documento indexado: {doc_id}")
             return response['_id']
@@ -219,31 +343,255 @@ class ElasticsearchManager:
             logger.error(f"Erro ao indexar documento {doc_id}: {e}")
             raise
     
-    def bulk_index(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Indexa múltiplos documentos em lote"""
+    def bulk_index(self, documents: Iterable[Dict[str, Any]], doc_ids: Optional[Iterable[Optional[str]]] = None,
+                   skip_unchanged: bool = True, chunk_size: int = 500, max_chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                   thread_count: int = 1) -> Dict[str, Any]:
+        """Indexa documentos em lote a partir de qualquer iterável (IDs gerados quando não informados).
+
+        Os documentos são preparados sob demanda e agrupados em requisições de até
+        chunk_size documentos ou max_chunk_bytes bytes; com thread_count > 1 as
+        requisições saem em paralelo. Com skip_unchanged, documentos cujo hash_conteudo
+        já está no índice não são reescritos; os alterados substituem exatamente a versão lida.
+        """
+        try:
+            ids = iter(doc_ids) if doc_ids is not None else itertools.repeat(None)
+            result = self._stream_bulk(
+                zip(ids, documents), skip_unchanged, chunk_size, max_chunk_bytes, thread_count, request_timeout=60
+            )
+            logger.info(
+                f"Bulk indexing concluído: {result['success_count']} sucessos, {result['unchanged_count']} inalterados, "
+                f"{result['conflict_count']} conflitos, {result['failed_count']} falhas"
+            )
+            return result
+            
+        except Exception as e:
+            logger.error(f"Erro no bulk indexing: {e}")
+            raise
+    
+    def bulk_load(self, documents: Iterable[Tuple[Optional[str], Dict[str, Any]]], chunk_size: int = 500,
+                  thread_count: int = 4, skip_unchanged: bool = True,
+                  max_chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Dict[str, Any]:
+        """Carga massiva de pares (id, documento) com bulk paralelo e refresh desligado durante a carga"""
+        settings = self.es.indices.get_settings(index=self.index_name)
+        refresh_interval = (
+            settings.get(self.index_name, {}).get('settings', {}).get('index', {}).get('refresh_interval')
+        )
+        self.es.indices.put_settings(index=self.index_name, settings={"index": {"refresh_interval": "-1"}})
+        
         try:
-            # Preparar documentos para bulk
-            actions = []
-            for doc in documents:
-                prepared_doc = self._prepare_document(doc)
-                doc_id = self._generate_document_id(doc)
-                
-                action = {
+            result = self._stream_bulk(
+                documents, skip_unchanged, chunk_size, max_chunk_bytes, thread_count, request_timeout=120
+            )
+        except Exception as e:
+            logger.error(f"Erro na carga em massa: {e}")
+            raise
+        finally:
+            # Restaurar o intervalo anterior (None volta ao padrão do cluster)
+            self.es.indices.put_settings(index=self.index_name, settings={"index": {"refresh_interval": refresh_interval}})
+            self.es.indices.refresh(index=self.index_name)
+        
+        logger.info(
+            f"Carga em massa concluída: {result['success_count']} sucessos, {result['unchanged_count']} inalterados, "
+            f"{result['conflict_count']} conflitos, {result['failed_count']} falhas"
+        )
+        return result
+    
+    def _stream_bulk(self, documents: Iterable[Tuple[Optional[str], Dict[str, Any]]], skip_unchanged: bool,
+                     chunk_size: int, max_chunk_bytes: int, thread_count: int, request_timeout: int) -> Dict[str, Any]:
+        """Envia pares (id, documento) sem materializar a lista de ações.
+
+        Cada documento é preparado só quando sua ação é consumida; em memória ficam
+        apenas o lote da consulta mget e as requisições em montagem ou em envio.
+        """
+        pairs = (
+            (doc_id or self._generate_document_id(prepared), prepared)
+            for doc_id, prepared in ((doc_id, self._prepare_document(document)) for doc_id, document in documents)
+        )
+        counts = {'unchanged': 0}
+        # A consulta do hash indexado usa lotes menores que as requisições: documentos grandes não se acumulam
+        actions = self._write_actions(pairs, chunk_size=min(chunk_size, 100), counts=counts,
+                                      skip_unchanged=skip_unchanged)
+        client = self.es.options(request_timeout=request_timeout)
+        if thread_count > 1:
+            results = helpers.parallel_bulk(
+                client, actions, thread_count=thread_count, chunk_size=chunk_size,
+                max_chunk_bytes=max_chunk_bytes, raise_on_error=False
+            )
+        else:
+            # Itens rejeitados com 429 são repetidos com backoff pelo próprio helper
+            results = helpers.streaming_bulk(
+                client, actions, chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes,
+                raise_on_error=False, max_retries=3
+            )
+        
+        success_count = 0
+        errors = []
+        for ok, info in results:
+            if ok:
+                success_count += 1
+            else:
+                errors.append(info)
+        
+        failed_docs, conflicts = self._split_conflicts(errors)
+        return {
+            "success_count": success_count,
+            "unchanged_count": counts['unchanged'],
+            "conflict_count": conflicts,
+            "failed_count": len(failed_docs),
+            "failed_docs": failed_docs
+        }
+    
+    def _write_actions(self, pairs: Iterable[Tuple[str, Dict[str, Any]]], chunk_size: int,
+                       counts: Dict[str, int], skip_unchanged: bool = True) -> Iterator[Dict[str, Any]]:
+        """Ações de bulk para pares (id, documento preparado).
+
+        Com skip_unchanged, um mget por lote traz o hash_conteudo indexado: iguais são
+        pulados, novos viram create e alterados um index condicionado a _seq_no/_primary_term.
+        """
+        pairs = iter(pairs)
+        while True:
+            chunk = list(itertools.islice(pairs, chunk_size))
+            if not chunk:
+                return
+            if not skip_unchanged:
+                for doc_id, prepared in chunk:
+                    yield {"_index": self.index_name, "_id": doc_id, "_source": prepared}
+                continue
+            
+            response = self.es.mget(
+                index=self.index_name, ids=[doc_id for doc_id, _ in chunk], source_includes=[FINGERPRINT_FIELD]
+            )
+            for (doc_id, prepared), current in zip(chunk, response['docs']):
+                if not current.get('found'):
+                    yield {"_op_type": "create", "_index": self.index_name, "_id": doc_id, "_source": prepared}
+                elif current.get('_source', {}).get(FINGERPRINT_FIELD) == prepared[FINGERPRINT_FIELD]:
+                    counts['unchanged'] += 1
+                else:
+                    yield {
+                        "_index": self.index_name,
+                        "_id": doc_id,
+                        "_source": prepared,
+                        "if_seq_no": current['_seq_no'],
+                        "if_primary_term": current['_primary_term']
+                    }
+    
+    @staticmethod
+    def _split_conflicts(errors: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Separa conflitos de versão (409: outra escrita do mesmo documento venceu) das falhas reais"""
+        failed_docs = [error for error in errors if next(iter(error.values())).get('status') != 409]
+        return failed_docs, len(errors) - len(failed_docs)
+    
+    def bulk_write(self, documents: List[Dict[str, Any]], doc_ids: List[Optional[str]],
+                   skip_unchanged: bool = True) -> Dict[str, Any]:
+        """Uma única requisição _bulk com o resultado de cada documento (usado pelo BulkIndexer).
+
+        Retorna {'items': [{'_id', 'status', 'error'}], 'unchanged': [ids]}. Erros da
+        requisição inteira (ex.: 429, conexão) são propagados para quem decide repetir.
+        """
+        pairs = []
+        for document, doc_id in zip(documents, doc_ids):
+            prepared_doc = self._prepare_document(document)
+            pairs.append((doc_id or self._generate_document_id(prepared_doc), prepared_doc))
+
+        counts = {'unchanged': 0}
+        actions = list(self._write_actions(pairs, chunk_size=max(1, len(pairs)), counts=counts,
+                                           skip_unchanged=skip_unchanged))
+        sent_ids = {action['_id'] for action in actions}
+        unchanged = [doc_id for doc_id, _ in pairs if doc_id not in sent_ids]
+        if not actions:
+            return {'items': [], 'unchanged': unchanged}
+
+        serializer = self.es.transport.serializers.get_serializer("application/json")
+        operations = []
+        for action in actions:
+            header, source = helpers.expand_action(action)
+            operations.append(serializer.dumps(header))
+            operations.append(serializer.dumps(source))
+
+        response = self.es.options(request_timeout=60).bulk(operations=operations)
+        items = []
+        for item in response['items']:
+            result = next(iter(item.values()))
+            items.append({'_id': result.get('_id'), 'status': result.get('status'), 'error': result.get('error')})
+        return {'items': items, 'unchanged': unchanged}
+
+    def scan_documents(self, query: Dict[str, Any], source_fields: List[str]) -> Iterator[Dict[str, Any]]:
+        """Percorre todos os documentos que satisfazem a query trazendo apenas os campos indicados"""
+        try:
+            yield from helpers.scan(
+                self.es,
+                index=self.index_name,
+                query={"query": query},
+                _source=source_fields,
+                size=100
+            )
+        except Exception as e:
+            logger.error(f"Erro ao percorrer documentos: {e}")
+            raise
+    
+    def iter_document_pages(self, query: Dict[str, Any], source_fields: Union[List[str], bool], page_size: int = 500,
+                            keep_alive: str = "5m") -> Iterator[List[Dict[str, Any]]]:
+        """Percorre os documentos da query em páginas (point-in-time + search_after), só com os campos indicados"""
+        pit_id = self.es.open_point_in_time(index=self.index_name, keep_alive=keep_alive)['id']
+        try:
+            search_after = None
+            while True:
+                response = self.es.search(
+                    pit={"id": pit_id, "keep_alive": keep_alive},
+                    query=query,
+                    source=source_fields,
+                    sort=[{"_shard_doc": "asc"}],
+                    size=page_size,
+                    search_after=search_after,
+                    track_total_hits=False
+                )
+                pit_id = response.get('pit_id', pit_id)
+                hits = response['hits']['hits']
+                if not hits:
+                    return
+                yield hits
+                search_after = hits[-1]['sort']
+        except Exception as e:
+            logger.error(f"Erro ao paginar documentos: {e}")
+            raise
+        finally:
+            self.es.close_point_in_time(id=pit_id)
+    
+    def count_documents(self, query: Optional[Dict[str, Any]] = None) -> int:
+        """Número de documentos que satisfazem a query (todos, sem query)"""
+        return self.es.count(index=self.index_name, query=query or {"match_all": {}})['count']
+    
+    def bulk_update(self, updates: Iterable[Tuple[str, Dict[str, Any]]], chunk_size: int = 500,
+                    max_chunk_bytes: int = DEFAULT_CHUNK_BYTES, replace: bool = False) -> Dict[str, Any]:
+        """Atualiza parcialmente documentos em lote a partir de pares (id, campos), consumidos sob demanda.
+
+        Por padrão os campos são mesclados ("doc"); com replace, cada campo informado
+        substitui o valor inteiro, sem deixar chaves antigas de objetos no _source.
+        """
+        try:
+            actions = (
+                {
+                    "_op_type": "update",
                     "_index": self.index_name,
                     "_id": doc_id,
-                    "_source": prepared_doc
+                    **({"script": {"source": _REPLACE_FIELDS_SCRIPT, "params": {"fields": fields}}}
+                       if replace else {"doc": fields})
                 }
-                actions.append(action)
-            
-            # Executar bulk indexing
-            success_count, failed_docs = helpers.bulk(
-                self.es,
-                actions,
-                chunk_size=100,
-                request_timeout=60
+                for doc_id, fields in updates
             )
             
-            logger.info(f"Bulk indexing concluído: {success_count} sucessos, {len(failed_docs)} falhas")
+            success_count = 0
+            failed_docs = []
+            for ok, info in helpers.streaming_bulk(
+                self.es.options(request_timeout=60), actions, chunk_size=chunk_size,
+                max_chunk_bytes=max_chunk_bytes, raise_on_error=False, max_retries=3
+            ):
+                if ok:
+                    success_count += 1
+                else:
+                    failed_docs.append(info)
+            
+            logger.info(f"Bulk update concluído: {success_count} sucessos, {len(failed_docs)} falhas")
             
             return {
                 "success_count": success_count,
@@ -252,7 +600,7 @@ class ElasticsearchManager:
             }
             
         except Exception as e:
-            logger.error(f"Erro no bulk indexing: {e}")
+            logger.error(f"Erro no bulk update: {e}")
             raise
     
     def search(self, query: Dict[str, Any]) -> Dict[str, Any]:
@@ -336,6 +684,10 @@ class ElasticsearchManager:
             if field not in prepared or prepared[field] is None:
                 prepared[field] = default_value
         
+        # Calculada uma única vez (normalmente já vem de _build_document ou do shard)
+        if not prepared.get(FINGERPRINT_FIELD):
+            prepared[FINGERPRINT_FIELD] = content_fingerprint(document)
+        
         return prepared
     
     def _generate_document_id(self, document: Dict[str, Any]) -> str:
@@ -344,9 +696,8 @@ class ElasticsearchManager:
         # Remover extensão e caracteres especiais
         doc_id = filename.replace('.pdf', '').replace(' ', '_')
         
-        # Adicionar hash se necessário para garantir unicidade
-        import hashlib
-        content_hash = hashlib.md5(str(document).encode()).hexdigest()[:8]
+        # Adicionar hash se necessário para garantir unicidade (estável entre execuções)
+        content_hash = (document.get(FINGERPRINT_FIELD) or content_fingerprint(document))[:8]
         
         return f"{doc_id}_{content_hash}"
     
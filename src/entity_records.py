@@ -0,0 +1,98 @@
+"""
+Registros de Entidades
+Representação compacta (com __slots__) das entidades encontradas durante a extração.
+A conversão para dicionários só acontece na serialização final.
+"""
+
+import sys
+from operator import attrgetter
+from typing import Any, Callable, Hashable, Iterable, List
+from unidecode import unidecode
+
+# Códigos de tipo (conjunto fechado) internados para serem compartilhados entre registros
+DATE_TYPE_YEAR = sys.intern('year')
+DATE_TYPE_FULL = sys.intern('full_date')
+DATE_TYPE_TEXTUAL = sys.intern('textual')
+
+MATCH_TYPE_EXACT = sys.intern('exact')
+MATCH_TYPE_FUZZY = sys.intern('fuzzy')
+
+
+class DateRecord:
+    """Data encontrada no texto"""
+    __slots__ = ('kind', 'year', 'year_end', 'period', 'date', 'start', 'end', 'confidence', 'occurrences')
+
+    def __init__(self, kind: str, year: int, year_end: int, period, date, start: int, end: int, confidence: float):
+        self.kind = kind
+        self.year = year
+        self.year_end = year_end
+        self.period = period
+        self.date = date
+        self.start = start
+        self.end = end
+        self.confidence = confidence
+        self.occurrences = None
+
+
+class NameRecord:
+    """Nome de pessoa encontrado no texto"""
+    __slots__ = ('first_name', 'last_name', 'key', 'start', 'end', 'confidence', 'occurrences')
+
+    def __init__(self, first_name: str, last_name: str, key: str, start: int, end: int, confidence: float):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.key = key
+        self.start = start
+        self.end = end
+        self.confidence = confidence
+        self.occurrences = None
+
+
+class PlaceRecord:
+    """Lugar encontrado no texto (location/capitania vêm da configuração e já são compartilhados)"""
+    __slots__ = ('location', 'capitania', 'start', 'end', 'confidence', 'match_type', 'occurrences')
+
+    def __init__(self, location: str, capitania: str, start: int, end: int, confidence: float, match_type: str):
+        self.location = location
+        self.capitania = capitania
+        self.start = start
+        self.end = end
+        self.confidence = confidence
+        self.occurrences = None
+        self.match_type = match_type
+
+
+def deduplicate(records: Iterable[Any], key: Callable[[Any], Hashable]) -> List[Any]:
+    """Remove registros duplicados mantendo a primeira ocorrência.
+
+    As posições das duplicatas são acumuladas em `occurrences` do registro mantido.
+    """
+    kept = {}
+    unique = []
+    for record in records:
+        record_key = key(record)
+        first = kept.get(record_key)
+        if first is None:
+            kept[record_key] = record
+            unique.append(record)
+        else:
+            if first.occurrences is None:
+                first.occurrences = [first.start]
+            first.occurrences.extend(record.occurrences or (record.start,))
+    return unique
+
+
+def normalize_entity_key(value: str) -> str:
+    """Chave normalizada de uma entidade (minúsculas, sem acentos, espaços simples)"""
+    return ' '.join(unidecode(value.lower()).split())
+
+
+def occurrence_positions(record: Any) -> List[int]:
+    """Todas as posições (em caracteres) em que a entidade aparece"""
+    return record.occurrences if record.occurrences is not None else [record.start]
+
+
+def sort_records(records: List[Any], field: str, reverse: bool = False) -> List[Any]:
+    """Ordena registros in-place por um atributo"""
+    records.sort(key=attrgetter(field), reverse=reverse)
+    return records
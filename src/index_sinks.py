@@ -0,0 +1,167 @@
+"""
+Destinos de Indexação Alternativos
+Substitutos do ElasticsearchManager no pipeline (mesma interface de create_index,
+index_document e bulk_index) para benchmarks, execuções sem cluster e shards
+intermediários de documentos montados, que podem ser carregados depois em qualquer índice.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class NullSink:
+    """Descarta os documentos: mede apenas download, parsing e extração"""
+    index_name = 'null'
+    # O BulkIndexer envia lotes de várias threads; os arquivos são gravados um lote por vez
+    _write_lock = threading.Lock()
+
+    def create_index(self, force_recreate: bool = False) -> bool:
+        return True
+
+    def index_document(self, document: Dict[str, Any], doc_id: Optional[str] = None) -> Optional[str]:
+        return doc_id
+
+    def bulk_index(self, documents: List[Dict[str, Any]], doc_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        return {"success_count": len(documents), "failed_count": 0, "failed_docs": []}
+
+    def bulk_write(self, documents: List[Dict[str, Any]], doc_ids: List[Optional[str]],
+                   skip_unchanged: bool = True) -> Dict[str, Any]:
+        """Mesmo formato de ElasticsearchManager.bulk_write: todo documento gravado é um sucesso"""
+        with self._write_lock:
+            self.bulk_index(documents, doc_ids)
+        return {'items': [{'_id': doc_id, 'status': 201, 'error': None} for doc_id in doc_ids], 'unchanged': []}
+
+    def bulk_update(self, updates: Iterable[Tuple[str, Dict[str, Any]]], chunk_size: int = 500,
+                    max_chunk_bytes: int = 0, replace: bool = False) -> Dict[str, Any]:
+        """Sem atualização parcial: documentos já gravados não mudam"""
+        return {"success_count": 0, "failed_count": 0, "failed_docs": []}
+
+    def close(self) -> None:
+        pass
+
+
+class NDJSONSink(NullSink):
+    """Grava os documentos em um arquivo NDJSON ({"_id", "_source"} por linha)"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.index_name = str(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        logger.info(f"Documentos serão gravados em {self.path}")
+
+    def index_document(self, document: Dict[str, Any], doc_id: Optional[str] = None) -> Optional[str]:
+        self.bulk_index([document], [doc_id])
+        return doc_id
+
+    def bulk_index(self, documents: List[Dict[str, Any]], doc_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        doc_ids = doc_ids or [None] * len(documents)
+        for document, doc_id in zip(documents, doc_ids):
+            self._file.write(json.dumps({"_id": doc_id, "_source": document}, ensure_ascii=False))
+            self._file.write('\n')
+        return super().bulk_index(documents, doc_ids)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+SHARD_PATTERN = "shard-*.ndjson*"
+
+
+class ShardSink(NullSink):
+    """Grava os documentos em shards NDJSON (gzip por padrão) rotacionados por tamanho.
+
+    Cada lote é gravado como um membro gzip completo; o shard é escrito como .tmp e
+    renomeado ao ser fechado. Um .tmp deixado por uma execução interrompida ainda
+    contém todos os lotes confirmados (ver include_partial em iter_shard_documents).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, compress: bool = True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_name = str(self.directory)
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.prefix = f"shard-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.shards_written: List[Path] = []
+        self._sequence = 0
+        self._file = None
+        self._path: Optional[Path] = None
+        self._bytes = 0
+
+    def _open_shard(self) -> None:
+        suffix = '.ndjson.gz' if self.compress else '.ndjson'
+        self._path = self.directory / f"{self.prefix}-{self._sequence:05d}{suffix}"
+        self._sequence += 1
+        self._file = open(self._path.with_name(self._path.name + '.tmp'), 'wb')
+        self._bytes = 0
+
+    def _close_shard(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path.with_name(self._path.name + '.tmp'), self._path)
+        self.shards_written.append(self._path)
+        logger.info(f"Shard concluído: {self._path.name}")
+        self._file = None
+
+    def index_document(self, document: Dict[str, Any], doc_id: Optional[str] = None) -> Optional[str]:
+        self.bulk_index([document], [doc_id])
+        return doc_id
+
+    def bulk_index(self, documents: List[Dict[str, Any]], doc_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        doc_ids = doc_ids or [None] * len(documents)
+        if self._file is None:
+            self._open_shard()
+
+        data = ''.join(
+            json.dumps({"_id": doc_id, "_source": document}, ensure_ascii=False) + '\n'
+            for document, doc_id in zip(documents, doc_ids)
+        ).encode('utf-8')
+        self._file.write(gzip.compress(data) if self.compress else data)
+        # Lote confirmado só depois de gravado: o ledger pode marcá-lo como concluído
+        self._file.flush()
+
+        # Rotação pelo tamanho não comprimido (independe da taxa de compressão)
+        self._bytes += len(data)
+        if self._bytes >= self.max_bytes:
+            self._close_shard()
+        return super().bulk_index(documents, doc_ids)
+
+    def close(self) -> None:
+        self._close_shard()
+
+
+def iter_shard_documents(directory: str, include_partial: bool = False) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """Percorre os shards de um diretório, em ordem, emitindo (id, documento).
+
+    Com include_partial, shards .tmp de execuções interrompidas também são lidos,
+    até o último lote completo.
+    """
+    paths = sorted(
+        path for path in Path(directory).glob(SHARD_PATTERN)
+        if include_partial or not path.name.endswith('.tmp')
+    )
+    if not paths:
+        logger.warning(f"Nenhum shard encontrado em {directory}")
+
+    for path in paths:
+        name = path.name[:-len('.tmp')] if path.name.endswith('.tmp') else path.name
+        opener = gzip.open if name.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        yield record.get('_id'), record['_source']
+        except (EOFError, json.JSONDecodeError) as e:
+            # Final truncado de um shard interrompido: os lotes anteriores já foram emitidos
+            logger.warning(f"Shard {path.name} truncado, lido até o último lote completo: {e}")
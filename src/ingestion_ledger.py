@@ -0,0 +1,142 @@
+"""
+Ledger de Ingestão
+Registro local (SQLite) do estado de cada item do manifesto: URL, hash do PDF,
+versão da extração, status da indexação e erro. Permite retomar execuções
+interrompidas e processar apenas itens novos, alterados ou com falha.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATUS_DOWNLOADED = 'downloaded'
+STATUS_INDEXED = 'indexed'
+STATUS_SKIPPED = 'skipped'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    source_id TEXT PRIMARY KEY,
+    url TEXT,
+    item_hash TEXT,
+    pdf_hash TEXT,
+    extraction_version TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    updated_at TEXT NOT NULL
+)
+"""
+
+
+def item_hash(item: Dict[str, Any]) -> str:
+    """Hash estável do item do manifesto (detecta alterações de metadados)"""
+    return hashlib.sha1(json.dumps(item, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 do conteúdo de um arquivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestionLedger:
+    def __init__(self, db_path: str = "ingestion_ledger.sqlite"):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(_SCHEMA)
+        self.conn.commit()
+        logger.info(f"Ledger de ingestão aberto: {self.db_path}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, source_id: str) -> Optional[Dict[str, Any]]:
+        """Estado registrado de um item"""
+        row = self.conn.execute("SELECT * FROM items WHERE source_id = ?", (source_id,)).fetchone()
+        return dict(row) if row else None
+
+    def classify(self, source_id: str, url: Optional[str], current_item_hash: Optional[str],
+                 extraction_version: str, detect_changes: bool = True) -> Tuple[bool, str]:
+        """Decide se o item precisa ser processado e por quê.
+
+        Sem detect_changes (retomada simples) apenas itens já indexados são pulados;
+        com detect_changes também URL, metadados e versão da extração são comparados.
+        """
+        entry = self.get(source_id)
+        if entry is None:
+            return True, 'novo'
+        if entry['status'] == STATUS_FAILED:
+            return True, 'falhou'
+        if entry['status'] not in (STATUS_INDEXED, STATUS_SKIPPED):
+            return True, 'pendente'
+        if not detect_changes:
+            return False, 'inalterado'
+        if url != entry['url'] or (current_item_hash and current_item_hash != entry['item_hash']):
+            return True, 'alterado'
+        # Itens pulados também: a nova versão pode extrair texto ou classificá-los de outra forma
+        if entry['extraction_version'] != extraction_version:
+            return True, 'versao'
+        return False, 'inalterado'
+
+    def is_unchanged_pdf(self, source_id: str, pdf_hash: str, current_item_hash: Optional[str],
+                         extraction_version: str) -> bool:
+        """O mesmo PDF, com os mesmos metadados, já foi indexado com a versão atual da extração"""
+        entry = self.get(source_id)
+        return bool(
+            entry
+            and entry['status'] == STATUS_INDEXED
+            and entry['pdf_hash'] == pdf_hash
+            and entry['item_hash'] == current_item_hash
+            and entry['extraction_version'] == extraction_version
+        )
+
+    def record_download(self, source_id: str, url: Optional[str], current_item_hash: Optional[str],
+                        pdf_hash: str) -> None:
+        """Registra o PDF baixado (ainda não indexado)"""
+        self._upsert(source_id, STATUS_DOWNLOADED, url=url, item_hash=current_item_hash, pdf_hash=pdf_hash)
+
+    def mark_indexed(self, source_id: str, extraction_version: str) -> None:
+        self._upsert(source_id, STATUS_INDEXED, extraction_version=extraction_version)
+
+    def mark_skipped(self, source_id: str, reason: str, extraction_version: Optional[str] = None) -> None:
+        self._upsert(source_id, STATUS_SKIPPED, error=reason, extraction_version=extraction_version)
+
+    def mark_failed(self, source_id: str, error: str, url: Optional[str] = None,
+                    current_item_hash: Optional[str] = None) -> None:
+        self._upsert(source_id, STATUS_FAILED, error=error, url=url, item_hash=current_item_hash)
+
+    def _upsert(self, source_id: str, status: str, **fields: Any) -> None:
+        """Atualiza o status e os campos informados, preservando os demais"""
+        fields = {key: value for key, value in fields.items() if value is not None}
+        if status != STATUS_FAILED and status != STATUS_SKIPPED:
+            fields['error'] = None
+        fields['status'] = status
+        fields['updated_at'] = datetime.utcnow().isoformat()
+
+        columns = ', '.join(fields)
+        placeholders = ', '.join('?' for _ in fields)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in fields)
+
+        self.conn.execute(
+            f"INSERT INTO items (source_id, {columns}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(source_id) DO UPDATE SET {updates}",
+            (source_id, *fields.values())
+        )
+        self.conn.commit()
+
+    def summary(self) -> Dict[str, int]:
+        """Quantidade de itens por status"""
+        rows = self.conn.execute("SELECT status, COUNT(*) AS total FROM items GROUP BY status").fetchall()
+        return {row['status']: row['total'] for row in rows}
@@ -0,0 +1,587 @@
+"""
+Pipeline de Ingestão
+Encadeia os estágios de download (I/O, threads), parsing + extração (CPU, pool de
+processos) e indexação em lote, ligados por filas limitadas com backpressure.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Set, Tuple, Union
+import multiprocessing
+
+import psutil
+from tqdm import tqdm
+
+from src.config_manager import ConfigManager
+from src.pdf_processor import PDFProcessor
+from src.data_extractor import DataExtractor
+from src.ingestion_ledger import file_hash
+from src.pdf_downloader import STATUS_FAILED
+from src.near_duplicates import NearDuplicateIndex
+from src.archive_source import member_hash, open_member
+from src.bulk_indexer import BulkIndexer, OUTCOME_FAILED, OUTCOME_UNCHANGED
+from src.elasticsearch_manager import VARIANTS_FIELD
+from src.pipeline_metrics import PipelineMetrics, StatusServer, write_status_file
+
+logger = logging.getLogger(__name__)
+
+# Estado de cada processo do pool (construído uma vez por worker ou herdado do forkserver)
+_worker_state: Dict[str, Any] = {}
+
+# Variável de ambiente lida por src.worker_preload no forkserver: [config_dir, perfil]
+PRELOAD_ENV = 'OXOSSI_WORKER_PRELOAD'
+
+
+def init_worker(config_dir: str, extraction_profile: Dict[str, Any],
+                near_duplicates: Optional[Dict[str, Any]] = None) -> None:
+    """Inicializa PDFProcessor e DataExtractor no processo do pool (no-op se herdados prontos)"""
+    if _worker_state.get('config_dir') != config_dir:
+        _worker_state['pdf_processor'] = PDFProcessor()
+        _worker_state['data_extractor'] = DataExtractor(ConfigManager(config_dir))
+        _worker_state['config_dir'] = config_dir
+    _worker_state['extraction_profile'] = extraction_profile
+    # Conexão SQLite própria do worker, aberta depois do fork (nunca herdada do forkserver)
+    _worker_state['near_duplicates'] = NearDuplicateIndex(**near_duplicates) if near_duplicates else None
+
+
+def worker_context(start_method: str, config_dir: str, extraction_profile: Dict[str, Any]):
+    """Contexto de multiprocessing dos workers.
+
+    forkserver: o servidor importa src.worker_preload (estado quente) e cada worker
+    nasce por fork dele em milissegundos. spawn: cada worker importa e constrói tudo.
+    """
+    if start_method == 'forkserver' and 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # Lido pelo forkserver ao ser iniciado (primeiro worker); vale para toda a execução
+        os.environ[PRELOAD_ENV] = json.dumps([config_dir, extraction_profile])
+        context.set_forkserver_preload(['src.worker_preload'])
+        return context
+    if start_method == 'forkserver':
+        logger.warning("forkserver indisponível nesta plataforma, usando spawn")
+    return multiprocessing.get_context('spawn')
+
+
+def extract_data(text: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Reextração a partir do texto já indexado (executa no pool): (dados, erro)"""
+    try:
+        return _worker_state['data_extractor'].extract_all(text, _worker_state['extraction_profile']), None
+    except Exception as e:
+        logger.error(f"Erro na reextração: {e}")
+        return None, str(e)
+
+
+def parse_and_extract(pdf_path: Union[str, Dict[str, Any]], doc_id: Optional[str] = None) -> Dict[str, Any]:
+    """Valida, extrai texto/metadados e dados estruturados de um PDF (executa no pool).
+
+    pdf_path é o caminho do PDF ou a referência de um membro de pacote ZIP/TAR,
+    aberto aqui como stream, direto do pacote.
+    """
+    started = time.perf_counter()
+    if isinstance(pdf_path, dict):
+        with open_member(pdf_path) as stream:
+            result = _parse_and_extract(stream, doc_id)
+    else:
+        result = _parse_and_extract(pdf_path, doc_id)
+    # Identificação do worker e tempo ocupado, para o relatório de utilização
+    result['worker'] = os.getpid()
+    result['busy'] = time.perf_counter() - started
+    result['rss'] = psutil.Process().memory_info().rss
+    return result
+
+
+def _parse_and_extract(pdf_path: Any, doc_id: Optional[str]) -> Dict[str, Any]:
+    pdf_processor = _worker_state['pdf_processor']
+    data_extractor = _worker_state['data_extractor']
+
+    started = time.perf_counter()
+    if not pdf_processor.validate_pdf(pdf_path):
+        return {'status': 'skipped', 'reason': "PDF inválido ou corrompido"}
+
+    text = pdf_processor.extract_text(pdf_path)
+    metadata = pdf_processor.extract_metadata(pdf_path)
+    parse_seconds = time.perf_counter() - started
+
+    if not text or len(text) < 100:
+        return {'status': 'skipped', 'reason': "Texto extraído é muito curto ou vazio"}
+
+    # Quase-duplicata de um documento já indexado: dispensa a extração
+    signature = None
+    near_duplicates = _worker_state.get('near_duplicates')
+    if near_duplicates is not None:
+        signature = near_duplicates.signature(text)
+        match = near_duplicates.query(signature, exclude=doc_id)
+        if match:
+            return {
+                'status': 'duplicate',
+                'duplicate_of': match[0],
+                'similarity': match[1],
+                'metadata': metadata,
+                'parse_seconds': parse_seconds
+            }
+
+    started = time.perf_counter()
+    extracted = data_extractor.extract_all(text, _worker_state['extraction_profile'])
+    return {
+        'status': 'ok',
+        'text': text,
+        'metadata': metadata,
+        'extracted': extracted,
+        'signature': signature,
+        'parse_seconds': parse_seconds,
+        'extract_seconds': time.perf_counter() - started
+    }
+
+
+class IngestionPipeline:
+    def __init__(self, processor, download_workers: int = 8, process_workers: int = 4,
+                 index_batch_size: int = 10, queue_size: int = 32, flush_interval: float = 5.0,
+                 max_tasks_per_worker: int = 200, worker_memory_limit_mb: int = 1024,
+                 min_available_memory_mb: int = 512, memory_check_interval: float = 5.0,
+                 status_file: Optional[str] = None, status_port: Optional[int] = None,
+                 status_interval: float = 10.0, start_method: str = 'forkserver', index_concurrency: int = 2,
+                 index_max_mb: int = 10):
+        """Pipeline ligado a um DocumentProcessor (downloads, montagem de documentos e estatísticas).
+
+        Cada worker de extração é reciclado após max_tasks_per_worker documentos ou
+        quando seu RSS passa de worker_memory_limit_mb; novos documentos só são
+        despachados enquanto o host tiver min_available_memory_mb livres. O status
+        (vazão, latências, filas, erros e ETA) é publicado a cada status_interval
+        segundos em status_file e/ou em http://127.0.0.1:status_port/status.
+        A indexação mantém até index_concurrency requisições bulk simultâneas de no
+        máximo index_batch_size documentos ou index_max_mb MB.
+        """
+        self.processor = processor
+        self.download_workers = max(1, download_workers)
+        self.process_workers = max(1, process_workers)
+        self.index_batch_size = max(1, index_batch_size)
+        self.queue_size = max(1, queue_size)
+        self.flush_interval = flush_interval
+        self.index_concurrency = max(1, index_concurrency)
+        self.index_max_bytes = index_max_mb * 1024 * 1024
+        self.max_tasks_per_worker = max(1, max_tasks_per_worker)
+        self.worker_memory_limit = worker_memory_limit_mb * 1024 * 1024
+        self.min_available_memory = min_available_memory_mb * 1024 * 1024
+        self.memory_check_interval = memory_check_interval
+        self.status_file = Path(status_file) if status_file else None
+        self.status_port = status_port
+        self.status_interval = status_interval
+        self.mp_context = worker_context(start_method, processor.config_dir, processor.extraction_profile)
+        self.metrics = PipelineMetrics()
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._total = None
+        self.ledger = processor.ledger
+        self.work_queue = processor.work_queue
+        self.near_duplicates = processor.near_duplicates
+        self.pdf_cache = processor.pdf_cache
+        self.progress = None
+        self.worker_usage: Dict[int, Dict[str, float]] = {}
+        self._sequence = itertools.count()
+        # Documentos enviados ao BulkIndexer e ainda sem resultado; originais com variantes a publicar
+        self._indexing: Set[str] = set()
+        self._pending_variants: Set[str] = set()
+
+    async def run(self, jobs: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+                  total: Optional[int] = None) -> None:
+        """Executa todos os jobs pelos estágios do pipeline (iterável comum ou assíncrono, ex.: modo watch)"""
+        download_queue = asyncio.Queue(maxsize=self.queue_size)
+        # Maior custo estimado primeiro: PDFs grandes não ficam para o fim da execução.
+        # No modo manifesto o custo só é conhecido após o download, então a ordem vale apenas
+        # dentro da janela de queue_size PDFs à espera de um worker; fora dela prevalece a
+        # ordem do manifesto. Só o modo local (process_local_pdfs) ordena todos os arquivos.
+        parse_queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+        index_queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues = {'download': download_queue, 'parse': parse_queue, 'index': index_queue}
+        self._total = total
+
+        self.progress = tqdm(total=total, desc="Processando documentos")
+        started = time.perf_counter()
+        heartbeat = asyncio.create_task(self._heartbeat()) if self.work_queue else None
+        status_server = None
+        if self.status_port is not None:
+            status_server = StatusServer(lambda: self.metrics.latest, self.status_port)
+            status_server.start()
+        status_task = (
+            asyncio.create_task(self._status_loop())
+            if self.status_file or status_server else None
+        )
+        try:
+            downloaders = [
+                asyncio.create_task(self._download_stage(download_queue, parse_queue))
+                for _ in range(self.download_workers)
+            ]
+            parsers = [
+                asyncio.create_task(self._process_stage(parse_queue, index_queue))
+                for _ in range(self.process_workers)
+            ]
+            indexer = asyncio.create_task(self._index_stage(index_queue))
+
+            # Produtor: bloqueia quando a fila de download está cheia (backpressure)
+            if hasattr(jobs, '__aiter__'):
+                async for job in jobs:
+                    await download_queue.put(job)
+            else:
+                for job in jobs:
+                    await download_queue.put(job)
+            for _ in downloaders:
+                await download_queue.put(None)
+
+            await asyncio.gather(*downloaders)
+            for _ in parsers:
+                await parse_queue.put((math.inf, next(self._sequence), None))
+
+            await asyncio.gather(*parsers)
+            await index_queue.put(None)
+            await indexer
+        finally:
+            if heartbeat:
+                heartbeat.cancel()
+            if status_task:
+                status_task.cancel()
+            # Snapshot final sempre disponível nas estatísticas (relatórios de benchmark)
+            self._publish_status()
+            self.processor.stats['pipeline_status'] = self.metrics.latest
+            if status_server:
+                status_server.stop()
+            self.progress.close()
+            self._report_utilization(time.perf_counter() - started)
+
+    async def _heartbeat(self) -> None:
+        """Renova periodicamente os leases desta instância"""
+        while True:
+            await asyncio.sleep(self.work_queue.lease_seconds / 3)
+            renewed = self.work_queue.heartbeat()
+            logger.debug(f"Heartbeat: {renewed} leases renovados")
+
+    async def _status_loop(self) -> None:
+        while True:
+            self._publish_status()
+            await asyncio.sleep(self.status_interval)
+
+    def _publish_status(self) -> None:
+        """Atualiza o snapshot de métricas e grava o arquivo de status"""
+        status = self.metrics.snapshot(
+            {name: queue.qsize() for name, queue in self._queues.items()},
+            self.progress.total, self.progress.n, self.processor.stats
+        )
+        if self.status_file:
+            try:
+                write_status_file(self.status_file, status)
+            except OSError as e:
+                logger.warning(f"Não foi possível gravar o status em {self.status_file}: {e}")
+
+    def _report_utilization(self, makespan: float) -> None:
+        """Registra o makespan e a fração do tempo em que cada worker esteve ocupado"""
+        self.processor.stats['makespan'] = makespan
+        self.processor.stats['workers'] = {}
+        for worker, usage in sorted(self.worker_usage.items()):
+            utilization = usage['busy'] / makespan if makespan else 0.0
+            self.processor.stats['workers'][worker] = {**usage, 'utilization': utilization}
+            logger.info(
+                f"Worker {worker}: {int(usage['documents'])} documentos, "
+                f"{usage['busy']:.1f}s ocupado, utilização {utilization:.0%}"
+            )
+
+    async def _download_stage(self, download_queue: asyncio.Queue, parse_queue: asyncio.Queue) -> None:
+        """Estágio de I/O: baixa os PDFs em threads"""
+        while True:
+            job = await download_queue.get()
+            if job is None:
+                return
+
+            pdf_hash = None
+            if job.get('url'):
+                if self.pdf_cache:
+                    # Em uso até o documento sair do pipeline: a cota não remove um PDF à espera do parsing
+                    self.pdf_cache.acquire(job['pdf_path'])
+                    job['cache_acquired'] = True
+                # Hash do último PDF registrado para a mesma URL: confere a cópia local reaproveitada
+                entry = self.ledger.get(job['doc_id']) if self.ledger else None
+                known_sha256 = entry['pdf_hash'] if entry and entry['url'] == job['url'] else None
+                started = time.perf_counter()
+                result = await asyncio.to_thread(
+                    self.processor.downloader.download, job['url'], job['pdf_path'], known_sha256=known_sha256
+                )
+                self.metrics.record('download', time.perf_counter() - started)
+                if result['status'] == STATUS_FAILED:
+                    self._record_error(job, f"Falha no download de {job['url']}: {result['error']}")
+                    continue
+                pdf_hash = result['sha256']
+                if self.pdf_cache:
+                    await asyncio.to_thread(self.pdf_cache.admit, job['pdf_path'])
+
+            if self.ledger:
+                if pdf_hash is None and job.get('archive_member'):
+                    pdf_hash = await asyncio.to_thread(member_hash, job['archive_member'])
+                elif pdf_hash is None:
+                    pdf_hash = await asyncio.to_thread(file_hash, job['pdf_path'])
+                if self.ledger.is_unchanged_pdf(job['doc_id'], pdf_hash, job.get('item_hash'),
+                                               self.processor.extraction_version):
+                    # Mesmo conteúdo já indexado com a versão atual: nada a reprocessar
+                    self.processor.stats['unchanged'] += 1
+                    self._release_pdf(job, extracted=True)
+                    if self.work_queue:
+                        self.work_queue.complete(job['doc_id'])
+                    self.progress.update(1)
+                    continue
+                self.ledger.record_download(job['doc_id'], job.get('url'), job.get('item_hash'), pdf_hash)
+
+            if job.get('cost') is None:
+                job['cost'] = await asyncio.to_thread(self._estimate_cost, job)
+            await parse_queue.put((-job['cost'], next(self._sequence), job))
+
+    def _estimate_cost(self, job: Dict[str, Any]) -> float:
+        estimate_cost = self.processor.pdf_processor.estimate_cost
+        if job.get('archive_member'):
+            with open_member(job['archive_member']) as stream:
+                return estimate_cost(stream)
+        return estimate_cost(str(job['pdf_path']))
+
+    def _start_worker(self) -> ProcessPoolExecutor:
+        """Processo de extração dedicado (forkserver/spawn evitam herdar locks de threads do processo pai)"""
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=self.mp_context,
+            initializer=init_worker,
+            initargs=(
+                self.processor.config_dir, self.processor.extraction_profile,
+                self.near_duplicates.options if self.near_duplicates else None
+            )
+        )
+
+    async def _wait_for_memory(self) -> None:
+        """Suspende o despacho de documentos enquanto a memória livre do host estiver abaixo do mínimo"""
+        warned = False
+        while psutil.virtual_memory().available < self.min_available_memory:
+            if not warned:
+                available = psutil.virtual_memory().available // (1024 * 1024)
+                logger.warning(f"Memória disponível baixa ({available} MB), aguardando para despachar novos documentos")
+                self.processor.stats['memory_pauses'] = self.processor.stats.get('memory_pauses', 0) + 1
+                warned = True
+            await asyncio.sleep(self.memory_check_interval)
+
+    async def _process_stage(self, parse_queue: asyncio.Queue, index_queue: asyncio.Queue) -> None:
+        """Estágio de CPU: parsing e extração em um processo worker reciclável"""
+        loop = asyncio.get_running_loop()
+        worker = self._start_worker()
+        tasks = 0
+        try:
+            while True:
+                _, _, job = await parse_queue.get()
+                if job is None:
+                    return
+
+                await self._wait_for_memory()
+                try:
+                    result = await loop.run_in_executor(
+                        worker, parse_and_extract, job.get('archive_member') or str(job['pdf_path']), job['doc_id']
+                    )
+                except BrokenProcessPool as e:
+                    # Worker morto (ex.: OOM killer): registrar o documento e subir outro processo
+                    self._record_error(job, f"Worker de extração encerrado: {e}")
+                    logger.error(f"Worker encerrado ao processar {job['pdf_path'].name}, reiniciando")
+                    worker.shutdown(wait=False)
+                    worker, tasks = self._start_worker(), 0
+                    continue
+                except Exception as e:
+                    self._record_error(job, str(e))
+                    logger.error(f"Erro ao processar {job['pdf_path'].name}: {e}")
+                    continue
+
+                usage = self.worker_usage.setdefault(result['worker'], {'documents': 0, 'busy': 0.0, 'peak_rss': 0})
+                usage['documents'] += 1
+                usage['busy'] += result['busy']
+                usage['peak_rss'] = max(usage['peak_rss'], result['rss'])
+                if 'parse_seconds' in result:
+                    self.metrics.record('parse', result['parse_seconds'])
+                    self.metrics.pages += result['metadata'].get('page_count') or 0
+                if 'extract_seconds' in result:
+                    self.metrics.record('extract', result['extract_seconds'])
+
+                # Reciclagem entre documentos: nenhum trabalho em andamento é perdido
+                tasks += 1
+                if tasks >= self.max_tasks_per_worker or result['rss'] > self.worker_memory_limit:
+                    logger.info(
+                        f"Reciclando worker {result['worker']} após {tasks} documentos "
+                        f"(RSS {result['rss'] // (1024 * 1024)} MB)"
+                    )
+                    self.processor.stats['recycled_workers'] = self.processor.stats.get('recycled_workers', 0) + 1
+                    await asyncio.to_thread(worker.shutdown, True)
+                    worker, tasks = self._start_worker(), 0
+
+                await self._handle_result(job, result, index_queue)
+        finally:
+            # Espera o processo terminar fora do loop: os outros estágios seguem rodando
+            await asyncio.to_thread(worker.shutdown, True)
+
+    async def _handle_result(self, job: Dict[str, Any], result: Dict[str, Any], index_queue: asyncio.Queue) -> None:
+        """Encaminha o documento extraído para indexação ou registra o descarte"""
+        if result['status'] == 'duplicate':
+            self._record_variant(job, result['duplicate_of'], result['similarity'])
+            return
+        if result['status'] != 'ok':
+            self._record_skip(job, result['reason'])
+            return
+
+        if self.near_duplicates and result.get('signature') is not None:
+            # Nova verificação no processo principal (serializada): cópias em
+            # processamento simultâneo nos workers não se enxergam umas às outras
+            match = self.near_duplicates.query(result['signature'], exclude=job['doc_id'])
+            if match:
+                self._record_variant(job, *match)
+                return
+            self.near_duplicates.insert(job['doc_id'], result['signature'])
+            job['signature_inserted'] = True
+
+        document = self.processor._build_document(
+            job['pdf_path'], job.get('source_item'),
+            result['text'], result['metadata'], result['extracted'],
+            link=job.get('link')
+        )
+        if self.near_duplicates:
+            # Reindexação de um original: o documento inteiro é substituído, variantes incluídas
+            variants = self._variants_field(job['doc_id'])
+            if variants:
+                document[VARIANTS_FIELD] = variants
+        self._indexing.add(job['doc_id'])
+        await index_queue.put((job, document))
+
+    async def _index_stage(self, index_queue: asyncio.Queue) -> None:
+        """Estágio de indexação: o BulkIndexer agrupa por quantidade, tamanho ou idade e envia em paralelo"""
+        loop = asyncio.get_running_loop()
+        # Resultados chegam nas threads de envio: ledger, fila e estatísticas são atualizados no loop
+        indexer = BulkIndexer(
+            self.processor.es_manager,
+            max_docs=self.index_batch_size,
+            max_bytes=self.index_max_bytes,
+            flush_interval=self.flush_interval,
+            max_in_flight=self.index_concurrency,
+            on_result=lambda doc_id, job, outcome, error: loop.call_soon_threadsafe(
+                self._index_done, job, outcome, error
+            ),
+            on_request=lambda seconds, documents: loop.call_soon_threadsafe(
+                self.metrics.record, 'index', seconds, documents
+            )
+        )
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(index_queue.get(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    # Fila ociosa (ex.: modo watch): variantes não esperam o fim da execução
+                    await self._publish_variants()
+                    continue
+                if item is None:
+                    break
+                job, document = item
+                # Bloqueia com o buffer cheio (Elasticsearch lento): backpressure até o download
+                await asyncio.to_thread(indexer.add, job['doc_id'], document, job)
+                if len(self._pending_variants) >= self.index_batch_size:
+                    await self._publish_variants()
+        finally:
+            stats = await asyncio.to_thread(indexer.close)
+            await self._publish_variants(final=True)
+            self.processor.stats['bulk'] = stats
+            if stats['throttled']:
+                logger.warning(
+                    f"Indexação limitada pelo cluster {stats['throttled']} vezes "
+                    f"(concorrência mínima {stats['min_concurrency']}, {stats['retries']} reenvios)"
+                )
+
+    def _variants_field(self, canonical_id: str) -> List[Dict[str, Any]]:
+        """Variantes registradas para o original, no formato do campo VARIANTS_FIELD"""
+        return [
+            {'id': variant['doc_id'], 'url': variant['url'], 'similaridade': variant['similarity']}
+            for variant in self.near_duplicates.variants_of(canonical_id)
+        ]
+
+    async def _publish_variants(self, final: bool = False) -> None:
+        """Grava a lista completa de variantes nos originais que ganharam variantes novas.
+
+        Um original ainda no buffer do BulkIndexer espera a própria indexação (a
+        atualização parcial falharia com o documento ainda fora do índice); ao final,
+        com o indexador já fechado, todos os pendentes são publicados.
+        """
+        ready = set(self._pending_variants) if final else self._pending_variants - self._indexing
+        if not ready:
+            return
+        self._pending_variants -= ready
+        # Lidas aqui: a conexão SQLite do índice de quase-duplicatas pertence a esta thread
+        updates = [(canonical_id, {VARIANTS_FIELD: self._variants_field(canonical_id)}) for canonical_id in sorted(ready)]
+        try:
+            result = await asyncio.to_thread(self.processor.es_manager.bulk_update, updates, replace=True)
+        except Exception as e:
+            logger.warning(f"Não foi possível registrar variantes em {len(updates)} documentos originais: {e}")
+            return
+        if result['failed_count']:
+            logger.warning(f"Variantes não registradas em {result['failed_count']} documentos originais")
+
+    def _index_done(self, job: Dict[str, Any], outcome: str, error: Optional[str]) -> None:
+        """Resultado da indexação de um documento"""
+        self._indexing.discard(job['doc_id'])
+        if outcome == OUTCOME_FAILED:
+            self._record_error(job, f"Falha na indexação em lote: {error}")
+            return
+        if outcome == OUTCOME_UNCHANGED:
+            self.processor.stats['index_unchanged'] += 1
+        self.processor.stats['processed'] += 1
+        self._release_pdf(job, extracted=True)
+        if self.ledger:
+            self.ledger.mark_indexed(job['doc_id'], self.processor.extraction_version)
+        if self.work_queue:
+            self.work_queue.complete(job['doc_id'])
+        self.progress.update(1)
+
+    def _release_pdf(self, job: Dict[str, Any], extracted: bool = False) -> None:
+        """Documento saiu do pipeline: o PDF volta a ser removível do cache (primeiro, se já extraído)"""
+        if not job.pop('cache_acquired', False):
+            return
+        if extracted:
+            self.pdf_cache.mark_extracted(job['pdf_path'])
+        self.pdf_cache.release(job['pdf_path'])
+
+    def _record_error(self, job: Dict[str, Any], reason: str) -> None:
+        self._release_pdf(job)
+        self._indexing.discard(job['doc_id'])
+        if job.get('signature_inserted'):
+            # Documento não indexado não pode servir de original para variantes
+            self.near_duplicates.remove(job['doc_id'])
+        self.processor.stats['errors'] += 1
+        self.processor.stats['errors_detail'].append({job['name']: reason})
+        self.metrics.record_error(reason)
+        if self.ledger:
+            self.ledger.mark_failed(job['doc_id'], reason, job.get('url'), job.get('item_hash'))
+        if self.work_queue:
+            self.work_queue.fail(job['doc_id'], reason)
+        self.progress.update(1)
+
+    def _record_skip(self, job: Dict[str, Any], reason: str) -> None:
+        self._release_pdf(job, extracted=True)
+        self.processor.stats['skipped'] += 1
+        self.processor.stats['errors_detail'].append({job['name']: reason})
+        self.metrics.record_error(reason)
+        logger.warning(f"{reason}, pulando: {job['name']}")
+        if self.ledger:
+            self.ledger.mark_skipped(job['doc_id'], reason, self.processor.extraction_version)
+        if self.work_queue:
+            self.work_queue.complete(job['doc_id'])
+        self.progress.update(1)
+
+    def _record_variant(self, job: Dict[str, Any], canonical_id: str, similarity: float) -> None:
+        self._release_pdf(job, extracted=True)
+        self.processor.stats['variants'] += 1
+        self.near_duplicates.link_variant(job['doc_id'], canonical_id, similarity, job.get('url'))
+        self._pending_variants.add(canonical_id)
+        logger.info(f"{job['name']} é quase-duplicata de {canonical_id} (similaridade {similarity:.2f}), não indexado")
+        if self.ledger:
+            self.ledger.mark_skipped(job['doc_id'], f"Variante de {canonical_id}", self.processor.extraction_version)
+        if self.work_queue:
+            self.work_queue.complete(job['doc_id'])
+        self.progress.update(1)
@@ -7,12 +7,17 @@ enriquecendo os dados com um arquivo JSON de metadados.
 import os
 import sys
 import time
+import platform
+import resource
+import subprocess
+import tempfile
 import asyncio
 import json
-import requests
+import signal
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 from tqdm import tqdm
 
@@ -21,8 +26,20 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from src.config_manager import ConfigManager
 from src.pdf_processor import PDFProcessor
-from src.data_extractor import DataExtractor
-from src.elasticsearch_manager import ElasticsearchManager
+from src.data_extractor import DataExtractor, build_extraction_profile
+from src.elasticsearch_manager import ElasticsearchManager, FINGERPRINT_FIELD, content_fingerprint
+from src.ingestion_pipeline import IngestionPipeline, extract_data, init_worker, worker_context
+from src.ingestion_ledger import IngestionLedger, item_hash
+from src.near_duplicates import NearDuplicateIndex
+from src.manifest_reader import ManifestReader
+from src.pdf_downloader import PDFDownloader
+from src.pdf_cache import PDFCache
+from src.work_queue import LeaseQueue, parse_shard, shard_of
+from src.index_sinks import NullSink, NDJSONSink, ShardSink, iter_shard_documents
+from src.synthetic_corpus import SyntheticCorpus
+from src.corpus_themes import CorpusThemeScorer
+from src.directory_watcher import DirectoryWatcher
+from src.archive_source import archive_stem, count_archive_members, iter_archive_members
 
 # Configurar logging
 # Criar diretório de logs se não existir
@@ -41,12 +58,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class DocumentProcessor:
-    def __init__(self, config_dir: str = "config", pdf_dir: str = "src/pdfs", source_json_path: str = "scraped_items.json"):
-        """Inicializa o processador de documentos"""
+    def __init__(self, config_dir: str = "config", pdf_dir: str = "src/pdfs", source_json_path: str = "scraped_items.json",
+                 extraction_profile: Dict[str, Any] = None, ledger_path: Optional[str] = "ingestion_ledger.sqlite",
+                 max_connections_per_host: int = 4, pipeline_options: Optional[Dict[str, Any]] = None,
+                 shard: Optional[str] = None, lease_queue_path: Optional[str] = None, lease_seconds: float = 600.0,
+                 index_sink: Any = None, near_duplicates_path: Optional[str] = "near_duplicates.sqlite",
+                 duplicate_threshold: float = 0.9, pdf_cache_bytes: Optional[int] = None,
+                 cache_policy: str = 'extracted', cache_pins: Optional[List[str]] = None):
+        """Inicializa o processador de documentos (pdf_cache_bytes: cota do diretório de PDFs baixados)"""
         self.config_dir = config_dir
         self.pdf_dir = Path(pdf_dir)
         self.source_json_path = Path(source_json_path)
-        self.source_data = []
+        self.manifest = None
+        self.manifest_total = 0
+        self.extraction_profile = extraction_profile or build_extraction_profile('full')
+        # Limites de reciclagem dos workers e de memória repassados ao IngestionPipeline
+        self.pipeline_options = pipeline_options or {}
+        # Distribuição entre instâncias: shard fixo (i/N) e/ou fila de leases compartilhada
+        self.shard = parse_shard(shard) if shard else None
 
         # Criar diretório de PDFs se não existir
         self.pdf_dir.mkdir(exist_ok=True)
@@ -56,7 +85,19 @@ class DocumentProcessor:
             self.config_manager = ConfigManager(config_dir)
             self.pdf_processor = PDFProcessor()
             self.data_extractor = DataExtractor(self.config_manager)
-            self.es_manager = ElasticsearchManager()
+            # index_sink substitui o Elasticsearch (benchmarks, execuções sem cluster)
+            self.es_manager = index_sink if index_sink is not None else ElasticsearchManager()
+            self.ledger = IngestionLedger(ledger_path) if ledger_path else None
+            self.near_duplicates = (
+                NearDuplicateIndex(near_duplicates_path, threshold=duplicate_threshold)
+                if near_duplicates_path else None
+            )
+            self.downloader = PDFDownloader(max_per_host=max_connections_per_host)
+            self.pdf_cache = (
+                PDFCache(self.pdf_dir, pdf_cache_bytes, policy=cache_policy, pinned_patterns=cache_pins)
+                if pdf_cache_bytes else None
+            )
+            self.work_queue = LeaseQueue(lease_queue_path, lease_seconds=lease_seconds) if lease_queue_path else None
             
             logger.info("Processador de documentos inicializado com sucesso")
             
@@ -70,50 +111,38 @@ class DocumentProcessor:
             'processed': 0,
             'errors': 0,
             'skipped': 0,
+            'unchanged': 0,
+            'other_shards': 0,
+            'leased_elsewhere': 0,
+            'variants': 0,
+            'index_unchanged': 0,
+            'delta': {},
             'start_time': None,
             'end_time': None,
             'errors_detail': []
         }
 
+    @property
+    def extraction_version(self) -> str:
+        """Versão registrada no ledger: código + configurações + perfil de extração"""
+        return f"{self.data_extractor.version}/{self.extraction_profile['name']}"
+
     def _load_source_data(self):
-        """Carrega os metadados do arquivo JSON de origem."""
+        """Prepara a leitura em streaming do manifesto de origem (array JSON ou JSON Lines, com ou sem gzip)."""
         if not self.source_json_path.exists():
             logger.warning(f"Arquivo de metadados não encontrado: {self.source_json_path}")
             return
         
         try:
-            with open(self.source_json_path, 'r', encoding='utf-8') as f:
-                self.source_data = json.load(f)
-            logger.info(f"{len(self.source_data)} registros carregados de {self.source_json_path}")
-        except json.JSONDecodeError as e:
+            manifest = ManifestReader(self.source_json_path)
+            self.manifest_total = manifest.count()
+            self.manifest = manifest
+            logger.info(f"{self.manifest_total} registros no manifesto {self.source_json_path} ({manifest.format})")
+        except (json.JSONDecodeError, ValueError) as e:
             logger.error(f"Erro ao decodificar o JSON de {self.source_json_path}: {e}")
         except Exception as e:
             logger.error(f"Erro ao ler o arquivo {self.source_json_path}: {e}")
 
-    def _download_pdf(self, url: str, destination_path: Path) -> bool:
-        """Baixa um PDF de uma URL para um caminho de destino."""
-        if destination_path.exists():
-            logger.info(f"PDF já existe localmente: {destination_path.name}")
-            return True
-        
-        try:
-            logger.info(f"Baixando PDF de: {url}")
-            response = requests.get(url, timeout=60, stream=True, headers={'User-Agent': 'Mozilla/5.0'})
-            response.raise_for_status()
-            
-            with open(destination_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            logger.info(f"PDF salvo em: {destination_path.name}")
-            return True
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erro ao baixar PDF de {url}: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Erro inesperado ao salvar PDF {destination_path.name}: {e}")
-            return False
-
     def setup(self, force_recreate_index: bool = False) -> bool:
         """Configura o ambiente para processamento"""
         try:
@@ -145,22 +174,10 @@ class DocumentProcessor:
                 return
 
             # Extração de dados estruturados do texto
-            extracted_data = self.data_extractor.extract_all(text)
+            extracted_data = self.data_extractor.extract_all(text, self.extraction_profile)
 
             # Montagem do documento para indexação (sem dados do JSON)
-            document = {
-                "id_original": pdf_filename.replace('.pdf', ''),
-                "nome_arquivo": pdf_filename,
-                "titulo": metadata.get('title', 'N/A') or pdf_filename.replace('.pdf', ''),
-                "autor": metadata.get('author', 'N/A') or 'Desconhecido',
-                "ano_publicacao": None,
-                "url_origem": None,
-                "link_pdf": f"/pdfs/{pdf_filename}",
-                "texto_completo": text,
-                "dados_extraidos": extracted_data,
-                "metadados_pdf": metadata,
-                "data_processamento": datetime.utcnow().isoformat()
-            }
+            document = self._build_document(pdf_path, None, text, metadata, extracted_data)
 
             # Indexar o documento
             doc_id = pdf_filename.replace('.pdf', '').replace(' ', '_')
@@ -173,34 +190,31 @@ class DocumentProcessor:
             self.stats['errors_detail'].append({pdf_filename: str(e)})
             logger.error(f"Erro ao processar {pdf_filename}: {e}", exc_info=True)
 
-    async def _process_single_pdf(self, pdf_path: Path, source_item: Dict[str, Any]) -> None:
-        """Processa um único arquivo PDF e o indexa no Elasticsearch."""
+    def _build_document(self, pdf_path: Path, source_item: Optional[Dict[str, Any]], text: str,
+                        metadata: Dict[str, Any], extracted_data: Dict[str, Any],
+                        link: Optional[str] = None) -> Dict[str, Any]:
+        """Monta o documento para indexação, enriquecido com o item do JSON quando existir"""
         pdf_filename = pdf_path.name
-        try:
-            if not self.pdf_processor.validate_pdf(str(pdf_path)):
-                self.stats['skipped'] += 1
-                self.stats['errors_detail'].append({pdf_filename: "PDF inválido ou corrompido"})
-                logger.warning(f"PDF inválido, pulando: {pdf_filename}")
-                return
-
-            # Extração de texto e metadados do PDF
-            text = self.pdf_processor.extract_text(str(pdf_path))
-            metadata = self.pdf_processor.extract_metadata(str(pdf_path))
-            
-            if not text or len(text) < 100:
-                self.stats['skipped'] += 1
-                self.stats['errors_detail'].append({pdf_filename: "Texto extraído é muito curto ou vazio"})
-                logger.warning(f"Texto extraído de {pdf_filename} é muito curto, pulando.")
-                return
-
-            # Extração de dados estruturados do texto
-            extracted_data = self.data_extractor.extract_all(text)
-
-            # Montagem do documento para indexação
-            source_id = source_item.get('_id', {}).get('$oid', pdf_filename)
-            
+        
+        if source_item is None:
             document = {
-                "id_original": source_id,
+                "id_original": pdf_filename.replace('.pdf', ''),
+                "nome_arquivo": pdf_filename,
+                "titulo": metadata.get('title', 'N/A') or pdf_filename.replace('.pdf', ''),
+                "autor": metadata.get('author', 'N/A') or 'Desconhecido',
+                "ano_publicacao": None,
+                "url_origem": None,
+                "link_pdf": link or f"/pdfs/{pdf_filename}",
+                "texto_completo": text,
+                "dados_extraidos": extracted_data,
+                "perfil_extracao": self.extraction_profile['name'],
+                "versao_extracao": self.extraction_version,
+                "metadados_pdf": metadata,
+                "data_processamento": datetime.utcnow().isoformat()
+            }
+        else:
+            document = {
+                "id_original": source_item.get('_id', {}).get('$oid', pdf_filename),
                 "nome_arquivo": pdf_filename,
                 "titulo": source_item.get('titulo', metadata.get('title', 'N/A')),
                 "autor": source_item.get('autor', metadata.get('author', 'N/A')),
@@ -209,21 +223,137 @@ class DocumentProcessor:
                 "link_pdf": source_item.get('pdf_links'),
                 "texto_completo": text,
                 "dados_extraidos": extracted_data,
+                "perfil_extracao": self.extraction_profile['name'],
+                "versao_extracao": self.extraction_version,
                 "metadados_pdf": metadata,
                 "data_processamento": datetime.utcnow().isoformat()
             }
+        
+        # Impressão digital do conteúdo, calculada uma vez: escritas de documentos inalterados são puladas
+        document[FINGERPRINT_FIELD] = content_fingerprint(document)
+        return document
+
+    def _build_job(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Converte um item do JSON de origem em job do pipeline"""
+        pdf_url = item.get("pdf_links")
+        source_id = item.get('_id', {}).get('$oid')
+
+        if not pdf_url or not source_id:
+            logger.warning(f"Item sem 'pdf_links' ou '_id' válido, pulando: {item.get('titulo')}")
+            return None
+
+        # Define um nome de arquivo único e determinístico
+        file_extension = Path(pdf_url.split('?')[0]).suffix or '.pdf'
+        if not file_extension.lower() == '.pdf':
+            file_extension = '.pdf' # Garante que a extensão seja .pdf
+
+        return {
+            'name': item.get('titulo', source_id),
+            'doc_id': source_id,
+            'url': pdf_url,
+            'pdf_path': self.pdf_dir / f"{source_id}{file_extension}",
+            'source_item': item,
+            'item_hash': item_hash(item)
+        }
 
-            # Indexar o documento
-            self.es_manager.index_document(document, doc_id=source_id)
-            self.stats['processed'] += 1
-            
-        except Exception as e:
-            self.stats['errors'] += 1
-            self.stats['errors_detail'].append({pdf_filename: str(e)})
-            logger.error(f"Erro ao processar {pdf_filename}: {e}", exc_info=True)
+    def _local_job(self, pdf_path: Path, cost: Optional[float] = None) -> Dict[str, Any]:
+        """Job do pipeline para um PDF local, sem item do JSON (custo estimado no pipeline se ausente)"""
+        return {
+            'name': pdf_path.name,
+            'doc_id': pdf_path.name.replace('.pdf', '').replace(' ', '_'),
+            'url': None,
+            'pdf_path': pdf_path,
+            'source_item': None,
+            'cost': cost
+        }
+
+    def _archive_job(self, member: Dict[str, Any]) -> Dict[str, Any]:
+        """Job de um PDF dentro de um pacote: pacote + caminho do membro formam o identificador estável.
+
+        O nome do pacote entra no id: dois pacotes com 'lote/0001.pdf' são documentos distintos.
+        """
+        member_path = member['member']
+        link = f"{Path(member['archive']).name}!/{member_path}"
+        return {
+            'name': link,
+            'doc_id': f"{archive_stem(member['archive'])}!/{member_path[:-len('.pdf')]}".replace(' ', '_'),
+            'url': None,
+            'pdf_path': Path(member_path),
+            'source_item': None,
+            'archive_member': member,
+            'link': link,
+            'cost': None
+        }
+
+    async def process_archives(self, archive_paths: List[str], batch_size: int = 10, max_workers: int = 4,
+                               queue_size: int = 32) -> None:
+        """Processa os PDFs de pacotes ZIP/TAR direto dos pacotes, sem descompactá-los em disco"""
+        self.stats['start_time'] = time.time()
+        counts = [count_archive_members(path) for path in archive_paths]
+        total = None if None in counts else sum(counts)
+        logger.info(f"{total if total is not None else 'N'} PDFs em {len(archive_paths)} pacotes")
+
+        def jobs():
+            for path in archive_paths:
+                logger.info(f"Lendo pacote {path}")
+                for member in iter_archive_members(path):
+                    self.stats['total_files'] += 1
+                    yield self._archive_job(member)
+
+        pipeline = IngestionPipeline(
+            self,
+            download_workers=2,
+            process_workers=max_workers,
+            index_batch_size=batch_size,
+            queue_size=queue_size,
+            **self.pipeline_options
+        )
+        await pipeline.run(jobs(), total=total)
+
+        self.stats['end_time'] = time.time()
+        self.print_stats()
+
+    async def watch_local_pdfs(self, batch_size: int = 10, max_workers: int = 4, queue_size: int = 32,
+                               poll_interval: float = 2.0, settle_seconds: float = 2.0,
+                               use_inotify: bool = True) -> None:
+        """Modo contínuo: processa os PDFs que chegam ou mudam na pasta, até SIGINT/SIGTERM.
+
+        Na partida os arquivos existentes também são entregues; com o ledger, os que já
+        foram indexados com o mesmo conteúdo são pulados sem parsing.
+        """
+        self.stats['start_time'] = time.time()
+        watcher = DirectoryWatcher(
+            self.pdf_dir, poll_interval=poll_interval, settle_seconds=settle_seconds, use_inotify=use_inotify
+        )
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, watcher.stop)
+
+        async def jobs():
+            async for pdf_path in watcher.changes():
+                self.stats['total_files'] += 1
+                logger.info(f"Arquivo novo ou modificado: {pdf_path.name}")
+                yield self._local_job(pdf_path)
+
+        pipeline = IngestionPipeline(
+            self,
+            download_workers=1,
+            process_workers=max_workers,
+            index_batch_size=batch_size,
+            queue_size=queue_size,
+            **self.pipeline_options
+        )
+        try:
+            await pipeline.run(jobs())
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+
+        self.stats['end_time'] = time.time()
+        self.print_stats()
 
-    def process_local_pdfs(self, batch_size: int = 10) -> None:
-        """Processa todos os PDFs locais na pasta sem usar JSON"""
+    async def process_local_pdfs(self, batch_size: int = 10, max_workers: int = 4, queue_size: int = 32) -> None:
+        """Processa todos os PDFs locais na pasta sem usar JSON, do maior custo estimado para o menor"""
         self.stats['start_time'] = time.time()
         
         # Encontrar todos os PDFs na pasta
@@ -236,65 +366,244 @@ class DocumentProcessor:
         self.stats['total_files'] = len(pdf_files)
         logger.info(f"Encontrados {len(pdf_files)} arquivos PDF para processar")
         
-        # Processar em lotes para feedback
-        for i in range(0, len(pdf_files), batch_size):
-            batch_files = pdf_files[i:i+batch_size]
-            
-            for pdf_path in tqdm(batch_files, desc=f"Processando lote {i//batch_size + 1}"):
-                self.process_single_pdf_file(pdf_path)
+        jobs = [
+            self._local_job(pdf_path, self.pdf_processor.estimate_cost(str(pdf_path)))
+            for pdf_path in pdf_files
+        ]
+        jobs.sort(key=lambda job: job['cost'], reverse=True)
+        
+        pipeline = IngestionPipeline(
+            self,
+            download_workers=1,
+            process_workers=max_workers,
+            index_batch_size=batch_size,
+            queue_size=queue_size,
+            **self.pipeline_options
+        )
+        await pipeline.run(jobs, total=len(jobs))
 
         self.stats['end_time'] = time.time()
         self.print_stats()
 
-    async def run_processing(self, batch_size: int = 10, max_workers: int = 4) -> None:
-        """Executa o processamento em lote dos PDFs a partir da fonte JSON."""
+    async def run_processing(self, batch_size: int = 10, max_workers: int = 4,
+                             download_workers: int = 8, queue_size: int = 32,
+                             resume: bool = True, since_ledger: bool = False) -> None:
+        """Executa o processamento dos PDFs a partir da fonte JSON em um pipeline por estágios.
+
+        Downloads (threads), parsing + extração (max_workers processos) e indexação
+        em bulk (lotes de batch_size) rodam em paralelo, ligados por filas limitadas.
+        Com o ledger, resume pula itens já indexados e since_ledger processa apenas
+        o delta do manifesto (itens novos, alterados, com falha ou de outra versão).
+        O tamanho de cada PDF só é conhecido após o download: a ordem "maior primeiro"
+        vale apenas entre os até queue_size PDFs baixados à espera de parsing, e o
+        despacho segue, no geral, a ordem do manifesto.
+        """
         self.stats['start_time'] = time.time()
         
-        if not self.source_data:
+        if not self.manifest_total:
             logger.warning("Nenhum dado de origem encontrado no arquivo JSON. Tentando processar PDFs locais.")
-            self.process_local_pdfs(batch_size)
+            await self.process_local_pdfs(batch_size, max_workers, queue_size)
             return
 
-        self.stats['total_files'] = len(self.source_data)
-        
-        # Usar um semáforo para limitar a concorrência
-        semaphore = asyncio.Semaphore(max_workers)
-
-        async def process_with_semaphore(item):
-            async with semaphore:
-                pdf_url = item.get("pdf_links")
-                source_id = item.get('_id', {}).get('$oid')
+        self.stats['total_files'] = self.manifest_total
 
-                if not pdf_url or not source_id:
-                    logger.warning(f"Item sem 'pdf_links' ou '_id' válido, pulando: {item.get('titulo')}")
+        async def jobs():
+            for item in self.manifest:
+                job = self._build_job(item)
+                if job is None:
                     self.stats['skipped'] += 1
-                    return
-
-                # Define um nome de arquivo único e determinístico
-                file_extension = Path(pdf_url.split('?')[0]).suffix or '.pdf'
-                if not file_extension.lower() == '.pdf':
-                    file_extension = '.pdf' # Garante que a extensão seja .pdf
-                
-                pdf_path = self.pdf_dir / f"{source_id}{file_extension}"
-
-                if self._download_pdf(pdf_url, pdf_path):
-                    await self._process_single_pdf(pdf_path, item)
-                else:
-                    self.stats['errors'] += 1
-                    self.stats['errors_detail'].append({item.get('titulo', 'N/A'): f"Falha no download de {pdf_url}"})
-
-        # Processar em lotes para melhor gerenciamento de memória e feedback
-        for i in range(0, len(self.source_data), batch_size):
-            batch_items = self.source_data[i:i+batch_size]
-            tasks = [process_with_semaphore(item) for item in batch_items]
+                    pipeline.progress.update(1)
+                    continue
+                if self.shard and shard_of(job['doc_id'], self.shard[1]) != self.shard[0]:
+                    self.stats['other_shards'] += 1
+                    pipeline.progress.update(1)
+                    continue
+                checked = self.ledger is not None and (resume or since_ledger)
+                if checked and not self._needs_processing(job, since_ledger):
+                    self.stats['unchanged'] += 1
+                    pipeline.progress.update(1)
+                    continue
+                if self.work_queue and not self.work_queue.acquire(
+                        job['doc_id'], item, revision=f"{job['item_hash']}:{self.extraction_version}", reopen=checked):
+                    self.stats['leased_elsewhere'] += 1
+                    pipeline.progress.update(1)
+                    continue
+                yield job
             
-            # Usar tqdm para a barra de progresso
-            for f in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc=f"Processando lote {i//batch_size + 1}"):
-                await f
+            # Fim do manifesto: reassumir itens de instâncias que pararam de renovar seus leases,
+            # esperando até que não reste nenhum lease de outra instância
+            while self.work_queue:
+                for item in self.work_queue.expired_items():
+                    job = self._build_job(item)
+                    if job:
+                        self.stats['total_files'] += 1
+                        pipeline.progress.total += 1
+                        yield job
+                wait = self.work_queue.next_expiry()
+                if wait is None:
+                    break
+                logger.info(f"Aguardando leases de outras instâncias (próxima expiração em {wait:.0f}s)")
+                await asyncio.sleep(min(max(wait, 1.0), self.work_queue.lease_seconds / 3))
+
+        pipeline = IngestionPipeline(
+            self,
+            download_workers=download_workers,
+            process_workers=max_workers,
+            index_batch_size=batch_size,
+            queue_size=queue_size,
+            **self.pipeline_options
+        )
+        await pipeline.run(jobs(), total=self.manifest_total)
 
         self.stats['end_time'] = time.time()
         self.print_stats()
 
+    def _needs_processing(self, job: Dict[str, Any], detect_changes: bool) -> bool:
+        """Consulta o ledger e contabiliza o motivo no delta"""
+        needed, reason = self.ledger.classify(
+            job['doc_id'], job['url'], job['item_hash'], self.extraction_version, detect_changes
+        )
+        self.stats['delta'][reason] = self.stats['delta'].get(reason, 0) + 1
+        
+        # URL ou metadados mudaram: o PDF local pode estar desatualizado
+        if reason == 'alterado' and job['pdf_path'].exists():
+            job['pdf_path'].unlink()
+        return needed
+
+    async def run_benchmark(self, report_path: Optional[str] = None, batch_size: int = 10,
+                            max_workers: int = 4, queue_size: int = 32) -> Dict[str, Any]:
+        """Executa o pipeline sobre os PDFs locais e gera um relatório de desempenho em JSON"""
+        await self.process_local_pdfs(batch_size, max_workers, queue_size)
+        report = self._benchmark_report(max_workers)
+        
+        if report_path:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            logger.info(f"Relatório de benchmark salvo em {report_path}")
+        logger.info(
+            f"Benchmark: {report['docs_per_sec']} docs/s, {report['pages_per_sec']} páginas/s, "
+            f"pico de RSS {report['peak_rss_mb']}"
+        )
+        return report
+
+    def _benchmark_report(self, max_workers: int) -> Dict[str, Any]:
+        """Relatório comparável entre commits e máquinas"""
+        status = self.stats.get('pipeline_status', {})
+        stages = status.get('stages', {})
+        wall_seconds = (self.stats['end_time'] or time.time()) - (self.stats['start_time'] or time.time())
+        stage_seconds = {stage: data['seconds'] for stage, data in stages.items()}
+        stage_total = sum(stage_seconds.values()) or 1.0
+        workers = self.stats.get('workers', {}).values()
+        
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                cwd=Path(__file__).parent, timeout=10
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        
+        return {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_commit": commit,
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "extraction_profile": self.extraction_profile['name'],
+            "sink": type(self.es_manager).__name__,
+            "max_workers": max_workers,
+            "documents": self.stats['processed'],
+            "pages": status.get('pages', 0),
+            "skipped": self.stats['skipped'],
+            "errors": self.stats['errors'],
+            "wall_seconds": round(wall_seconds, 3),
+            "docs_per_sec": round(self.stats['processed'] / wall_seconds, 3) if wall_seconds else None,
+            "pages_per_sec": round(status.get('pages', 0) / wall_seconds, 3) if wall_seconds else None,
+            "stage_seconds": stage_seconds,
+            "stage_share": {stage: round(seconds / stage_total, 4) for stage, seconds in stage_seconds.items()},
+            "stage_latency": {
+                stage: {"p50": data['p50_seconds'], "p95": data['p95_seconds']} for stage, data in stages.items()
+            },
+            "worker_utilization": round(
+                sum(worker['utilization'] for worker in workers) / len(workers), 4
+            ) if workers else None,
+            "peak_rss_mb": {
+                # ru_maxrss é informado em KB no Linux
+                "main": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "worker_max": round(max((worker['peak_rss'] for worker in workers), default=0) / (1024 * 1024), 1)
+            }
+        }
+
+    def upgrade_extraction_profile(self, from_profile: str = 'fast', max_workers: int = 4) -> None:
+        """Reextrai, a partir do texto indexado, os documentos processados com outro perfil"""
+        if self.extraction_profile['name'] == from_profile:
+            logger.warning(f"Perfil atual já é '{from_profile}', nada a atualizar")
+            return
+        self.reextract(max_workers=max_workers, query={"term": {"perfil_extracao": from_profile}})
+
+    def reextract(self, max_workers: int = 4, page_size: int = 500, query: Optional[Dict[str, Any]] = None) -> None:
+        """Reaplica o DataExtractor atual ao texto indexado e substitui só dados_extraidos (atualização parcial).
+
+        Por padrão seleciona os documentos cuja versao_extracao (código + configurações
+        + perfil) difere da atual; os já atualizados nem são lidos do índice.
+        """
+        self.stats['start_time'] = time.time()
+        version = self.extraction_version
+        if query is None:
+            query = {"bool": {"must_not": {"term": {"versao_extracao": version}}}}
+        
+        pending = self.es_manager.count_documents(query)
+        logger.info(
+            f"Reextração para a versão {version}: {pending} documentos pendentes, "
+            f"{self.es_manager.count_documents() - pending} já atualizados"
+        )
+        
+        context = worker_context(
+            self.pipeline_options.get('start_method', 'forkserver'), self.config_dir, self.extraction_profile
+        )
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=init_worker,
+                                 initargs=(self.config_dir, self.extraction_profile)) as pool:
+            progress = tqdm(total=pending, desc="Reextraindo documentos")
+            
+            def updates():
+                # Uma página por vez: o pool segue extraindo a página enquanto os primeiros lotes são gravados
+                for page in self.es_manager.iter_document_pages(query, ["texto_completo"], page_size):
+                    self.stats['total_files'] += len(page)
+                    hits = [hit for hit in page if hit['_source'].get('texto_completo')]
+                    self.stats['skipped'] += len(page) - len(hits)
+                    results = pool.map(
+                        extract_data, [hit['_source']['texto_completo'] for hit in hits],
+                        chunksize=max(1, len(hits) // (max_workers * 4))
+                    )
+                    for hit, (extracted, error) in zip(hits, results):
+                        progress.update(1)
+                        if error:
+                            self.stats['errors'] += 1
+                            self.stats['errors_detail'].append({hit['_id']: error})
+                            continue
+                        yield hit['_id'], {
+                            "dados_extraidos": extracted,
+                            "perfil_extracao": self.extraction_profile['name'],
+                            "versao_extracao": version,
+                            "data_processamento": datetime.utcnow().isoformat(),
+                            # Atualização parcial: o hash anterior não corresponde mais ao conteúdo
+                            FINGERPRINT_FIELD: None
+                        }
+                    progress.update(len(page) - len(hits))
+            
+            try:
+                # dados_extraidos substituído por inteiro: mesclar deixaria entidades antigas em positions
+                result = self.es_manager.bulk_update(updates(), replace=True)
+            finally:
+                progress.close()
+        
+        self.stats['processed'] += result['success_count']
+        self.stats['errors'] += result['failed_count']
+        self.stats['errors_detail'].extend(result['failed_docs'])
+        
+        self.stats['end_time'] = time.time()
+        self.print_stats()
+
     def print_stats(self) -> None:
         """Imprime as estatísticas finais do processamento."""
         duration = self.stats['end_time'] - self.stats['start_time']
@@ -304,6 +613,43 @@ class DocumentProcessor:
         logger.info(f"Processados com sucesso: {self.stats['processed']}")
         logger.info(f"Com erros: {self.stats['errors']}")
         logger.info(f"Ignorados (inválidos/sem texto): {self.stats['skipped']}")
+        if self.stats['index_unchanged']:
+            logger.info(f"Documentos idênticos aos indexados (escrita dispensada): {self.stats['index_unchanged']}")
+        if self.stats.get('bulk'):
+            bulk = self.stats['bulk']
+            logger.info(
+                f"Requisições bulk: {bulk['requests']}, reenvios: {bulk['retries']}, "
+                f"limitações pelo cluster (429): {bulk['throttled']}"
+            )
+        if self.near_duplicates:
+            logger.info(f"Quase-duplicatas registradas como variantes: {self.stats['variants']}")
+        if self.pdf_cache:
+            cache = self.pdf_cache.summary()
+            logger.info(
+                f"Cache de PDFs: {cache['files']} arquivos, {cache['bytes'] / 1024 ** 2:.1f} MB; "
+                f"removidos {cache['evicted_files']} ({cache['evicted_bytes'] / 1024 ** 2:.1f} MB)"
+            )
+        if self.shard:
+            logger.info(f"Shard {self.shard[0]}/{self.shard[1]}: {self.stats['other_shards']} itens pertencem a outros shards")
+        if self.work_queue:
+            logger.info(f"Itens com lease de outras instâncias: {self.stats['leased_elsewhere']}")
+            logger.info(f"Fila de leases: {self.work_queue.summary()}")
+        if self.stats.get('recycled_workers') or self.stats.get('memory_pauses'):
+            logger.info(
+                f"Workers reciclados: {self.stats.get('recycled_workers', 0)}, "
+                f"pausas por memória baixa: {self.stats.get('memory_pauses', 0)}"
+            )
+        if self.stats.get('workers'):
+            utilization = [worker['utilization'] for worker in self.stats['workers'].values()]
+            logger.info(
+                f"Makespan do pipeline: {self.stats['makespan']:.2f}s, utilização média dos workers "
+                f"{sum(utilization) / len(utilization):.0%} (mínima {min(utilization):.0%})"
+            )
+        if self.ledger:
+            logger.info(f"Inalterados desde a última execução: {self.stats['unchanged']}")
+            if self.stats['delta']:
+                logger.info(f"Delta do manifesto: {self.stats['delta']}")
+            logger.info(f"Ledger: {self.ledger.summary()}")
         if self.stats['errors'] > 0:
             logger.warning("Detalhes dos erros:")
             for error in self.stats['errors_detail'][:10]:  # Limitar a 10 erros
@@ -320,23 +666,263 @@ async def main():
                        help='Recriar o índice Elasticsearch')
     parser.add_argument('--local-only', action='store_true',
                        help='Processar apenas PDFs locais (sem JSON)')
+    parser.add_argument('--archive', action='append', default=None,
+                       help='Processar os PDFs de um pacote ZIP/TAR sem descompactar (pode repetir)')
+    parser.add_argument('--watch', action='store_true',
+                       help='Modo contínuo: processar PDFs novos ou modificados na pasta de PDFs até Ctrl+C')
+    parser.add_argument('--watch-interval', type=float, default=2.0,
+                       help='Intervalo do polling do --watch quando inotify não está disponível')
+    parser.add_argument('--watch-settle', type=float, default=2.0,
+                       help='Segundos sem mudança de tamanho/mtime antes de processar um arquivo')
+    parser.add_argument('--watch-poll', action='store_true',
+                       help='Forçar polling no --watch, mesmo com inotify disponível')
     parser.add_argument('--batch-size', type=int, default=10,
                        help='Tamanho do lote para processamento')
     parser.add_argument('--max-workers', type=int, default=4,
-                       help='Número máximo de workers concorrentes')
+                       help='Número de processos para parsing e extração')
+    parser.add_argument('--download-workers', type=int, default=8,
+                       help='Número de downloads simultâneos')
+    parser.add_argument('--connections-per-host', type=int, default=4,
+                       help='Downloads simultâneos por host (tamanho do pool de conexões)')
+    parser.add_argument('--max-tasks-per-worker', type=int, default=200,
+                       help='Documentos processados por worker antes de reciclá-lo')
+    parser.add_argument('--worker-memory-mb', type=int, default=1024,
+                       help='RSS máximo de um worker (MB) antes de reciclá-lo')
+    parser.add_argument('--min-free-memory-mb', type=int, default=512,
+                       help='Memória livre mínima do host (MB) para despachar novos documentos')
+    parser.add_argument('--status-file', default=None,
+                       help='Arquivo JSON de status atualizado durante o processamento')
+    parser.add_argument('--status-port', type=int, default=None,
+                       help='Porta local do endpoint HTTP de status (GET /status)')
+    parser.add_argument('--start-method', choices=['forkserver', 'spawn'], default='forkserver',
+                       help='Criação dos workers: forkserver (estado pré-carregado, copy-on-write) ou spawn')
+    parser.add_argument('--index-concurrency', type=int, default=2,
+                       help='Máximo de requisições bulk simultâneas (reduzido automaticamente quando o cluster responde 429)')
+    parser.add_argument('--bulk-max-mb', type=int, default=10,
+                       help='Tamanho máximo em MB de cada requisição bulk (antes da compressão)')
+    parser.add_argument('--queue-size', type=int, default=32,
+                       help='Capacidade das filas entre os estágios do pipeline (com manifesto, a ordem '
+                            '"maior PDF primeiro" só vale dentro da fila de parsing)')
+    parser.add_argument('--extraction-profile', choices=['fast', 'full', 'custom'], default='full',
+                       help='Perfil de extração: fast (sem etapas fuzzy), full ou custom')
+    parser.add_argument('--extractors', default=None,
+                       help='Extratores do perfil custom, separados por vírgula (dates,names,places,themes)')
+    parser.add_argument('--fuzzy', default=None,
+                       help='Etapas fuzzy do perfil custom, separadas por vírgula (names,places)')
+    parser.add_argument('--upgrade-fast', action='store_true',
+                       help='Reextrair com o perfil escolhido apenas os documentos processados com o perfil fast')
+    parser.add_argument('--reextract', action='store_true',
+                       help='Reextrair dados_extraidos do texto indexado nos documentos com versão de extração antiga')
+    parser.add_argument('--score-themes', action='store_true',
+                       help='Pontuar temas por TF-IDF do corpus a partir das estatísticas de termos do índice')
+    parser.add_argument('--theme-min-score', type=float, default=0.1,
+                       help='Pontuação mínima para gravar um tema em temas_corpus')
+    parser.add_argument('--source', default='scraped_items.json',
+                       help='Manifesto de itens: array JSON ou JSON Lines, opcionalmente .gz')
+    parser.add_argument('--shard', default=None,
+                       help='Processar apenas o shard i de N (formato i/N, hash consistente do _id)')
+    parser.add_argument('--lease-queue', default=None,
+                       help='Arquivo SQLite compartilhado para coordenar várias instâncias por leases')
+    parser.add_argument('--lease-seconds', type=float, default=600.0,
+                       help='Duração de um lease sem heartbeat antes de outro nó reassumir o item')
+    parser.add_argument('--retry-failed-leases', action='store_true',
+                       help='Devolver à fila de leases os itens que falharam')
+    parser.add_argument('--benchmark', action='store_true',
+                       help='Medir o pipeline sobre PDFs locais sem Elasticsearch (sink nulo ou NDJSON)')
+    parser.add_argument('--benchmark-dir', default=None,
+                       help='Diretório de PDFs do benchmark (padrão: src/pdfs ou um diretório temporário com --synthetic)')
+    parser.add_argument('--synthetic', type=int, default=0,
+                       help='Gerar N PDFs sintéticos para o benchmark')
+    parser.add_argument('--sink', choices=['null', 'ndjson'], default='null',
+                       help='Destino dos documentos no benchmark')
+    parser.add_argument('--sink-path', default='benchmark_documents.ndjson',
+                       help='Arquivo do sink NDJSON')
+    parser.add_argument('--benchmark-report', default='benchmark_report.json',
+                       help='Arquivo JSON do relatório de benchmark')
+    parser.add_argument('--write-shards', default=None,
+                       help='Gravar os documentos montados em shards NDJSON.gz neste diretório em vez de indexar')
+    parser.add_argument('--shard-max-mb', type=int, default=256,
+                       help='Tamanho (não comprimido) de cada shard antes da rotação')
+    parser.add_argument('--index-shards', default=None,
+                       help='Carregar no índice os shards deste diretório (sem processar PDFs)')
+    parser.add_argument('--include-partial-shards', action='store_true',
+                       help='Com --index-shards, ler também shards .tmp de execuções interrompidas')
+    parser.add_argument('--index-name', default=None,
+                       help='Índice de destino do --index-shards (padrão: ELASTICSEARCH_INDEX)')
+    parser.add_argument('--index-threads', type=int, default=4,
+                       help='Threads de bulk paralelo do --index-shards')
+    parser.add_argument('--ledger', default='ingestion_ledger.sqlite',
+                       help='Arquivo SQLite do ledger de ingestão')
+    parser.add_argument('--no-ledger', action='store_true',
+                       help='Desativar o ledger de ingestão')
+    parser.add_argument('--near-duplicates', default='near_duplicates.sqlite',
+                       help='Arquivo SQLite do índice LSH de quase-duplicatas')
+    parser.add_argument('--duplicate-threshold', type=float, default=0.9,
+                       help='Similaridade (Jaccard estimada por MinHash) a partir da qual um documento é variante')
+    parser.add_argument('--no-dedup', action='store_true',
+                       help='Desativar a detecção de quase-duplicatas')
+    parser.add_argument('--cache-max-gb', type=float, default=None,
+                       help='Cota em GB do diretório de PDFs baixados (remove PDFs já processados; baixados de novo se necessário)')
+    parser.add_argument('--cache-policy', choices=['extracted', 'lru'], default='extracted',
+                       help='Ordem de remoção do cache: já extraídos primeiro ou apenas menos usados')
+    parser.add_argument('--cache-pin', action='append', default=None,
+                       help='Padrão glob de PDFs que nunca são removidos do cache (pode repetir)')
+    parser.add_argument('--no-resume', action='store_true',
+                       help='Reprocessar também os itens já indexados')
+    parser.add_argument('--since-ledger', action='store_true',
+                       help='Processar apenas itens novos, alterados ou com falha em relação ao ledger')
     
     args = parser.parse_args()
     
-    processor = DocumentProcessor()
+    def split_option(value):
+        return [item.strip() for item in value.split(',') if item.strip()] if value is not None else None
+    
+    extraction_profile = build_extraction_profile(
+        args.extraction_profile, split_option(args.extractors), split_option(args.fuzzy)
+    )
+    
+    pipeline_options = {
+        'max_tasks_per_worker': args.max_tasks_per_worker,
+        'worker_memory_limit_mb': args.worker_memory_mb,
+        'min_available_memory_mb': args.min_free_memory_mb,
+        'status_file': args.status_file,
+        'status_port': args.status_port,
+        'start_method': args.start_method,
+        'index_concurrency': args.index_concurrency,
+        'index_max_mb': args.bulk_max_mb
+    }
+    
+    if args.benchmark:
+        await run_benchmark(args, extraction_profile, pipeline_options)
+        return
+    
+    if args.index_shards:
+        index_shards(args)
+        return
+    
+    if args.score_themes:
+        score_themes(args)
+        return
+    
+    shard_sink = ShardSink(args.write_shards, max_bytes=args.shard_max_mb * 1024 * 1024) if args.write_shards else None
+    processor = DocumentProcessor(
+        source_json_path=args.source,
+        extraction_profile=extraction_profile,
+        ledger_path=None if args.no_ledger else args.ledger,
+        max_connections_per_host=args.connections_per_host,
+        shard=args.shard,
+        lease_queue_path=args.lease_queue,
+        lease_seconds=args.lease_seconds,
+        index_sink=shard_sink,
+        near_duplicates_path=None if args.no_dedup else args.near_duplicates,
+        duplicate_threshold=args.duplicate_threshold,
+        pdf_cache_bytes=int(args.cache_max_gb * 1024 ** 3) if args.cache_max_gb else None,
+        cache_policy=args.cache_policy,
+        cache_pins=args.cache_pin,
+        pipeline_options=pipeline_options
+    )
+    
+    if args.retry_failed_leases and processor.work_queue:
+        logger.info(f"{processor.work_queue.requeue_failed()} itens com falha devolvidos à fila de leases")
     
+    try:
+        await run_processor(processor, args)
+    finally:
+        if shard_sink:
+            shard_sink.close()
+
+async def run_processor(processor: DocumentProcessor, args) -> None:
+    """Executa o modo escolhido na linha de comando"""
     if processor.setup(force_recreate_index=args.recreate_index):
-        if args.local_only:
-            processor.process_local_pdfs(batch_size=args.batch_size)
+        if args.upgrade_fast:
+            processor.upgrade_extraction_profile('fast', max_workers=args.max_workers)
+        elif args.reextract:
+            processor.reextract(max_workers=args.max_workers)
+        elif args.archive:
+            await processor.process_archives(
+                args.archive,
+                batch_size=args.batch_size,
+                max_workers=args.max_workers,
+                queue_size=args.queue_size
+            )
+        elif args.watch:
+            await processor.watch_local_pdfs(
+                batch_size=args.batch_size,
+                max_workers=args.max_workers,
+                queue_size=args.queue_size,
+                poll_interval=args.watch_interval,
+                settle_seconds=args.watch_settle,
+                use_inotify=not args.watch_poll
+            )
+        elif args.local_only:
+            await processor.process_local_pdfs(
+                batch_size=args.batch_size,
+                max_workers=args.max_workers,
+                queue_size=args.queue_size
+            )
         else:
             await processor.run_processing(
                 batch_size=args.batch_size, 
-                max_workers=args.max_workers
+                max_workers=args.max_workers,
+                download_workers=args.download_workers,
+                queue_size=args.queue_size,
+                resume=not args.no_resume,
+                since_ledger=args.since_ledger
+            )
+
+def index_shards(args) -> None:
+    """Carrega shards de documentos já montados em um índice, sem tocar nos PDFs"""
+    es_manager = ElasticsearchManager(index_name=args.index_name)
+    es_manager.create_index(force_recreate=args.recreate_index)
+    
+    start = time.time()
+    result = es_manager.bulk_load(
+        iter_shard_documents(args.index_shards, include_partial=args.include_partial_shards),
+        chunk_size=max(args.batch_size, 100),
+        thread_count=args.index_threads,
+        max_chunk_bytes=args.bulk_max_mb * 1024 * 1024
+    )
+    duration = time.time() - start
+    logger.info(
+        f"{result['success_count']} documentos carregados em {es_manager.index_name} "
+        f"({result['success_count'] / duration if duration else 0:.1f} docs/s), {result['failed_count']} falhas"
+    )
+    for failure in result['failed_docs'][:10]:
+        logger.warning(f" - {failure}")
+
+def score_themes(args) -> None:
+    """Repontua os temas de todo o índice com o themes.json atual, sem ler os textos"""
+    es_manager = ElasticsearchManager(index_name=args.index_name)
+    CorpusThemeScorer(es_manager, ConfigManager("config")).run(min_score=args.theme_min_score)
+
+async def run_benchmark(args, extraction_profile: Dict[str, Any], pipeline_options: Dict[str, Any]) -> None:
+    """Modo --benchmark: pipeline completo com sink local no lugar do Elasticsearch"""
+    pdf_dir = args.benchmark_dir or "src/pdfs"
+    if args.synthetic:
+        pdf_dir = args.benchmark_dir or tempfile.mkdtemp(prefix="oxossi_benchmark_")
+        logger.info(f"Gerando {args.synthetic} PDFs sintéticos em {pdf_dir}")
+        SyntheticCorpus(ConfigManager("config")).generate(pdf_dir, args.synthetic)
+    
+    sink = NDJSONSink(args.sink_path) if args.sink == 'ndjson' else NullSink()
+    processor = DocumentProcessor(
+        pdf_dir=pdf_dir,
+        source_json_path=args.source,
+        extraction_profile=extraction_profile,
+        ledger_path=None,
+        near_duplicates_path=None,
+        index_sink=sink,
+        pipeline_options=pipeline_options
+    )
+    try:
+        if processor.setup():
+            await processor.run_benchmark(
+                args.benchmark_report,
+                batch_size=args.batch_size,
+                max_workers=args.max_workers,
+                queue_size=args.queue_size
             )
+    finally:
+        sink.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Leitor de Manifesto
+Lê o manifesto de itens coletados (array JSON ou JSON Lines, opcionalmente
+comprimidos com gzip) item a item, com memória constante.
+"""
+
+import gzip
+import io
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+FORMAT_ARRAY = 'array'
+FORMAT_JSONL = 'jsonl'
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_WHITESPACE = ' \t\r\n'
+# Caracteres que ainda podem continuar um número JSON
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class ManifestReader:
+    def __init__(self, path: str, chunk_size: int = 1024 * 1024):
+        """Manifesto em path; o formato é detectado pelo primeiro caractere útil"""
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.format = self._detect_format()
+
+    def _open(self) -> io.TextIOBase:
+        """Abre o arquivo como texto, descomprimindo gzip quando necessário"""
+        with open(self.path, 'rb') as f:
+            compressed = f.read(2) == _GZIP_MAGIC
+        if compressed:
+            return io.TextIOWrapper(gzip.open(self.path, 'rb'), encoding='utf-8')
+        return open(self.path, 'r', encoding='utf-8')
+
+    def _detect_format(self) -> str:
+        """'[' indica array JSON; qualquer outro início é tratado como JSON Lines"""
+        with self._open() as f:
+            while True:
+                char = f.read(1)
+                if not char or char not in _WHITESPACE + '﻿':
+                    return FORMAT_ARRAY if char == '[' else FORMAT_JSONL
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self.format == FORMAT_ARRAY:
+            return self._iter_array()
+        return self._iter_jsonl()
+
+    def _iter_jsonl(self) -> Iterator[Dict[str, Any]]:
+        """Um item por linha; linhas vazias são ignoradas e linhas inválidas registradas"""
+        with self._open() as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.error(f"Linha {line_number} inválida em {self.path}: {e}")
+
+    def _iter_array(self) -> Iterator[Dict[str, Any]]:
+        """Decodifica os elementos do array um a um, mantendo no buffer apenas o bloco corrente.
+
+        A posição avança com um índice; o buffer só é recortado quando um novo bloco
+        é lido, nunca a cada item (recortar por item copia o resto do bloco a cada vez).
+        """
+        decoder = json.JSONDecoder()
+        skipped = _WHITESPACE + '\ufeff'
+        with self._open() as f:
+            buffer = ''
+            pos = 0
+            eof = False
+            expecting_value = True
+            started = False
+
+            while True:
+                while pos < len(buffer) and buffer[pos] in skipped:
+                    pos += 1
+                if pos == len(buffer):
+                    if eof:
+                        raise ValueError(f"Fim inesperado do array JSON em {self.path}")
+                    chunk = f.read(self.chunk_size)
+                    eof = not chunk
+                    buffer, pos = chunk, 0
+                    continue
+
+                char = buffer[pos]
+                if not started:
+                    if char != '[':
+                        raise ValueError(f"Manifesto {self.path} não começa com um array JSON")
+                    started = True
+                    pos += 1
+                    continue
+
+                if char == ']':
+                    return
+                if not expecting_value:
+                    if char != ',':
+                        raise ValueError(f"Separador inválido no array JSON em {self.path}: {buffer[pos:pos + 20]!r}")
+                    pos += 1
+                    expecting_value = True
+                    continue
+
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                    # Um número cortado no fim do bloco ("12" | ".5") pode continuar no próximo
+                    complete = eof or (end < len(buffer) and buffer[end] not in _NUMBER_CHARS)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    complete = False
+
+                if not complete:
+                    # Item incompleto no buffer: descarta o que já foi lido e acrescenta o próximo bloco
+                    chunk = f.read(self.chunk_size)
+                    eof = not chunk
+                    buffer, pos = buffer[pos:] + chunk, 0
+                    continue
+
+                pos = end
+                expecting_value = False
+                yield item
+
+    def count(self, use_index: bool = True) -> int:
+        """Total de itens, lido do arquivo de índice ou calculado por uma varredura"""
+        index = self._read_index() if use_index else None
+        if index is not None:
+            return index
+
+        if self.format == FORMAT_JSONL:
+            with self._open() as f:
+                total = sum(1 for line in f if line.strip())
+        else:
+            total = sum(1 for _ in self._iter_array())
+
+        if use_index:
+            self._write_index(total)
+        return total
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(self.path.name + '.count.json')
+
+    def _read_index(self) -> Optional[int]:
+        """Contagem do índice, válida apenas se o manifesto não mudou desde então"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        stat = self.path.stat()
+        if index.get('size') != stat.st_size or index.get('mtime') != stat.st_mtime:
+            return None
+        return index.get('count')
+
+    def _write_index(self, total: int) -> None:
+        stat = self.path.stat()
+        try:
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump({'count': total, 'size': stat.st_size, 'mtime': stat.st_mtime}, f)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o índice do manifesto {self.index_path}: {e}")
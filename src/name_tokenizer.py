@@ -0,0 +1,113 @@
+"""
+Tokenizador de Nomes
+Gera candidatos a nome ([Primeiro] [de/da/do/dos/das] [Sobrenome...]) a partir
+de um fluxo de tokens, em tempo linear no tamanho do texto.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+# Palavras formadas apenas por letras (inclui acentuadas)
+_WORD_RE = re.compile(r'[^\W\d_]+')
+
+TOKEN_OTHER = 0
+TOKEN_CAPITALIZED = 1
+TOKEN_PREPOSITION = 2
+
+
+class NameTokens(NamedTuple):
+    """Tokens do texto em arrays paralelos"""
+    starts: List[int]
+    ends: List[int]
+    kinds: List[int]
+    # linked[i] indica que entre o token i-1 e o token i só há espaços
+    linked: List[bool]
+
+
+class NameSpan(NamedTuple):
+    """Candidato a nome: índices de tokens do primeiro nome e do sobrenome"""
+    first: int
+    surname_start: int
+    surname_end: int
+
+
+class NameCandidateTokenizer:
+    def __init__(self, prepositions: Iterable[str], max_surname_tokens: int = 4):
+        self.prepositions = frozenset(prepositions)
+        self.max_surname_tokens = max_surname_tokens
+
+    def tokenize(self, text: str) -> NameTokens:
+        """Tokeniza o texto uma única vez marcando palavras capitalizadas e preposições"""
+        starts, ends, kinds, linked = [], [], [], []
+        previous_end = None
+
+        for match in _WORD_RE.finditer(text):
+            word = match.group(0)
+            start = match.start()
+
+            if len(word) > 1 and word[0].isupper() and word[1:].islower():
+                kind = TOKEN_CAPITALIZED
+            elif word in self.prepositions:
+                kind = TOKEN_PREPOSITION
+            else:
+                kind = TOKEN_OTHER
+
+            starts.append(start)
+            ends.append(match.end())
+            kinds.append(kind)
+            linked.append(
+                previous_end is not None
+                and start > previous_end
+                and text[previous_end:start].isspace()
+            )
+            previous_end = match.end()
+
+        return NameTokens(starts, ends, kinds, linked)
+
+    def candidate_at(self, tokens: NameTokens, index: int) -> Optional[NameSpan]:
+        """Retorna o candidato que começa no token indicado (janela limitada de sobrenomes)"""
+        kinds, linked = tokens.kinds, tokens.linked
+        total = len(kinds)
+
+        if kinds[index] != TOKEN_CAPITALIZED:
+            return None
+
+        # Preposição opcional entre primeiro nome e sobrenome
+        surname_start = index + 1
+        if surname_start < total and linked[surname_start] and kinds[surname_start] == TOKEN_PREPOSITION:
+            surname_start += 1
+
+        if surname_start >= total or not linked[surname_start] or kinds[surname_start] != TOKEN_CAPITALIZED:
+            return None
+
+        # Estender o sobrenome com palavras capitalizadas (e preposições entre elas)
+        surname_end = surname_start
+        count = 1
+        position = surname_start + 1
+        while position < total and linked[position] and count < self.max_surname_tokens:
+            if kinds[position] == TOKEN_CAPITALIZED:
+                surname_end = position
+                position += 1
+            elif (kinds[position] == TOKEN_PREPOSITION
+                  and position + 1 < total
+                  and linked[position + 1]
+                  and kinds[position + 1] == TOKEN_CAPITALIZED):
+                surname_end = position + 1
+                position += 2
+            else:
+                break
+            count += 1
+
+        return NameSpan(index, surname_start, surname_end)
+
+    def plain_surname_end(self, tokens: NameTokens, span: NameSpan) -> int:
+        """Fim do sobrenome sem preposições internas (só palavras capitalizadas seguidas).
+
+        É o sobrenome que o regex original reconhecia: em "Barra do Rio de Contas" o
+        candidato estendido é "Rio de Contas", o simples é "Rio".
+        """
+        kinds, linked = tokens.kinds, tokens.linked
+        end = span.surname_start
+        while end < span.surname_end and linked[end + 1] and kinds[end + 1] == TOKEN_CAPITALIZED:
+            end += 1
+        return end
@@ -0,0 +1,235 @@
+"""
+Detecção de Quase-Duplicatas
+Assinaturas MinHash de shingles de palavras do texto limpo e índice LSH persistente
+em SQLite: cópias do mesmo documento (outra URL, novo escaneamento, reimpressão) são
+registradas como variantes do documento já indexado em vez de serem indexadas de novo.
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from unidecode import unidecode
+
+logger = logging.getLogger(__name__)
+
+# Primo de Mersenne 2^61 - 1 e máscara de 32 bits das permutações (a * x + b) mod p
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Shingles processados por bloco (limita a matriz shingles x permutações em memória)
+_BLOCK_SIZE = 4096
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS lsh_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS signatures (
+        doc_id TEXT PRIMARY KEY,
+        signature BLOB NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS buckets (
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        doc_id TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket)",
+    "CREATE INDEX IF NOT EXISTS buckets_doc ON buckets (doc_id)",
+    """
+    CREATE TABLE IF NOT EXISTS variants (
+        doc_id TEXT PRIMARY KEY,
+        canonical_id TEXT NOT NULL,
+        similarity REAL NOT NULL,
+        url TEXT,
+        updated_at REAL NOT NULL
+    )
+    """,
+)
+
+
+def shingles(text: str, size: int = 5) -> np.ndarray:
+    """Hashes (crc32) dos shingles de `size` palavras do texto normalizado, sem repetição"""
+    words = re.findall(r'\w+', unidecode(text).lower())
+    if len(words) < size:
+        return np.empty(0, dtype=np.uint64)
+    hashes = {
+        zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+        for i in range(len(words) - size + 1)
+    }
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bandas, linhas) cujo limiar do LSH, (1/b)^(1/r), fica logo abaixo do limiar pedido.
+
+    Candidatos um pouco abaixo do limiar priorizam a revocação; a similaridade
+    estimada pela assinatura completa decide depois.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """Permutações determinísticas pela seed: assinaturas comparáveis entre execuções"""
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, (1 << 32) - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Assinatura MinHash (uint32, num_perm valores) ou None se o texto for curto demais"""
+        hashes = shingles(text, self.shingle_size)
+        if not len(hashes):
+            return None
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _BLOCK_SIZE):
+            block = hashes[start:start + _BLOCK_SIZE, np.newaxis]
+            permuted = ((block * self.a + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Similaridade de Jaccard estimada pela fração de posições iguais das assinaturas"""
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class NearDuplicateIndex:
+    def __init__(self, db_path: str = "near_duplicates.sqlite", threshold: float = 0.9,
+                 num_perm: int = 128, shingle_size: int = 5):
+        """Índice LSH persistente. Bandas e permutações ficam gravadas no arquivo:
+        um índice existente mantém sua configuração e só o limiar pode mudar.
+        """
+        self.db_path = db_path
+        self.threshold = threshold
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self.conn.execute(statement)
+
+        meta = dict(self.conn.execute("SELECT key, value FROM lsh_meta").fetchall())
+        if meta:
+            num_perm, shingle_size = int(meta['num_perm']), int(meta['shingle_size'])
+            self.bands, self.rows = int(meta['bands']), int(meta['rows'])
+        else:
+            self.bands, self.rows = optimal_bands(threshold, num_perm)
+            self.conn.executemany(
+                "INSERT INTO lsh_meta (key, value) VALUES (?, ?)",
+                [('num_perm', str(num_perm)), ('shingle_size', str(shingle_size)),
+                 ('bands', str(self.bands)), ('rows', str(self.rows))]
+            )
+        self.hasher = MinHasher(num_perm, shingle_size)
+        logger.info(
+            f"Índice de quase-duplicatas {db_path}: limiar {threshold}, "
+            f"{self.bands} bandas x {self.rows} linhas"
+        )
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        """Parâmetros para abrir o mesmo índice em outro processo (workers de extração)"""
+        return {'db_path': self.db_path, 'threshold': self.threshold}
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        return self.hasher.signature(text)
+
+    def _buckets(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        """Hash de 63 bits de cada banda da assinatura"""
+        return [
+            (band, int.from_bytes(
+                hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).digest(),
+                'big') >> 1)
+            for band in range(self.bands)
+        ]
+
+    def query(self, signature: Optional[np.ndarray], exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Documento indexado mais parecido com similaridade >= limiar, como (doc_id, similaridade)"""
+        if signature is None:
+            return None
+        candidates = set()
+        for band, bucket in self._buckets(signature):
+            candidates.update(
+                row[0] for row in self.conn.execute(
+                    "SELECT doc_id FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)
+                )
+            )
+        candidates.discard(exclude)
+
+        best = None
+        for doc_id in candidates:
+            row = self.conn.execute("SELECT signature FROM signatures WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row is None:
+                continue
+            score = similarity(signature, np.frombuffer(row[0], dtype=np.uint32))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (doc_id, score)
+        return best
+
+    def insert(self, doc_id: str, signature: np.ndarray) -> None:
+        """Registra (ou substitui) a assinatura de um documento indexado"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete(doc_id)
+            self.conn.execute(
+                "INSERT INTO signatures (doc_id, signature, updated_at) VALUES (?, ?, ?)",
+                (doc_id, signature.astype(np.uint32).tobytes(), time.time())
+            )
+            self.conn.executemany(
+                "INSERT INTO buckets (band, bucket, doc_id) VALUES (?, ?, ?)",
+                [(band, bucket, doc_id) for band, bucket in self._buckets(signature)]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a assinatura (documento que acabou não sendo indexado)"""
+        self._delete(doc_id)
+
+    def _delete(self, doc_id: str) -> None:
+        self.conn.execute("DELETE FROM signatures WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM buckets WHERE doc_id = ?", (doc_id,))
+
+    def link_variant(self, doc_id: str, canonical_id: str, score: float, url: Optional[str] = None) -> None:
+        """Registra o documento como variante de um já indexado"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO variants (doc_id, canonical_id, similarity, url, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (doc_id, canonical_id, round(score, 4), url, time.time())
+        )
+
+    def variants_of(self, canonical_id: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT doc_id, similarity, url FROM variants WHERE canonical_id = ? ORDER BY doc_id", (canonical_id,)
+        ).fetchall()
+        return [{'doc_id': doc_id, 'similarity': score, 'url': url} for doc_id, score, url in rows]
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'documents': self.conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0],
+            'variants': self.conn.execute("SELECT COUNT(*) FROM variants").fetchone()[0],
+        }
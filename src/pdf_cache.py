@@ -0,0 +1,177 @@
+"""
+Cache de PDFs em Disco
+Trata o diretório de PDFs baixados como cache com cota em bytes: cada PDF admitido
+é registrado (tamanho, último acesso, já extraído, fixado) e, quando a cota estoura,
+os menos valiosos são removidos. Só PDFs com origem conhecida (arquivo lateral do
+downloader com a URL) são removíveis, pois podem ser baixados de novo sob demanda.
+"""
+
+import fnmatch
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pdf_downloader import read_sidecar, sidecar_path
+
+logger = logging.getLogger(__name__)
+
+POLICY_LRU = 'lru'
+POLICY_EXTRACTED = 'extracted'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    extracted INTEGER NOT NULL DEFAULT 0,
+    pinned INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Ordem de remoção: 'extracted' remove primeiro o que já está no índice, depois o menos usado
+_EVICTION_ORDER = {
+    POLICY_LRU: "last_access",
+    POLICY_EXTRACTED: "extracted DESC, last_access",
+}
+
+
+class PDFCache:
+    def __init__(self, directory: str, max_bytes: int, policy: str = POLICY_EXTRACTED,
+                 pinned_patterns: Optional[List[str]] = None, db_path: Optional[str] = None):
+        """Cache sobre directory (registro em directory/.pdf_cache.sqlite por padrão).
+
+        pinned_patterns: padrões glob de nomes de arquivo nunca removidos, além dos
+        fixados com pin(). Arquivos em uso pelo pipeline (acquire/release) também
+        não são removidos.
+        """
+        if policy not in _EVICTION_ORDER:
+            raise ValueError(f"Política de remoção desconhecida: {policy}")
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.pinned_patterns = pinned_patterns or []
+        self.db_path = Path(db_path) if db_path else self.directory / '.pdf_cache.sqlite'
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self._in_use: Dict[str, int] = {}
+        self._over_quota = False
+        # Estágio de download chama o cache de várias threads
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(_SCHEMA)
+        self._reconcile()
+        logger.info(
+            f"Cache de PDFs em {self.directory}: {self.used_bytes() / 1024 ** 2:.1f} MB "
+            f"de {self.max_bytes / 1024 ** 2:.1f} MB, política '{self.policy}'"
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _reconcile(self) -> None:
+        """Sincroniza o registro com o disco: PDFs baixados antes do cache entram, removidos à mão saem"""
+        with self._lock:
+            known = {row[0]: row[1] for row in self.conn.execute("SELECT name, size FROM cache_entries")}
+            for name in known:
+                if not (self.directory / name).exists():
+                    self.conn.execute("DELETE FROM cache_entries WHERE name = ?", (name,))
+            for path in self.directory.glob('*.pdf'):
+                if not read_sidecar(path).get('url'):
+                    continue
+                stat = path.stat()
+                if known.get(path.name) != stat.st_size:
+                    self.conn.execute(
+                        "INSERT INTO cache_entries (name, size, last_access) VALUES (?, ?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET size = excluded.size",
+                        (path.name, stat.st_size, stat.st_mtime)
+                    )
+
+    def _is_pinned(self, name: str, pinned: int) -> bool:
+        return bool(pinned) or any(fnmatch.fnmatch(name, pattern) for pattern in self.pinned_patterns)
+
+    def used_bytes(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+
+    def acquire(self, pdf_path: Path) -> None:
+        """Protege o arquivo de remoção enquanto o documento passa pelo pipeline"""
+        with self._lock:
+            self._in_use[pdf_path.name] = self._in_use.get(pdf_path.name, 0) + 1
+
+    def release(self, pdf_path: Path) -> None:
+        """Fim do uso: se a cota estourou enquanto tudo estava em uso, o espaço é liberado agora"""
+        with self._lock:
+            count = self._in_use.get(pdf_path.name, 0) - 1
+            if count > 0:
+                self._in_use[pdf_path.name] = count
+            else:
+                self._in_use.pop(pdf_path.name, None)
+                if self._over_quota:
+                    self._make_room()
+
+    def admit(self, pdf_path: Path) -> None:
+        """Registra o PDF baixado ou revalidado (acesso agora) e libera espaço para ele na cota"""
+        size = pdf_path.stat().st_size
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO cache_entries (name, size, last_access, extracted) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(name) DO UPDATE SET size = excluded.size, last_access = excluded.last_access, "
+                "extracted = 0",
+                (pdf_path.name, size, time.time())
+            )
+            self._make_room()
+
+    def mark_extracted(self, pdf_path: Path) -> None:
+        """Documento já indexado: o PDF vira candidato preferencial à remoção (política 'extracted')"""
+        with self._lock:
+            self.conn.execute("UPDATE cache_entries SET extracted = 1 WHERE name = ?", (pdf_path.name,))
+
+    def pin(self, pdf_path: Path, pinned: bool = True) -> None:
+        """Fixa (ou libera) o PDF no cache de forma persistente"""
+        with self._lock:
+            self.conn.execute("UPDATE cache_entries SET pinned = ? WHERE name = ?", (int(pinned), pdf_path.name))
+
+    def _make_room(self) -> None:
+        """Remove PDFs na ordem da política até o total caber na cota (chamado com o lock)"""
+        used = self.used_bytes()
+        if used <= self.max_bytes:
+            self._over_quota = False
+            return
+        rows = self.conn.execute(
+            f"SELECT name, size, pinned FROM cache_entries ORDER BY {_EVICTION_ORDER[self.policy]}"
+        ).fetchall()
+        for name, size, pinned in rows:
+            if used <= self.max_bytes:
+                break
+            if name in self._in_use or self._is_pinned(name, pinned):
+                continue
+            path = self.directory / name
+            for stale in (path, sidecar_path(path)):
+                try:
+                    stale.unlink()
+                except FileNotFoundError:
+                    pass
+            self.conn.execute("DELETE FROM cache_entries WHERE name = ?", (name,))
+            used -= size
+            self.evicted_files += 1
+            self.evicted_bytes += size
+            logger.debug(f"PDF removido do cache: {name} ({size} bytes)")
+
+        was_over_quota, self._over_quota = self._over_quota, used > self.max_bytes
+        if self._over_quota and not was_over_quota:
+            logger.warning(
+                f"Cache de PDFs acima da cota ({used / 1024 ** 2:.1f} MB de {self.max_bytes / 1024 ** 2:.1f} MB): "
+                f"restantes estão fixados ou em uso"
+            )
+
+    def summary(self) -> Dict[str, int]:
+        files, used = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        return {
+            'files': files,
+            'bytes': used,
+            'evicted_files': self.evicted_files,
+            'evicted_bytes': self.evicted_bytes,
+        }
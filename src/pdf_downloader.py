@@ -0,0 +1,236 @@
+"""
+Downloader de PDFs
+Downloads com pool de conexões e limite de concorrência por host, requisições
+condicionais (ETag/Last-Modified guardados em arquivo lateral), retomada de
+arquivos parciais via HTTP Range e gravação atômica com verificação de tamanho e hash.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+STATUS_DOWNLOADED = 'downloaded'
+STATUS_RESUMED = 'resumed'
+STATUS_NOT_MODIFIED = 'not_modified'
+STATUS_FAILED = 'failed'
+
+
+def sidecar_path(pdf_path: Path) -> Path:
+    """Arquivo lateral com os validadores HTTP e o hash do PDF"""
+    return pdf_path.with_name(pdf_path.name + '.meta.json')
+
+
+def partial_path(pdf_path: Path) -> Path:
+    return pdf_path.with_name(pdf_path.name + '.part')
+
+
+def read_sidecar(pdf_path: Path) -> Dict[str, Any]:
+    try:
+        with open(sidecar_path(pdf_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+class PDFDownloader:
+    def __init__(self, max_per_host: int = 4, timeout: int = 60, chunk_size: int = 64 * 1024,
+                 user_agent: str = 'Mozilla/5.0'):
+        """Downloader compartilhado entre threads"""
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.user_agent = user_agent
+        self._sessions: Dict[str, requests.Session] = {}
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_resources(self, url: str):
+        """Sessão (pool de conexões) e semáforo do host da URL"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_per_host)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = self.user_agent
+                self._sessions[host] = session
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._sessions[host], self._host_slots[host]
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def read_sidecar(self, pdf_path: Path) -> Dict[str, Any]:
+        return read_sidecar(pdf_path)
+
+    def _write_sidecar(self, pdf_path: Path, meta: Dict[str, Any]) -> None:
+        tmp = sidecar_path(pdf_path).with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, sidecar_path(pdf_path))
+
+    def download(self, url: str, pdf_path: Path, expected_sha256: Optional[str] = None,
+                 known_sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Baixa (ou revalida) url em pdf_path.
+
+        expected_sha256 é o hash obrigatório do conteúdo (inclusive de uma cópia local
+        revalidada). known_sha256 é o hash da última cópia válida (ex.: do ledger): uma
+        cópia local reaproveitada após 304 ou completada por Range que não bata com ele
+        é descartada e baixada de novo do zero. Retorna {'status', 'size', 'sha256'};
+        status 'failed' traz também 'error'.
+        """
+        session, slots = self._host_resources(url)
+        with slots:
+            try:
+                return self._download(session, url, Path(pdf_path), expected_sha256, known_sha256)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Erro ao baixar PDF de {url}: {e}")
+                return {'status': STATUS_FAILED, 'error': str(e)}
+            except (OSError, ValueError) as e:
+                logger.error(f"Erro ao salvar PDF {Path(pdf_path).name}: {e}")
+                return {'status': STATUS_FAILED, 'error': str(e)}
+
+    def _download(self, session: requests.Session, url: str, pdf_path: Path,
+                  expected_sha256: Optional[str], known_sha256: Optional[str] = None) -> Dict[str, Any]:
+        meta = self.read_sidecar(pdf_path)
+        if meta and meta.get('url') != url:
+            # URL mudou: o conteúdo local (completo ou parcial) pertence a outra origem
+            for stale in (pdf_path, partial_path(pdf_path)):
+                if stale.exists():
+                    stale.unlink()
+            meta = {}
+
+        # Arquivo completo e conhecido: requisição condicional
+        if pdf_path.exists() and meta.get('size') == pdf_path.stat().st_size:
+            headers = {}
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+            if headers:
+                response = session.get(url, headers=headers, timeout=self.timeout, stream=True)
+                with response:
+                    if response.status_code == 304:
+                        # A cópia local é relida: o arquivo lateral sozinho não garante o conteúdo
+                        sha256 = self._hash_file(pdf_path)
+                        trusted = expected_sha256 or known_sha256 or meta.get('sha256')
+                        if trusted and sha256 != trusted:
+                            logger.warning(f"Cópia local de {pdf_path.name} não confere com o hash conhecido, baixando de novo")
+                            for stale in (pdf_path, partial_path(pdf_path)):
+                                if stale.exists():
+                                    stale.unlink()
+                            return self._download(session, url, pdf_path, expected_sha256)
+                        logger.info(f"PDF não modificado: {pdf_path.name}")
+                        return {'status': STATUS_NOT_MODIFIED, 'size': meta['size'], 'sha256': sha256}
+                    response.raise_for_status()
+                    return self._write_response(response, url, pdf_path, 0, expected_sha256)
+
+        # Arquivo sem validadores (baixado por versões anteriores) é tratado como parcial
+        part = partial_path(pdf_path)
+        if pdf_path.exists() and not part.exists():
+            os.replace(pdf_path, part)
+
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            validator = meta.get('etag') or meta.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator
+
+        logger.info(f"Baixando PDF de: {url}" + (f" (retomando em {offset} bytes)" if offset else ""))
+        response = session.get(url, headers=headers, timeout=self.timeout, stream=True)
+        with response:
+            if response.status_code == 416 and offset:
+                # Range além do fim: a parte local já é o arquivo completo
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                if total.isdigit() and int(total) == offset:
+                    result = self._finalize(url, pdf_path, offset, self._hash_file(part), meta, expected_sha256,
+                                            STATUS_RESUMED)
+                    return self._verify_resumed(session, url, pdf_path, result, expected_sha256, known_sha256)
+                part.unlink()
+                return self._download(session, url, pdf_path, expected_sha256)
+            response.raise_for_status()
+            if response.status_code != 206:
+                offset = 0  # Servidor ignorou o Range ou o arquivo mudou
+            result = self._write_response(response, url, pdf_path, offset, expected_sha256)
+            return self._verify_resumed(session, url, pdf_path, result, expected_sha256, known_sha256)
+
+    def _verify_resumed(self, session: requests.Session, url: str, pdf_path: Path, result: Dict[str, Any],
+                        expected_sha256: Optional[str], known_sha256: Optional[str]) -> Dict[str, Any]:
+        """Arquivo montado a partir de um .part que não bate com o hash conhecido: baixa inteiro.
+
+        Sem validador (If-Range), o servidor pode ter trocado o arquivo entre as duas partes.
+        Um download completo é a referência, mesmo que difira do hash conhecido.
+        """
+        if result['status'] != STATUS_RESUMED or not known_sha256 or result['sha256'] == known_sha256:
+            return result
+        logger.warning(f"PDF retomado {pdf_path.name} não confere com o hash conhecido, baixando de novo")
+        pdf_path.unlink()
+        return self._download(session, url, pdf_path, expected_sha256)
+
+    def _write_response(self, response: requests.Response, url: str, pdf_path: Path, offset: int,
+                        expected_sha256: Optional[str]) -> Dict[str, Any]:
+        """Grava o corpo em .part (anexando a partir de offset) e finaliza"""
+        part = partial_path(pdf_path)
+        digest = self._hash_file(part, digest_only=True) if offset else hashlib.sha256()
+        meta = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        # Validadores gravados antes do corpo permitem retomar com If-Range após uma queda
+        self._write_sidecar(pdf_path, {'url': url, **meta})
+
+        expected_length = response.headers.get('Content-Length')
+        written = 0
+        with open(part, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                f.write(chunk)
+                digest.update(chunk)
+                written += len(chunk)
+
+        # Com Content-Encoding (ex.: gzip), Content-Length conta os bytes transferidos, não os descomprimidos
+        encoded = response.headers.get('Content-Encoding', 'identity').lower() != 'identity'
+        received = response.raw.tell() if encoded else written
+        if expected_length and expected_length.isdigit() and int(expected_length) != received:
+            raise ValueError(f"Tamanho incompleto: {received} de {expected_length} bytes")
+
+        status = STATUS_RESUMED if offset else STATUS_DOWNLOADED
+        return self._finalize(url, pdf_path, offset + written, digest.hexdigest(), meta, expected_sha256, status)
+
+    def _finalize(self, url: str, pdf_path: Path, size: int, sha256: str, meta: Dict[str, Any],
+                  expected_sha256: Optional[str], status: str) -> Dict[str, Any]:
+        """Verifica o hash, renomeia .part atomicamente e grava o arquivo lateral"""
+        part = partial_path(pdf_path)
+        if expected_sha256 and sha256 != expected_sha256:
+            part.unlink()
+            raise ValueError(f"Hash divergente para {pdf_path.name}: {sha256} != {expected_sha256}")
+
+        os.replace(part, pdf_path)
+        self._write_sidecar(pdf_path, {
+            'url': url, 'etag': meta.get('etag'), 'last_modified': meta.get('last_modified'),
+            'size': size, 'sha256': sha256
+        })
+        logger.info(f"PDF salvo em: {pdf_path.name}")
+        return {'status': status, 'size': size, 'sha256': sha256}
+
+    def _hash_file(self, path: Path, digest_only: bool = False):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(chunk)
+        return digest if digest_only else digest.hexdigest()
@@ -5,105 +5,152 @@ Responsável pela extração de texto e metadados dos arquivos PDF
 
 import os
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, BinaryIO, Iterator, Union
 import PyPDF2
 import pdfplumber
 from io import BytesIO
 
 logger = logging.getLogger(__name__)
 
+# Caminho no disco ou stream binário com seek (ex.: membro de um pacote ZIP/TAR)
+PDFSource = Union[str, os.PathLike, BinaryIO]
+
+
+def source_name(pdf_source: PDFSource) -> str:
+    """Nome para logs e metadados: o caminho, ou o atributo name do stream"""
+    return str(pdf_source) if isinstance(pdf_source, (str, os.PathLike)) else str(getattr(pdf_source, 'name', '<stream>'))
+
+
+def source_size(pdf_source: PDFSource) -> int:
+    """Tamanho em bytes do arquivo ou do stream"""
+    if isinstance(pdf_source, (str, os.PathLike)):
+        return Path(pdf_source).stat().st_size
+    return pdf_source.seek(0, os.SEEK_END)
+
+
+@contextmanager
+def open_source(pdf_source: PDFSource) -> Iterator[BinaryIO]:
+    """Arquivo aberto em modo binário; streams são rebobinados e não são fechados aqui"""
+    if isinstance(pdf_source, (str, os.PathLike)):
+        with open(pdf_source, 'rb') as file:
+            yield file
+    else:
+        pdf_source.seek(0)
+        yield pdf_source
+
+
 class PDFProcessor:
     def __init__(self):
         self.max_file_size = 50 * 1024 * 1024  # 50MB
         self.timeout_seconds = 300  # 5 minutos
     
-    def validate_pdf(self, pdf_path: str) -> bool:
+    def validate_pdf(self, pdf_path: PDFSource) -> bool:
         """Valida se o PDF pode ser processado"""
+        name = source_name(pdf_path)
         try:
-            pdf_file = Path(pdf_path)
-            
             # Verificar se arquivo existe
-            if not pdf_file.exists():
+            if isinstance(pdf_path, (str, os.PathLike)) and not Path(pdf_path).exists():
                 logger.error(f"Arquivo não encontrado: {pdf_path}")
                 return False
             
             # Verificar tamanho do arquivo
-            file_size = pdf_file.stat().st_size
+            file_size = source_size(pdf_path)
             if file_size > self.max_file_size:
-                logger.warning(f"Arquivo muito grande ({file_size} bytes): {pdf_path}")
+                logger.warning(f"Arquivo muito grande ({file_size} bytes): {name}")
                 return False
             
             if file_size == 0:
-                logger.error(f"Arquivo vazio: {pdf_path}")
+                logger.error(f"Arquivo vazio: {name}")
                 return False
             
             # Verificar se é um PDF válido
-            with open(pdf_path, 'rb') as file:
+            with open_source(pdf_path) as file:
                 try:
                     pdf_reader = PyPDF2.PdfReader(file)
                     if len(pdf_reader.pages) == 0:
-                        logger.error(f"PDF sem páginas: {pdf_path}")
+                        logger.error(f"PDF sem páginas: {name}")
                         return False
                 except Exception as e:
-                    logger.error(f"PDF corrompido {pdf_path}: {e}")
+                    logger.error(f"PDF corrompido {name}: {e}")
                     return False
             
             return True
             
         except Exception as e:
-            logger.error(f"Erro na validação do PDF {pdf_path}: {e}")
+            logger.error(f"Erro na validação do PDF {name}: {e}")
             return False
     
-    def extract_text(self, pdf_path: str) -> str:
+    def estimate_cost(self, pdf_path: PDFSource) -> float:
+        """Custo relativo de processamento: páginas (lidas do trailer/árvore de páginas) + tamanho"""
+        try:
+            file_size = source_size(pdf_path)
+        except OSError:
+            return 0.0
+        
+        pages = 0
+        try:
+            with open_source(pdf_path) as file:
+                pages = len(PyPDF2.PdfReader(file, strict=False).pages)
+        except Exception:
+            pass  # PDF ilegível: estimar só pelo tamanho
+        
+        # ~200KB equivalem ao custo de uma página de texto
+        return pages + file_size / (200 * 1024)
+    
+    def extract_text(self, pdf_path: PDFSource) -> str:
         """Extrai texto do PDF usando múltiplas estratégias"""
+        name = source_name(pdf_path)
         if not self.validate_pdf(pdf_path):
-            raise ValueError(f"PDF inválido: {pdf_path}")
+            raise ValueError(f"PDF inválido: {name}")
         
         # Tentar com pdfplumber primeiro (melhor qualidade)
         text = self._extract_with_pdfplumber(pdf_path)
         
         # Se falhar, tentar com PyPDF2
         if not text or len(text.strip()) < 100:
-            logger.warning(f"pdfplumber falhou para {pdf_path}, tentando PyPDF2")
+            logger.warning(f"pdfplumber falhou para {name}, tentando PyPDF2")
             text = self._extract_with_pypdf2(pdf_path)
         
         # Limpar e normalizar texto
         text = self._clean_text(text)
         
         if not text or len(text.strip()) < 50:
-            raise ValueError(f"Não foi possível extrair texto significativo de {pdf_path}")
+            raise ValueError(f"Não foi possível extrair texto significativo de {name}")
         
-        logger.info(f"Texto extraído de {pdf_path}: {len(text)} caracteres")
+        logger.info(f"Texto extraído de {name}: {len(text)} caracteres")
         return text
     
-    def _extract_with_pdfplumber(self, pdf_path: str) -> str:
+    def _extract_with_pdfplumber(self, pdf_path: PDFSource) -> str:
         """Extrai texto usando pdfplumber"""
+        name = source_name(pdf_path)
         try:
             text_parts = []
             
-            with pdfplumber.open(pdf_path) as pdf:
+            with open_source(pdf_path) as file, pdfplumber.open(file) as pdf:
                 for page_num, page in enumerate(pdf.pages):
                     try:
                         page_text = page.extract_text()
                         if page_text:
                             text_parts.append(page_text)
                     except Exception as e:
-                        logger.warning(f"Erro na página {page_num + 1} de {pdf_path}: {e}")
+                        logger.warning(f"Erro na página {page_num + 1} de {name}: {e}")
                         continue
             
             return '\n\n'.join(text_parts)
             
         except Exception as e:
-            logger.error(f"Erro com pdfplumber em {pdf_path}: {e}")
+            logger.error(f"Erro com pdfplumber em {name}: {e}")
             return ""
     
-    def _extract_with_pypdf2(self, pdf_path: str) -> str:
+    def _extract_with_pypdf2(self, pdf_path: PDFSource) -> str:
         """Extrai texto usando PyPDF2"""
+        name = source_name(pdf_path)
         try:
             text_parts = []
             
-            with open(pdf_path, 'rb') as file:
+            with open_source(pdf_path) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 
                 for page_num, page in enumerate(pdf_reader.pages):
@@ -112,13 +159,13 @@ class PDFProcessor:
                         if page_text:
                             text_parts.append(page_text)
                     except Exception as e:
-                        logger.warning(f"Erro na página {page_num + 1} de {pdf_path}: {e}")
+                        logger.warning(f"Erro na página {page_num + 1} de {name}: {e}")
                         continue
             
             return '\n\n'.join(text_parts)
             
         except Exception as e:
-            logger.error(f"Erro com PyPDF2 em {pdf_path}: {e}")
+            logger.error(f"Erro com PyPDF2 em {name}: {e}")
             return ""
     
     def _clean_text(self, text: str) -> str:
@@ -162,14 +209,14 @@ class PDFProcessor:
         
         return text
     
-    def extract_metadata(self, pdf_path: str) -> Dict[str, Any]:
+    def extract_metadata(self, pdf_path: PDFSource) -> Dict[str, Any]:
         """Extrai metadados do PDF - nome atualizado"""
         return self.get_metadata(pdf_path)
     
-    def get_metadata(self, pdf_path: str) -> Dict[str, Any]:
+    def get_metadata(self, pdf_path: PDFSource) -> Dict[str, Any]:
         """Extrai metadados do PDF"""
         metadata = {
-            'filename': Path(pdf_path).name,
+            'filename': Path(source_name(pdf_path)).name,
             'file_size': 0,
             'page_count': 0,
             'title': '',
@@ -182,11 +229,10 @@ class PDFProcessor:
         
         try:
             # Metadados do arquivo
-            file_stats = Path(pdf_path).stat()
-            metadata['file_size'] = file_stats.st_size
+            metadata['file_size'] = source_size(pdf_path)
             
             # Metadados do PDF
-            with open(pdf_path, 'rb') as file:
+            with open_source(pdf_path) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 metadata['page_count'] = len(pdf_reader.pages)
                 
@@ -208,7 +254,7 @@ class PDFProcessor:
                         metadata['modification_date'] = str(mod_date)
         
         except Exception as e:
-            logger.warning(f"Erro ao extrair metadados de {pdf_path}: {e}")
+            logger.warning(f"Erro ao extrair metadados de {source_name(pdf_path)}: {e}")
         
         return metadata
     
@@ -235,15 +281,15 @@ class PDFProcessor:
             'avg_chars_per_word': len(text) / len(words) if words else 0
         }
     
-    def extract_text_by_page(self, pdf_path: str) -> List[str]:
+    def extract_text_by_page(self, pdf_path: PDFSource) -> List[str]:
         """Extrai texto página por página"""
         if not self.validate_pdf(pdf_path):
-            raise ValueError(f"PDF inválido: {pdf_path}")
+            raise ValueError(f"PDF inválido: {source_name(pdf_path)}")
         
         pages = []
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
+            with open_source(pdf_path) as file, pdfplumber.open(file) as pdf:
                 for page_num, page in enumerate(pdf.pages):
                     try:
                         page_text = page.extract_text() or ""
@@ -253,7 +299,7 @@ class PDFProcessor:
                         pages.append("")
         
         except Exception as e:
-            logger.error(f"Erro ao extrair páginas de {pdf_path}: {e}")
+            logger.error(f"Erro ao extrair páginas de {source_name(pdf_path)}: {e}")
             raise
         
         return pages
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Métricas do Pipeline
+Vazão e latência (p50/p95) por estágio, profundidade das filas, erros por motivo
+e ETA, publicados em um arquivo de status JSON e/ou em um endpoint HTTP local.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('download', 'parse', 'extract', 'index')
+
+
+def _percentile(ordered: list, fraction: float) -> Optional[float]:
+    """Percentil por posição em uma lista já ordenada"""
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 4)
+
+
+class PipelineMetrics:
+    def __init__(self, window: int = 1000):
+        """Latências mantidas em janelas das últimas `window` medições por estágio"""
+        self.started = time.time()
+        self.counts: Counter = Counter()
+        self.seconds: Counter = Counter()
+        self.pages = 0
+        self.latencies: Dict[str, Deque[float]] = {stage: deque(maxlen=window) for stage in STAGES}
+        self.errors: Counter = Counter()
+        self.latest: Dict[str, Any] = {}
+
+    def record(self, stage: str, seconds: float, documents: int = 1) -> None:
+        """Registra uma execução do estágio (documents > 1 para lotes)"""
+        self.counts[stage] += documents
+        self.seconds[stage] += seconds
+        self.latencies[stage].append(seconds)
+
+    def record_error(self, reason: str) -> None:
+        """Agrupa erros pelo motivo, sem o detalhe específico do item (URL, mensagem da exceção)"""
+        reason = re.sub(r'https?://\S+?(?=:?\s|:?$)', '<url>', reason)
+        self.errors[reason.split(': ')[0][:120]] += 1
+
+    def snapshot(self, queue_depths: Dict[str, int], total: Optional[int], completed: int,
+                 stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Estado atual do pipeline (também guardado em self.latest para o endpoint HTTP)"""
+        elapsed = max(time.time() - self.started, 1e-9)
+        stages = {}
+        for stage in STAGES:
+            ordered = sorted(self.latencies[stage])
+            stages[stage] = {
+                'documents': self.counts[stage],
+                'docs_per_sec': round(self.counts[stage] / elapsed, 3),
+                'seconds': round(self.seconds[stage], 3),
+                'p50_seconds': _percentile(ordered, 0.5),
+                'p95_seconds': _percentile(ordered, 0.95),
+            }
+
+        rate = completed / elapsed
+        eta = (total - completed) / rate if total and rate else None
+        self.latest = {
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'elapsed_seconds': round(elapsed, 1),
+            'total': total,
+            'completed': completed,
+            'processed': stats.get('processed', 0),
+            'skipped': stats.get('skipped', 0),
+            'unchanged': stats.get('unchanged', 0),
+            'errors': stats.get('errors', 0),
+            'errors_by_reason': dict(self.errors.most_common(20)),
+            'pages': self.pages,
+            'pages_per_sec': round(self.pages / elapsed, 3),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'queue_depths': queue_depths,
+            'stages': stages,
+        }
+        return self.latest
+
+
+def write_status_file(path: Path, status: Dict[str, Any]) -> None:
+    """Grava o status de forma atômica (leitores nunca veem um arquivo pela metade)"""
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(status, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+class StatusServer:
+    def __init__(self, get_status: Callable[[], Dict[str, Any]], port: int, host: str = '127.0.0.1'):
+        """Endpoint GET /status servindo o último snapshot em uma thread daemon"""
+        get = get_status
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/status'):
+                    self.send_error(404)
+                    return
+                body = json.dumps(get(), ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> None:
+        self.thread.start()
+        logger.info(f"Status do pipeline em http://{self.server.server_address[0]}:{self.port}/status")
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
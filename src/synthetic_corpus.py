@@ -0,0 +1,98 @@
+"""
+Corpus Sintético
+Gera PDFs de texto com nomes, lugares, datas e termos temáticos das configurações,
+para benchmarks do pipeline sem depender do acervo real.
+"""
+
+import random
+from pathlib import Path
+from typing import List
+
+from config_manager import ConfigManager
+
+_FILLER = (
+    "carta escrita ao governador sobre os negócios da fazenda real e o estado da capitania "
+    "com notícia dos moradores e das embarcações que chegaram ao porto naquele tempo "
+    "requerimento do ouvidor acerca das terras e engenhos da vila segundo o costume"
+).split()
+
+_MONTHS = ("janeiro", "março", "maio", "julho", "setembro", "novembro")
+
+
+def _pdf_string(line: str) -> str:
+    """Escapa uma linha para string literal de PDF (WinAnsi ~ latin-1)"""
+    line = line.encode('latin-1', 'replace').decode('latin-1')
+    return '(' + line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def write_pdf(path: Path, pages: List[List[str]]) -> None:
+    """PDF mínimo, uma lista de linhas por página, em Helvetica"""
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        '<< /Type /Pages /Kids [{}] /Count {} >>'.format(
+            ' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages))), len(pages)
+        ),
+    ]
+    font_id = 3 + 2 * len(pages)
+    for i, lines in enumerate(pages):
+        stream = 'BT /F1 10 Tf 40 800 Td 12 TL ' + ' '.join(f'{_pdf_string(line)} Tj T*' for line in lines) + ' ET'
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {4 + 2 * i} 0 R '
+            f'/Resources << /Font << /F1 {font_id} 0 R >> >> >>'
+        )
+        objects.append(f'<< /Length {len(stream.encode("latin-1"))} >>\nstream\n{stream}\nendstream')
+    objects.append('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    output += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    Path(path).write_bytes(bytes(output))
+
+
+class SyntheticCorpus:
+    def __init__(self, config_manager: ConfigManager = None, seed: int = 0):
+        config_manager = config_manager or ConfigManager()
+        names = config_manager.load_names_config()
+        self.first_names = names['first_names']
+        self.second_names = names['second_names']
+        self.prepositions = names['prepositions']
+        self.places = [place['location'] for place in config_manager.load_places_config()]
+        self.theme_terms = [term for terms in config_manager.load_themes_config().values() for term in terms]
+        self.random = random.Random(seed)
+
+    def _sentence(self) -> str:
+        rng = self.random
+        name = f"{rng.choice(self.first_names)} {rng.choice(self.prepositions)} {rng.choice(self.second_names)}"
+        year = rng.randint(1550, 1820)
+        date = rng.choice((
+            str(year),
+            f"{rng.randint(1, 28)} de {rng.choice(_MONTHS)} de {year}",
+            f"meados do século {rng.choice(('XVI', 'XVII', 'XVIII'))}",
+        ))
+        words = rng.sample(_FILLER, 8)
+        return (
+            f"{name} em {rng.choice(self.places)} no ano de {date}, {' '.join(words)} "
+            f"tratando de {rng.choice(self.theme_terms)}."
+        )
+
+    def page(self, lines: int = 60) -> List[str]:
+        return [self._sentence() for _ in range(lines)]
+
+    def generate(self, directory: str, count: int, min_pages: int = 1, max_pages: int = 20) -> List[Path]:
+        """Gera `count` PDFs com número de páginas assimétrico (poucos documentos grandes)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for index in range(count):
+            # Distribuição enviesada: a maioria pequena, alguns próximos de max_pages
+            pages = min_pages + int((max_pages - min_pages) * self.random.random() ** 3)
+            path = directory / f"synthetic_{index:05d}.pdf"
+            write_pdf(path, [self.page() for _ in range(pages)])
+            paths.append(path)
+        return paths
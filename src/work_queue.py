@@ -0,0 +1,187 @@
+"""
+Distribuição de Trabalho
+Divisão determinística dos itens do manifesto entre instâncias (--shard i/N) e
+fila de leases em SQLite compartilhado, com heartbeat e expiração, para várias
+instâncias do processador consumirem o mesmo manifesto sem repetir itens.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LEASE_PENDING = 'pending'
+LEASE_LEASED = 'leased'
+LEASE_DONE = 'done'
+LEASE_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    source_id TEXT PRIMARY KEY,
+    payload TEXT,
+    state TEXT NOT NULL,
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    revision TEXT
+)
+"""
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping & Veach): ao mudar N, só ~1/N dos itens trocam de shard"""
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_of(source_id: str, shards: int) -> int:
+    """Shard de um item a partir do _id de origem (estável entre execuções e máquinas)"""
+    key = int.from_bytes(hashlib.sha1(source_id.encode('utf-8')).digest()[:8], 'big')
+    return jump_hash(key, shards)
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Converte 'i/N' em (i, N), com 0 <= i < N"""
+    try:
+        index, total = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard inválido '{value}': use o formato i/N")
+    if total < 1 or not 0 <= index < total:
+        raise ValueError(f"Shard inválido '{value}': é preciso 0 <= i < N")
+    return index, total
+
+
+class LeaseQueue:
+    def __init__(self, db_path: str, worker_id: Optional[str] = None, lease_seconds: float = 600.0):
+        """Fila de leases em um arquivo SQLite acessível a todas as instâncias.
+
+        O SQLite depende de locks de arquivo confiáveis: em armazenamento de rede,
+        usar um sistema de arquivos com suporte a locks POSIX.
+        """
+        self.db_path = db_path
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(leases)")}
+        if 'revision' not in columns:
+            # Fila criada antes da coluna de revisão
+            self.conn.execute("ALTER TABLE leases ADD COLUMN revision TEXT")
+        logger.info(f"Fila de leases {db_path} aberta como {self.worker_id}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def acquire(self, source_id: str, item: Optional[Dict[str, Any]] = None,
+                revision: Optional[str] = None, reopen: bool = False) -> bool:
+        """Tenta obter o lease do item; falha se outra instância o detém ou já o concluiu.
+
+        revision identifica o conteúdo do item e a versão de extração: um item concluído
+        ou com falha em outra revisão volta a ser processado (linhas sem revisão comparam
+        o item armazenado). Com reopen, usado quando o ledger do chamador indica que o
+        item precisa ser processado, itens com falha também são reassumidos.
+        """
+        now = time.time()
+        payload = json.dumps(item, ensure_ascii=False) if item is not None else None
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO leases (source_id, payload, state, updated_at, revision) VALUES (?, ?, ?, ?, ?)",
+                (source_id, payload, LEASE_PENDING, now, revision)
+            )
+            cursor = self.conn.execute(
+                "UPDATE leases SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?, "
+                "payload = COALESCE(?, payload), revision = COALESCE(?, revision), error = NULL "
+                "WHERE source_id = ? AND (state = ? OR (state = ? AND lease_expires < ?) OR (state = ? AND ?) "
+                "OR (state IN (?, ?) AND ? IS NOT NULL AND "
+                "(revision != ? OR (revision IS NULL AND payload IS NOT ?))))",
+                (LEASE_LEASED, self.worker_id, now + self.lease_seconds, now, payload, revision,
+                 source_id, LEASE_PENDING, LEASE_LEASED, now, LEASE_FAILED, reopen,
+                 LEASE_DONE, LEASE_FAILED, revision, revision, payload)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def expired_items(self) -> Iterator[Dict[str, Any]]:
+        """Itens cujo lease já expirou (instância parada) e que puderam ser reassumidos agora.
+
+        Leases de outras instâncias que ainda não expiraram não aparecem aqui: ver
+        next_expiry() para esperar por eles.
+        """
+        while True:
+            row = self.conn.execute(
+                "SELECT source_id, payload FROM leases WHERE state = ? AND lease_expires < ? LIMIT 1",
+                (LEASE_LEASED, time.time())
+            ).fetchone()
+            if row is None:
+                return
+            source_id, payload = row
+            if payload and self.acquire(source_id):
+                logger.info(f"Lease expirado reassumido: {source_id}")
+                yield json.loads(payload)
+            elif not payload:
+                self.fail(source_id, "Lease expirado sem item armazenado")
+
+    def next_expiry(self) -> Optional[float]:
+        """Segundos até o próximo lease de outra instância expirar (0 se já expirado), None se não há nenhum.
+
+        Um lease renovado por heartbeat é adiado a cada consulta; ele some quando a
+        outra instância conclui o item ou para, e então expira e é reassumido.
+        """
+        earliest = self.conn.execute(
+            "SELECT MIN(lease_expires) FROM leases WHERE state = ? AND owner != ?",
+            (LEASE_LEASED, self.worker_id)
+        ).fetchone()[0]
+        if earliest is None:
+            return None
+        return max(0.0, earliest - time.time())
+
+    def heartbeat(self) -> int:
+        """Renova todos os leases desta instância; retorna quantos foram renovados"""
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE leases SET lease_expires = ?, updated_at = ? WHERE owner = ? AND state = ?",
+            (now + self.lease_seconds, now, self.worker_id, LEASE_LEASED)
+        )
+        return cursor.rowcount
+
+    def complete(self, source_id: str) -> None:
+        self._finish(source_id, LEASE_DONE, None)
+
+    def fail(self, source_id: str, error: str) -> None:
+        self._finish(source_id, LEASE_FAILED, error)
+
+    def _finish(self, source_id: str, state: str, error: Optional[str]) -> None:
+        self.conn.execute(
+            "UPDATE leases SET state = ?, error = ?, lease_expires = NULL, updated_at = ? "
+            "WHERE source_id = ? AND owner = ?",
+            (state, error, time.time(), source_id, self.worker_id)
+        )
+
+    def requeue_failed(self) -> int:
+        """Devolve à fila os itens com falha, para uma nova tentativa"""
+        cursor = self.conn.execute(
+            "UPDATE leases SET state = ?, owner = NULL, updated_at = ? WHERE state = ?",
+            (LEASE_PENDING, time.time(), LEASE_FAILED)
+        )
+        return cursor.rowcount
+
+    def summary(self) -> Dict[str, int]:
+        rows: List[tuple] = self.conn.execute("SELECT state, COUNT(*) FROM leases GROUP BY state").fetchall()
+        return dict(rows)
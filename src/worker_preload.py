@@ -0,0 +1,20 @@
+"""
+Pré-carregamento dos Workers
+Importado pelo forkserver: faz os imports pesados (pdfplumber/pdfminer, PyPDF2,
+fuzzywuzzy, unidecode) e constrói PDFProcessor/DataExtractor uma única vez.
+Os workers são criados por fork a partir desse processo e herdam o estado pronto.
+"""
+
+import gc
+import json
+import os
+
+from src.ingestion_pipeline import PRELOAD_ENV, init_worker
+
+_spec = os.environ.get(PRELOAD_ENV)
+if _spec:
+    _config_dir, _extraction_profile = json.loads(_spec)
+    init_worker(_config_dir, _extraction_profile)
+    # Objetos do estado pré-carregado fora do alcance do GC: o coletor não toca
+    # nessas páginas nos filhos, preservando o compartilhamento copy-on-write
+    gc.freeze()